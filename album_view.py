@@ -1,159 +1,313 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QListWidget, 
-                            QLabel, QPushButton, QGroupBox, QListWidgetItem,
-                            QFrame, QScrollArea, QSizePolicy)
-from PyQt6.QtCore import Qt, QSize, QMimeData, QPoint
-from PyQt6.QtGui import QFont, QPalette, QColor, QDrag, QPixmap
-from mutagen.easyid3 import EasyID3
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
+                            QFrame, QTreeView, QStyledItemDelegate, QStyle,
+                            QAbstractItemView, QCheckBox)
+from PyQt6.QtCore import (Qt, QSize, QMimeData, QByteArray, QModelIndex, QRectF,
+                          QAbstractItemModel, pyqtSignal)
+from PyQt6.QtGui import QFont, QColor, QPen
 import os
+from library import album_name, group_by_album, renumber
+from mpeg_info import format_duration
 
-class SmoothScrollArea(QScrollArea):
-    def wheelEvent(self, event):
-        # Make scrolling fluid based on estimated track height
+TRACK_MIME_TYPE = 'application/x-mp3-manager-track'
+ALBUM_ROW_HEIGHT = 92 # Album name header, including the gap above each album card
+TRACK_ROW_HEIGHT = 62
+# Right-hand text of a row: track count and total length for albums, length and bitrate for tracks
+DETAIL_ROLE = Qt.ItemDataRole.UserRole
+# Built once: flags() runs for every row when the tree is laid out
+ALBUM_FLAGS = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsDropEnabled
+TRACK_FLAGS = ALBUM_FLAGS | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
 
-        # Estimate track height including padding, margin, and layout spacing
-        # MinHeight (60) + VertPadding (10+10) + MarginBottom (2) + LayoutSpacing (10) = 92
-        estimated_track_height = 92
+class AlbumGroup:
+    __slots__ = ('name', 'files')
 
-        # Get degrees of wheel rotation (standard is 15 degrees per detent)
-        degrees = event.angleDelta().y() / 8.0
+    def __init__(self, name, files):
+        self.name = name
+        self.files = files # MP3File list in display (track) order
 
-        # Calculate scroll amount to approximate scrolling by track height
-        # Assuming one detent (15 degrees) should scroll by roughly one track height
-        # Pixels per degree = estimated_track_height / degrees_per_detent = 92 / 15 ≈ 6.13
-        pixels_per_degree = estimated_track_height / 15.0 # Use float division
+def contiguous_runs(rows):
+    """Yield (first, last) runs of sorted rows from the bottom up, for removals."""
+    rows = sorted(set(rows), reverse=True)
+    while rows:
+        last = first = rows.pop(0)
+        while rows and rows[0] == first - 1:
+            first = rows.pop(0)
+        yield first, last
 
-        scroll_amount = int(degrees * pixels_per_degree)
+class AlbumTreeModel(QAbstractItemModel):
+    """Two-level model: albums at the top level, their tracks as children.
 
-        self.verticalScrollBar().setValue(self.verticalScrollBar().value() - scroll_amount)
+    Track indices carry their AlbumGroup as internal pointer. Tracks can be dragged
+    to a new position inside their own album; the order lives in the model, so it is
+    known for every album whether or not it was ever scrolled into view.
 
-class DraggableTrackLabel(QLabel):
-    def __init__(self, title, mp3_file_path, parent=None):
-        super().__init__(title, parent)
-        self.mp3_file_path = mp3_file_path # Store the file path
-        self.setMinimumHeight(60)
-        self.setAlignment(Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft)
-        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.MinimumExpanding)
-        self.setStyleSheet("color: #000; font-size: 15px; padding: 10px 12px; background-color: #f0f0f0; margin-bottom: 2px; border-radius: 4px;") # Added background for visibility and margin
+    The model doubles as the persistent album index: add_files, remove_files,
+    retag_files and refresh_files update only the affected groups and emit the
+    matching row insert/remove/move and dataChanged signals, never a full reset.
+    """
 
-    def mouseMoveEvent(self, e):
-        if e.buttons() == Qt.MouseButton.LeftButton:
-            drag = QDrag(self)
-            mime = QMimeData()
-            mime.setText(self.mp3_file_path) # Store the file path in mime data
-            drag.setMimeData(mime)
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.albums = []
+        self.album_rows = {} # id(AlbumGroup) -> row
+        self.albums_by_name = {} # album name -> AlbumGroup
+        self.album_of = {} # id(MP3File) -> AlbumGroup holding it
 
-            pixmap = QPixmap(self.size())
-            self.render(pixmap)
-            drag.setPixmap(pixmap)
+    def set_files(self, mp3_files):
+        self.beginResetModel()
+        self.albums = [AlbumGroup(name, files) for name, files in group_by_album(mp3_files).items()]
+        self._reindex_albums()
+        self.album_of = {id(mp3_file): album for album in self.albums for mp3_file in album.files}
+        self.endResetModel()
 
-            drag.exec(Qt.DropAction.MoveAction)
+    def _reindex_albums(self):
+        self.album_rows = {id(album): row for row, album in enumerate(self.albums)}
+        self.albums_by_name = {album.name: album for album in self.albums}
 
-class AlbumContainerWidget(QWidget):
-    def __init__(self, album_name, files, parent=None):
-        super().__init__(parent)
-        self.album_name = album_name
-        self.files = files
-        self.setAcceptDrops(True)
-        self.setup_ui()
+    def album_index(self, album):
+        return self.createIndex(self.album_rows[id(album)], 0, None)
 
-    def setup_ui(self):
-        layout = QVBoxLayout(self)
-        layout.setSpacing(10) # Increased spacing between tracks
-        layout.setContentsMargins(20, 30, 20, 20) # Increased padding within the box
-        self.setStyleSheet('''
-            AlbumContainerWidget {
-                background: #ffffff; /* White background */
-                border: 1px solid #d0d0d0; /* Slightly more prominent border */
-                border-radius: 10px; /* Slightly more rounded corners */
-                margin-bottom: 20px; /* More space between album boxes */
-                /* box-shadow: 2px 2px 5px rgba(0, 0, 0, 0.1); /* Subtle shadow */ */
-            }
-            /* Styles for QLabel:first-child removed to apply directly */
-        ''')
-
-        album_label = QLabel(self.album_name)
-        album_label.setMinimumHeight(75)
-        album_label.setAlignment(Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft)
-        # Apply styles directly to the album_label
-        album_label.setStyleSheet("""
-            font-weight: bold;
-            font-size: 32px; /* Further increased font size */
-            color: #000000; /* Black text for maximum prominence */
-            padding: 0px 0px 15px 0px; /* Adjusted padding */
-            border-bottom: 1px solid #cccccc; /* Slightly darker separator */
-            margin-bottom: 15px; /* More space below album name */
-        """)
-        layout.addWidget(album_label)
+    def add_files(self, mp3_files):
+        new_albums = []
+        for name, files in group_by_album(mp3_files).items():
+            album = self.albums_by_name.get(name)
+            if album is None:
+                album = AlbumGroup(name, files)
+                self.albums_by_name[name] = album
+                new_albums.append(album)
+            else:
+                start = len(album.files)
+                self.beginInsertRows(self.album_index(album), start, start + len(files) - 1)
+                album.files.extend(files)
+                self.endInsertRows()
+            for mp3_file in files:
+                self.album_of[id(mp3_file)] = album
+        if new_albums:
+            start = len(self.albums)
+            self.beginInsertRows(QModelIndex(), start, start + len(new_albums) - 1)
+            for row, album in enumerate(new_albums, start):
+                self.albums.append(album)
+                self.album_rows[id(album)] = row
+            self.endInsertRows()
+
+    def remove_files(self, mp3_files):
+        rows_by_album = {}
+        for mp3_file in mp3_files:
+            album = self.album_of.pop(id(mp3_file), None)
+            if album is not None:
+                rows_by_album.setdefault(id(album), (album, set()))[1].add(id(mp3_file))
+        emptied = []
+        for album, removed in rows_by_album.values():
+            rows = [row for row, mp3_file in enumerate(album.files) if id(mp3_file) in removed]
+            if len(rows) == len(album.files):
+                emptied.append(self.album_rows[id(album)])
+                continue
+            album_index = self.album_index(album)
+            for first, last in contiguous_runs(rows):
+                self.beginRemoveRows(album_index, first, last)
+                del album.files[first:last + 1]
+                self.endRemoveRows()
+        if emptied:
+            for first, last in contiguous_runs(emptied):
+                self.beginRemoveRows(QModelIndex(), first, last)
+                del self.albums[first:last + 1]
+                self.endRemoveRows()
+            self._reindex_albums()
+
+    def retag_files(self, mp3_files):
+        """Move files whose album tag changed to their new group, refresh the others."""
+        moved = [mp3_file for mp3_file in mp3_files
+                 if id(mp3_file) in self.album_of and self.album_of[id(mp3_file)].name != album_name(mp3_file)]
+        if moved:
+            self.remove_files(moved)
+            self.add_files(moved)
+        self.refresh_files(mp3_files)
+
+    def refresh_files(self, mp3_files):
+        """Repaint the rows of files whose name or tags changed in place."""
+        rows_by_album = {}
+        for mp3_file in mp3_files:
+            album = self.album_of.get(id(mp3_file))
+            if album is not None:
+                rows_by_album.setdefault(id(album), (album, set()))[1].add(id(mp3_file))
+        for album, changed in rows_by_album.values():
+            album_index = self.album_index(album)
+            rows = [row for row, mp3_file in enumerate(album.files) if id(mp3_file) in changed]
+            self.dataChanged.emit(self.index(min(rows), 0, album_index), self.index(max(rows), 0, album_index))
+            self.dataChanged.emit(album_index, album_index, [DETAIL_ROLE]) # Total length
 
-        for file in self.files:
+    def album_for(self, index):
+        """The AlbumGroup an index belongs to (the album itself or a track's album)."""
+        album = index.internalPointer()
+        return album if album is not None else self.albums[index.row()]
+
+    def index(self, row, column, parent=QModelIndex()):
+        if column != 0 or row < 0:
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, 0, None) if row < len(self.albums) else QModelIndex()
+        if parent.internalPointer() is not None:
+            return QModelIndex() # Tracks have no children
+        album = self.albums[parent.row()]
+        return self.createIndex(row, 0, album) if row < len(album.files) else QModelIndex()
+
+    def parent(self, index):
+        album = index.internalPointer() if index.isValid() else None
+        if album is None:
+            return QModelIndex()
+        return self.createIndex(self.album_rows[id(album)], 0, None)
+
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid():
+            return len(self.albums)
+        if parent.internalPointer() is None:
+            return len(self.albums[parent.row()].files)
+        return 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        album = index.internalPointer()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if album is None:
+                return self.albums[index.row()].name
             # Use the filename for the track label text
-            title = os.path.basename(file.path)
-            # if not title:
-            #     title = "(No Title)"
-            track_label = DraggableTrackLabel(title, file.path) # Pass file path
-            layout.addWidget(track_label)
-
-    def dragEnterEvent(self, event):
-        if event.mimeData().hasText():
-            event.acceptProposedAction()
-
-    def dragMoveEvent(self, event):
-        if event.mimeData().hasText():
-            event.acceptProposedAction()
-
-    def dropEvent(self, event):
-        if event.mimeData().hasText():
-            # dropped_file_path = event.mimeData().text() # Not used in drop logic, retrieved from source_widget later
-            source_widget = event.source()
-
-            # Ensure the source of the drop is a DraggableTrackLabel from this album
-            if not isinstance(source_widget, DraggableTrackLabel) or source_widget.parent() != self:
-                event.ignore()
-                return
-
-            drop_pos_in_container = event.position().toPoint() # Corrected method
-            target_index = -1
-
-            # Find the position to insert the dropped widget
-            for i in range(self.layout().count()):
-                widget = self.layout().itemAt(i).widget()
-                # Only consider track labels for drop position calculation
-                if isinstance(widget, DraggableTrackLabel):
-                    widget_geometry = widget.geometry()
-                    # Check if the drop position is above the vertical midpoint of the widget
-                    if drop_pos_in_container.y() < widget_geometry.center().y():
-                        target_index = i
-                        break
-
-            # If target_index is still -1, it means drop at the end
-            if target_index == -1:
-                 target_index = self.layout().count()
-
-            # Remove the source widget from its original position
-            # Need to find the source widget in the current layout first
-            source_index = -1
-            for i in range(self.layout().count()):
-                widget = self.layout().itemAt(i).widget()
-                if widget == source_widget:
-                    source_index = i
-                    break
-
-            if source_index != -1:
-                # Remove the widget from the layout without deleting it
-                self.layout().takeAt(source_index)
-
-                # Adjust target_index if dropping after the original position
-                if target_index > source_index:
-                    target_index -= 1
-
-            # Insert the source widget at the target position
-            self.layout().insertWidget(target_index, source_widget)
-
-            event.acceptProposedAction()
+            return os.path.basename(album.files[index.row()].path)
+        if role == DETAIL_ROLE:
+            if album is None:
+                files = self.albums[index.row()].files
+                total = format_duration(sum(mp3_file.audio[0] for mp3_file in files))
+                return f"{len(files)} tracks" + (f" · {total}" if total else "")
+            duration, bitrate, vbr = album.files[index.row()].audio
+            if not bitrate:
+                return ''
+            return f"{format_duration(duration)} · {bitrate} kbps{' VBR' if vbr else ''}"
+        if role == Qt.ItemDataRole.ToolTipRole and album is not None:
+            return album.files[index.row()].path
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return ALBUM_FLAGS if index.internalPointer() is None else TRACK_FLAGS
+
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [TRACK_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        index = indexes[0]
+        mime = QMimeData()
+        album_row = self.album_rows[id(index.internalPointer())]
+        mime.setData(TRACK_MIME_TYPE, QByteArray(f"{album_row}:{index.row()}".encode()))
+        return mime
+
+    def _drop_target(self, data, row, parent):
+        # Resolve a drop to (album, source row, insertion row), or None if not allowed
+        if not data.hasFormat(TRACK_MIME_TYPE) or not parent.isValid():
+            return None
+        album_row, source_row = (int(part) for part in bytes(data.data(TRACK_MIME_TYPE)).decode().split(':'))
+        album = self.album_for(parent)
+        if self.album_rows.get(id(album)) != album_row:
+            return None # Tracks only move within their own album
+        if parent.internalPointer() is not None:
+            row = parent.row() # Dropped onto a track: insert in front of it
+        elif row < 0:
+            row = 0 # Dropped onto the album header
+        return album, source_row, row
+
+    def canDropMimeData(self, data, action, row, column, parent):
+        return self._drop_target(data, row, parent) is not None
+
+    def dropMimeData(self, data, action, row, column, parent):
+        target = self._drop_target(data, row, parent)
+        if target is None:
+            return False
+        album, source_row, dest_row = target
+        self.move_track(album, source_row, dest_row)
+        # Returning False stops the view from also removing the dragged source row
+        return False
+
+    def move_track(self, album, source_row, dest_row):
+        if dest_row in (source_row, source_row + 1):
+            return
+        album_index = self.createIndex(self.album_rows[id(album)], 0, None)
+        self.beginMoveRows(album_index, source_row, source_row, album_index, dest_row)
+        album.files.insert(dest_row if dest_row < source_row else dest_row - 1, album.files.pop(source_row))
+        self.endMoveRows()
+
+class AlbumDelegate(QStyledItemDelegate):
+    """Paints album headers and track rows as cards; no widget exists per album or track."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.album_font = QFont()
+        self.album_font.setPixelSize(28)
+        self.album_font.setBold(True)
+        self.track_font = QFont()
+        self.track_font.setPixelSize(15)
+        self.detail_font = QFont()
+        self.detail_font.setPixelSize(14)
+        self.album_size = QSize(0, ALBUM_ROW_HEIGHT)
+        self.track_size = QSize(0, TRACK_ROW_HEIGHT)
+
+    def sizeHint(self, option, index):
+        # Only albums have no internal pointer; avoids a parent() round trip per row
+        return self.album_size if index.internalPointer() is None else self.track_size
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        text = index.data(Qt.ItemDataRole.DisplayRole)
+        card = QRectF(option.rect).adjusted(8, 0, -8, 0)
+        if not index.parent().isValid():
+            # Album header: top of a white card, with a gap above it separating albums
+            card.setTop(card.top() + 20)
+            painter.setClipRect(option.rect) # Only the top corners of the card are rounded
+            painter.setPen(QPen(QColor('#d0d0d0')))
+            painter.setBrush(QColor('#ffffff'))
+            painter.drawRoundedRect(card.adjusted(0, 0, 0, 12), 10, 10)
+            painter.setPen(QPen(QColor('#cccccc')))
+            painter.drawLine(int(card.left() + 20), int(card.bottom()) - 1, int(card.right() - 20), int(card.bottom()) - 1)
+            painter.setFont(self.album_font)
+            painter.setPen(QColor('#000000'))
+            text_rect = card.adjusted(20, 0, -20, -6)
+        else:
+            painter.fillRect(card, QColor('#ffffff'))
+            pill = card.adjusted(20, 5, -20, -5)
+            selected = option.state & QStyle.StateFlag.State_Selected
+            painter.setPen(Qt.PenStyle.NoPen)
+            painter.setBrush(QColor('#e8f0fe' if selected else '#f0f0f0'))
+            painter.drawRoundedRect(pill, 4, 4)
+            painter.setFont(self.track_font)
+            painter.setPen(QColor('#000000'))
+            text_rect = pill.adjusted(12, 0, -12, 0)
+        font = painter.font()
+        detail = index.data(DETAIL_ROLE)
+        if detail:
+            # Drawn first so the name is elided to the space left of it
+            painter.setFont(self.detail_font)
+            painter.setPen(QColor('#666666'))
+            detail_width = painter.fontMetrics().horizontalAdvance(detail)
+            painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignRight, detail)
+            text_rect = text_rect.adjusted(0, 0, -(detail_width + 16), 0)
+            painter.setFont(font)
+            painter.setPen(QColor('#000000'))
+        elided = painter.fontMetrics().elidedText(text, Qt.TextElideMode.ElideRight, int(text_rect.width()))
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, elided)
+        painter.restore()
 
 class AlbumView(QWidget):
+    # (MP3File, tracknumber) for tracks whose number changed, and the MP3Files left as they are
+    track_order_accepted = pyqtSignal(list, list)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.album_model = AlbumTreeModel(self)
         self.setup_ui()
         self.mp3_files = []
     
@@ -170,6 +324,12 @@ class AlbumView(QWidget):
         title = QLabel("Album View")
         title.setStyleSheet("font-size: 20px; font-weight: bold; color: #333; margin-top: 18px;")
         header_layout.addWidget(title)
+        header_layout.addStretch(1)
+        
+        # Write "3/12" instead of "3"
+        self.total_checkbox = QCheckBox("Include track total (n/total)")
+        self.total_checkbox.setStyleSheet("color: #333; margin-top: 6px;")
+        header_layout.addWidget(self.total_checkbox)
         
         # Accept button
         accept_btn = QPushButton("Save Track Order")
@@ -181,7 +341,7 @@ class AlbumView(QWidget):
         layout.addWidget(header)
         
         # Add instructional description
-        description = QLabel("Drag and drop tracks within each album to reorder them. Click 'Save Track Order' to update track numbers in the files.")
+        description = QLabel("Drag and drop tracks within each album to reorder them. Click 'Save Track Order' to stage the numbers of the tracks that moved.")
         description.setWordWrap(True)
         description.setStyleSheet("color: #444; font-size: 14px; background: #f8f9fa; border: 1px solid #e0e0e0; border-radius: 4px; padding: 8px 12px; margin-bottom: 8px;")
         layout.addWidget(description)
@@ -192,11 +352,24 @@ class AlbumView(QWidget):
         separator.setStyleSheet("background-color: #ddd;")
         layout.addWidget(separator)
         
-        # Album list in a scroll area
-        scroll_area = SmoothScrollArea()
-        scroll_area.setWidgetResizable(True)
-        scroll_area.setStyleSheet("""
-            QScrollArea {
+        # Album list: a tree of albums and tracks drawn by a delegate, so only the
+        # rows in the viewport are ever painted and nothing is built per album
+        self.album_list = QTreeView()
+        self.album_list.setModel(self.album_model)
+        self.album_list.setItemDelegate(AlbumDelegate(self.album_list))
+        self.album_list.setHeaderHidden(True)
+        self.album_list.setRootIsDecorated(False)
+        self.album_list.setItemsExpandable(False)
+        self.album_list.setIndentation(0)
+        self.album_list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.album_list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self.album_list.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self.album_list.setDropIndicatorShown(True)
+        # Smooth scrolling, roughly one track per wheel step
+        self.album_list.setVerticalScrollMode(QAbstractItemView.ScrollMode.ScrollPerPixel)
+        self.album_list.verticalScrollBar().setSingleStep(TRACK_ROW_HEIGHT // 3)
+        self.album_list.setStyleSheet("""
+            QTreeView {
                 border: none;
                 background-color: transparent;
             }
@@ -215,79 +388,42 @@ class AlbumView(QWidget):
                 height: 0px;
             }
         """)
-        
-        self.album_list = QListWidget()
-        self.album_list.setDragDropMode(QListWidget.DragDropMode.InternalMove)
-        self.album_list.setStyleSheet("""
-            QListWidget {
-                background-color: transparent;
-                border: none;
-            }
-            QListWidget::item {
-                background-color: white;
-                border-radius: 8px;
-                margin: 8px;
-                padding: 8px;
-            }
-            QListWidget::item:selected {
-                background-color: #e8f0fe;
-            }
-        """)
-        
-        scroll_area.setWidget(self.album_list)
-        layout.addWidget(scroll_area)
+        self.album_model.rowsInserted.connect(self.expand_new_albums)
+        layout.addWidget(self.album_list)
     
     def load_albums(self, mp3_files):
+        """Rebuild the album index from scratch; prefer the incremental methods below."""
         self.mp3_files = mp3_files
-        self.album_list.clear()
-        
-        # Group files by album
-        albums = {}
-        for mp3_file in mp3_files:
-            album = mp3_file.metadata.get('album', 'Unknown Album')
-            if album not in albums:
-                albums[album] = []
-            albums[album].append(mp3_file)
-        
-        # Create album groups
-        for album_name, files in albums.items():
-            # Create a widget to hold the album group
-            album_widget = AlbumContainerWidget(album_name, files)
-            
-            # Calculate total height needed for the album widget content
-            content_height = album_widget.sizeHint().height()
-
-            # Create list item and set the widget
-            item = QListWidgetItem()
-            item.setSizeHint(QSize(album_widget.sizeHint().width(), content_height))
-            self.album_list.addItem(item)
-            self.album_list.setItemWidget(item, album_widget)
+        self.album_model.set_files(mp3_files)
+        # Albums are always shown open; expanding is cheap since rows are painted lazily
+        self.album_list.expandAll()
+    
+    def add_files(self, mp3_files):
+        self.album_model.add_files(mp3_files)
+    
+    def remove_files(self, mp3_files):
+        self.album_model.remove_files(mp3_files)
+    
+    def retag_files(self, mp3_files):
+        self.album_model.retag_files(mp3_files)
+    
+    def refresh_files(self, mp3_files):
+        self.album_model.refresh_files(mp3_files)
+    
+    def expand_new_albums(self, parent, first, last):
+        if not parent.isValid():
+            for row in range(first, last + 1):
+                self.album_list.setExpanded(self.album_model.index(row, 0), True)
     
     def get_album_track_order(self):
+        # Read from the model, so albums that were never rendered are included too
         album_track_orders = {}
-        for i in range(self.album_list.count()):
-            item = self.album_list.item(i)
-            album_widget = self.album_list.itemWidget(item)
-            if isinstance(album_widget, AlbumContainerWidget):
-                album_name = album_widget.album_name
-                track_order = []
-                # Iterate through the layout of the AlbumContainerWidget
-                for j in range(album_widget.layout().count()):
-                    widget = album_widget.layout().itemAt(j).widget()
-                    # Check if the widget is a DraggableTrackLabel and not the album_label
-                    if isinstance(widget, DraggableTrackLabel):
-                         track_order.append(widget.mp3_file_path)
-                album_track_orders[album_name] = track_order
+        for album in self.album_model.albums:
+            album_track_orders[album.name] = [mp3_file.path for mp3_file in album.files]
         return album_track_orders
 
     def accept_track_order(self):
-        album_track_orders = self.get_album_track_order()
-
-        for album_name, track_list in album_track_orders.items():
-            for index, file_path in enumerate(track_list):
-                try:
-                    audio = EasyID3(file_path)
-                    audio['tracknumber'] = str(index + 1)
-                    audio.save()
-                except Exception as e:
-                    print(f"Error saving track number for {file_path}: {str(e)}") 
\ No newline at end of file
+        """Emit new numbers only for tracks whose position differs from their current tag."""
+        changed, unchanged = renumber((album.files for album in self.album_model.albums),
+                                      with_total=self.total_checkbox.isChecked())
+        self.track_order_accepted.emit(changed, unchanged)
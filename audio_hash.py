@@ -0,0 +1,184 @@
+"""Find files holding the same recording whatever their names and tags; nothing here imports PyQt6.
+
+Each file is memory-mapped and only its MPEG audio is compared: ID3v2 tags at the
+front, APEv2, Lyrics3v2 and ID3v1 tags at the back, and any padding before the first
+frame sync are skipped, so retagged copies still match. Work is narrowed in stages:
+
+    1. audio length, from the tag headers alone (a few pages per file)
+    2. a hash of the first and last SAMPLE_BYTES of audio, for lengths shared by several files
+    3. a hash of the whole audio, for files whose samples still match
+
+Each stage runs on a process pool in chunks of CHUNK_SIZE files.
+"""
+import os
+import mmap
+import hashlib
+from concurrent.futures import wait, FIRST_COMPLETED
+from profiling import profiler, run_profiled
+
+CHUNK_SIZE = 64 # Files per worker task
+SAMPLE_BYTES = 64 * 1024
+SYNC_SEARCH = 64 * 1024 # How far past the tags to look for the first frame sync
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def audio_bounds(data):
+    """(start, end) of the MPEG audio in a file's bytes (a mmap or bytes object)."""
+    size = len(data)
+    start = 0
+    # Some taggers prepend a new ID3v2 tag instead of updating the old one
+    while start + 10 <= size and data[start:start + 3] == b'ID3':
+        footer = 10 if data[start + 5] & 0x10 else 0
+        start += 10 + _syncsafe(data[start + 6:start + 10]) + footer
+    end = size
+    # Trailing tags come in any order: [APEv2][Lyrics3v2][ID3v1] is the usual one
+    while True:
+        if end - start >= 128 and data[end - 128:end - 125] == b'TAG':
+            end -= 128
+            if end - start >= 227 and data[end - 227:end - 223] == b'TAG+': # Enhanced ID3v1 block
+                end -= 227
+        elif end - start >= 15 and data[end - 9:end] == b'LYRICS200' and data[end - 15:end - 9].isdigit():
+            end -= 15 + int(data[end - 15:end - 9])
+        elif end - start >= 32 and data[end - 32:end - 24] == b'APETAGEX':
+            # The size counts the items and the footer; a header, if flagged, comes on top
+            tag_size = int.from_bytes(data[end - 20:end - 16], 'little')
+            header = 32 if int.from_bytes(data[end - 12:end - 8], 'little') & 0x80000000 else 0
+            end -= tag_size + header
+        else:
+            break
+    end = max(start, end)
+    # Taggers differ in the padding they leave behind the tag; audio begins at the first frame sync
+    sync = data.find(b'\xff', start, min(end, start + SYNC_SEARCH))
+    if sync > start:
+        start = sync
+    return start, end
+
+def map_file(path):
+    """Read-only mmap of a file (b'' for an empty one, which can't be mapped); close it when done."""
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def _error(e):
+    return str(e) or type(e).__name__
+
+def audio_lengths(paths):
+    """[(path, audio length or None, error or None)] for a chunk of paths (runs in a worker process)."""
+    results = []
+    with profiler.span('audio bounds'):
+        for path in paths:
+            try:
+                data = map_file(path)
+                try:
+                    start, end = audio_bounds(data)
+                finally:
+                    if data:
+                        data.close()
+            except (OSError, ValueError) as e:
+                results.append((path, None, _error(e)))
+                continue
+            results.append((path, end - start, None))
+    return results
+
+def audio_digests(paths, sample=False):
+    """[(path, digest or None, error or None)] of the audio of each path (runs in a worker process).
+
+    With sample=True only the first and last SAMPLE_BYTES are hashed.
+    """
+    results = []
+    with profiler.span('audio hash'):
+        for path in paths:
+            try:
+                data = map_file(path)
+                try:
+                    start, end = audio_bounds(data)
+                    digest = hashlib.blake2b(digest_size=20)
+                    view = memoryview(data) # Hashed straight from the mapping, never copied
+                    try:
+                        if sample and end - start > 2 * SAMPLE_BYTES:
+                            parts = (view[start:start + SAMPLE_BYTES], view[end - SAMPLE_BYTES:end])
+                        else:
+                            parts = (view[start:end],)
+                        for part in parts:
+                            digest.update(part)
+                            profiler.count('bytes hashed', len(part))
+                            part.release()
+                    finally:
+                        view.release()
+                finally:
+                    if data:
+                        data.close()
+            except (OSError, ValueError) as e:
+                results.append((path, None, _error(e)))
+                continue
+            profiler.count('files hashed')
+            results.append((path, digest.digest(), None))
+    return results
+
+def partial_digests(paths):
+    """audio_digests() of the first and last SAMPLE_BYTES only."""
+    return audio_digests(paths, sample=True)
+
+def _run_stage(executor, name, func, paths, errors, progress, cancelled):
+    """Run func over paths in chunks on executor; returns {path: value} of the ones that worked."""
+    values = {}
+    pending = {executor.submit(run_profiled, func, paths[start:start + CHUNK_SIZE])
+               for start in range(0, len(paths), CHUNK_SIZE)}
+    done_files = 0
+    while pending:
+        if cancelled():
+            for future in pending:
+                future.cancel()
+            return None
+        done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+        for future in done:
+            results, numbers = future.result()
+            profiler.merge(numbers)
+            for path, value, error in results:
+                if error is None:
+                    values[path] = value
+                else:
+                    errors.append((path, error))
+            done_files += len(results)
+        if done and progress is not None:
+            progress(name, done_files, len(paths))
+    return values
+
+def _candidates(values):
+    """Paths whose value some other path shares, grouped by that value."""
+    groups = {}
+    for path, value in values.items():
+        groups.setdefault(value, []).append(path)
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+def find_duplicates(paths, executor, progress=None, cancelled=lambda: False):
+    """Group paths with identical audio on executor (a process pool).
+
+    progress(stage name, files done, files in stage) is called as chunks complete.
+    Returns (groups of paths sorted by path, largest group first; [(path, error)]),
+    or (None, errors) if cancelled() turned true on the way.
+    """
+    errors = []
+    paths = list(dict.fromkeys(paths))
+    with profiler.span('find duplicates'):
+        lengths = _run_stage(executor, 'Measuring', audio_lengths, paths, errors, progress, cancelled)
+        if lengths is None:
+            return None, errors
+        # Files without any audio would all match each other
+        candidates = _candidates({path: length for path, length in lengths.items() if length})
+        for stage, sample in (('Sampling', True), ('Hashing', False)):
+            if not candidates:
+                break
+            stage_paths = [path for group in candidates for path in group]
+            digests = _run_stage(executor, stage, partial_digests if sample else audio_digests,
+                                 stage_paths, errors, progress, cancelled)
+            if digests is None:
+                return None, errors
+            # Files only match within their length group
+            candidates = [group for paths in candidates
+                          for group in _candidates({path: digests[path] for path in paths if path in digests})]
+    profiler.count('duplicate groups', len(candidates))
+    groups = sorted((sorted(group) for group in candidates), key=lambda group: (-len(group), group[0]))
+    return groups, errors
@@ -0,0 +1,42 @@
+"""Time MainWindow.load_mp3_files end to end for growing folder sizes.
+
+Run with: QT_QPA_PLATFORM=offscreen python benchmarks/bench_load.py [count ...]
+The per-file time should stay roughly flat as the count grows (linear total).
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtWidgets import QApplication
+from main import MainWindow
+from corpus import generate_corpus
+
+def time_load(app, window, folder):
+    start = time.perf_counter()
+    window.load_mp3_files(folder)
+    while window.scan_worker is not None or window.refresh_timer.isActive():
+        app.processEvents()
+        time.sleep(0.001)
+    return time.perf_counter() - start
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [250, 500, 1000, 2000]
+    app = QApplication(sys.argv[:1])
+    window = MainWindow()
+    if window.metadata_cache:
+        window.metadata_cache.close()
+    window.metadata_cache = None # Measure parsing, and keep temp paths out of the user's cache
+    window.undo_journal = None # Keep benchmark runs out of the user's undo history
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'files':>8} {'seconds':>10} {'ms/file':>10}")
+        for count in counts:
+            folder = os.path.join(tmp, str(count))
+            generate_corpus(folder, count)
+            elapsed = time_load(app, window, folder)
+            print(f"{count:>8} {elapsed:>10.2f} {elapsed * 1000 / count:>10.3f}")
+
+if __name__ == '__main__':
+    main()
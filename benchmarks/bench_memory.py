@@ -0,0 +1,56 @@
+"""Per-track memory of the TrackStore-backed MP3File against the old dict-per-file layout.
+
+Run with: python benchmarks/bench_memory.py [tracks] [albums]
+Tag values are built per track, as a parser would, so nothing is shared by accident.
+"""
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mp3_file import MP3File
+from track_store import TrackStore
+
+class LegacyMP3File:
+    # The pre-TrackStore layout: an instance __dict__ plus one metadata dict per file
+    def __init__(self, path, metadata):
+        self.path = path
+        self.active = True
+        self.metadata = metadata
+
+def fake_metadata(i, albums):
+    album = i % albums
+    return {
+        'artist': ''.join(['Artist ', str(album % 50)]),
+        'album': ''.join(['Album ', str(album)]),
+        'year': str(1970 + album % 50),
+        'genre': ''.join(['Ro', 'ck']),
+        'title': f"Title of track number {i}",
+        'tracknumber': str(i // albums + 1),
+    }
+
+def fake_path(i):
+    return f"/music/library/Artist {i % 50}/Album {i % 997}/track{i:07d}.mp3"
+
+def measure(build, count):
+    tracemalloc.start()
+    tracks = build(count)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del tracks
+    return current / count
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    albums = int(sys.argv[2]) if len(sys.argv) > 2 else count // 12 or 1
+    legacy = measure(lambda n: [LegacyMP3File(fake_path(i), fake_metadata(i, albums)) for i in range(n)], count)
+    store = TrackStore()
+    compact = measure(lambda n: [MP3File(fake_path(i), fake_metadata(i, albums), store=store) for i in range(n)], count)
+    print(f"{count} tracks, {albums} albums")
+    print(f"{'layout':<12} {'bytes/track':>12}")
+    print(f"{'dict':<12} {legacy:>12.0f}")
+    print(f"{'TrackStore':<12} {compact:>12.0f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Compare the ID3 fast path against EasyID3 on files with large embedded artwork.
+
+Run with: python benchmarks/bench_metadata.py [count] [artwork_kb]
+Bytes read come from /proc/self/io and are only reported on Linux.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3, APIC
+from id3_reader import read_id3_fast
+from corpus import generate_corpus
+
+def bytes_read():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('rchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+def measure(label, paths, read):
+    before = bytes_read()
+    start = time.perf_counter()
+    for path in paths:
+        read(path)
+    elapsed = time.perf_counter() - start
+    after = bytes_read()
+    per_file = f"{(after - before) / len(paths) / 1024:10.1f}" if before is not None else f"{'n/a':>10}"
+    print(f"{label:<10} {elapsed * 1e6 / len(paths):10.1f} {per_file}")
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    artwork_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = generate_corpus(tmp, count, frames=2000)
+        for path in paths:
+            tags = ID3(path)
+            tags.add(APIC(encoding=3, mime='image/jpeg', type=3, data=os.urandom(artwork_kb * 1024)))
+            tags.save()
+        print(f"{count} files, {artwork_kb} KB artwork each")
+        print(f"{'reader':<10} {'us/file':>10} {'KB read':>10}")
+        measure('EasyID3', paths, EasyID3)
+        measure('fast', paths, read_id3_fast)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""Bytes written per tag edit with mutagen's default padding vs the app's padding policies.
+
+Run with: python benchmarks/bench_padding.py [count] [audio_mb] [edits]
+The files start without padding (as many taggers leave them) and every edit makes
+the tag a little longer. 'normalized' runs Normalize Padding first; its one-off cost
+is printed separately. Bytes written come from /proc/self/io (Linux only).
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import ID3
+from tag_io import keep_padding, normalize_padding
+from corpus import generate_corpus, MPEG_FRAME
+
+GROW_BYTES = 2048 # Tag growth per edit
+
+def bytes_written():
+    try:
+        with open('/proc/self/io') as f:
+            for line in f:
+                if line.startswith('wchar:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+
+def measure(paths, action):
+    before = bytes_written()
+    action()
+    after = bytes_written()
+    return None if before is None else (after - before) / len(paths)
+
+def edit(paths, edits, padding):
+    for n in range(edits):
+        for path in paths:
+            audio = EasyID3(path)
+            audio['title'] = "Title " + "x" * (GROW_BYTES * (n + 1))
+            audio.save(padding=padding)
+
+def kb(value):
+    return f"{value / 1024:14.1f}" if value is not None else f"{'n/a':>14}"
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    audio_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    edits = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+    print(f"{count} files, {audio_mb} MB audio each, {edits} edits per file growing the tag by {GROW_BYTES} bytes")
+    print(f"{'policy':<14} {'KB/edit':>14} {'KB normalize':>14}")
+    for policy, padding, normalize in (('mutagen', None, False),
+                                       ('keep_padding', keep_padding, False),
+                                       ('normalized', keep_padding, True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = generate_corpus(tmp, count, frames=audio_mb * 1024 * 1024 // len(MPEG_FRAME))
+            for path in paths:
+                ID3(path).save(padding=lambda info: 0)
+            normalized = measure(paths, lambda: [normalize_padding(path) for path in paths]) if normalize else 0
+            per_edit = measure(paths, lambda: edit(paths, edits, padding))
+        print(f"{policy:<14} {kb(per_edit and per_edit / edits)} {kb(normalized)}")
+
+if __name__ == '__main__':
+    main()
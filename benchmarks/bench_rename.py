@@ -0,0 +1,74 @@
+"""Render rename targets with the compiled pattern engine vs the old per-file str.replace chain.
+
+Run with: python benchmarks/bench_rename.py [count] [pattern]
+Files are built in memory (no disk access), so only name rendering is measured.
+'legacy' re-expands the pattern for every file, like Apply Rename used to.
+'plan' validates the renamed files as a RenamePlan; 'shift plan' renames every file
+to the next one's name (one long chain), so all but one file need parking.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mp3_file import MP3File
+from rename_pattern import compile_pattern
+from rename_plan import RenamePlan
+from corpus import corpus_fields
+
+ALBUMS = 1000
+LEGACY_WORDS = ('artist', 'album', 'year', 'genre', 'title', 'track')
+
+def legacy_target(mp3_file, raw_pattern):
+    pattern = raw_pattern
+    for word in LEGACY_WORDS:
+        pattern = pattern.replace(word, "{tracknumber}" if word == 'track' else "{" + word + "}")
+    metadata = mp3_file.metadata
+    new_name = pattern.format(
+        artist=metadata.get('artist', 'Unknown Artist'),
+        album=metadata.get('album', 'Unknown Album'),
+        year=metadata.get('year', 'Unknown Year'),
+        genre=metadata.get('genre', 'Unknown Genre'),
+        title=metadata.get('title', 'Unknown Title'),
+        tracknumber=metadata.get('tracknumber', '')
+    ) + os.path.splitext(mp3_file.path)[1]
+    for char in '<>:"/\\|?*':
+        new_name = new_name.replace(char, '_')
+    return os.path.join(os.path.dirname(mp3_file.path), new_name)
+
+def measure(label, render):
+    start = time.perf_counter()
+    targets = render()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {elapsed * 1000:10.1f} {elapsed * 1e6 / len(targets):10.2f}")
+    return targets
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    pattern = sys.argv[2] if len(sys.argv) > 2 else 'artist - album - track - title'
+    files = []
+    for index in range(count):
+        fields = corpus_fields(index, ALBUMS)
+        files.append(MP3File(f"/music/{fields['album']}/{index:06d}.mp3", {
+            'artist': fields['artist'], 'album': fields['album'], 'year': fields['date'],
+            'genre': fields['genre'], 'title': fields['title'], 'tracknumber': fields['tracknumber']}))
+    print(f"{count} files, pattern {pattern!r}")
+    print(f"{'engine':<10} {'ms':>10} {'us/file':>10}")
+    try:
+        legacy = measure('legacy', lambda: [legacy_target(mp3_file, pattern) for mp3_file in files])
+    except (ValueError, KeyError, IndexError):
+        legacy = None
+        print(f"{'legacy':<10} (braces and folders are not supported)")
+    compiled = measure('compiled', lambda: compile_pattern(pattern).targets(files))
+    if legacy is not None:
+        differing = sum(old != new for old, new in zip(legacy, compiled))
+        print(f"{differing} names differ (fallbacks for empty tags, 'track' without the total)")
+    paths = [mp3_file.path for mp3_file in files]
+    measure('plan', lambda: RenamePlan(zip(paths, compiled)).moves)
+    plan = RenamePlan(zip(paths, paths[1:] + [paths[0] + '.new']))
+    measure('shift plan', lambda: RenamePlan(zip(paths, paths[1:] + [paths[0] + '.new'])).moves)
+    print(f"shift plan: {len(plan.moves)} moves, {len(plan.parking)} parked, {len(plan.conflicts)} conflicts")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+"""Time the main GUI entry points headlessly and record the results as JSON.
+
+Run with: python benchmarks/bench_suite.py [--sizes 1000 10000 100000] [--output bench.json]
+Each size runs in its own process (offscreen Qt platform, metadata cache and undo
+journal disabled) so the peak RSS reported for it isn't inflated by earlier sizes. Steps, in order:
+
+  load_mp3_files         scan the generated folder into the file list
+  load_albums            build the Album View over the loaded files
+  preview_rename         build the File Renamer and preview a pattern for every file
+  apply_changes          stage a genre edit for every file and commit it
+  accept_track_order     stage n/total track numbers for every file and commit them
+
+Peak RSS comes from getrusage and is the process peak after each step (0 where
+unsupported). Compare runs with any JSON diff; 'meta' records the corpus options.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import generate_corpus
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024 # bytes on macOS, KB elsewhere
+
+def wait_for(app, done):
+    while not done():
+        app.processEvents()
+        time.sleep(0.001)
+
+def run_size(count, options):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt6.QtWidgets import QApplication, QMessageBox
+    from main import MainWindow
+
+    QMessageBox.exec = lambda self: 0 # The renamer's confirmation box would block
+    app = QApplication(sys.argv[:1])
+    results = []
+
+    def step(name, action, until=None):
+        start = time.perf_counter()
+        action()
+        if until is not None:
+            wait_for(app, until)
+        elapsed = time.perf_counter() - start
+        results.append({'files': count, 'step': name, 'seconds': round(elapsed, 4),
+                        'files_per_second': round(count / elapsed, 1) if elapsed else None,
+                        'peak_rss_mb': round(peak_rss_mb(), 1)})
+
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        generate_corpus(tmp, count, albums=options.albums, frames=options.frames,
+                        tag_kb=options.tag_kb, depth=options.depth)
+        generate_seconds = time.perf_counter() - start
+
+        window = MainWindow()
+        if window.metadata_cache:
+            window.metadata_cache.close()
+        window.metadata_cache = None # Measure parsing, not a warm cache
+        window.undo_journal = None # Benchmark commits don't belong in the user's undo history
+
+        step('load_mp3_files', lambda: window.load_mp3_files(tmp),
+             lambda: window.scan_worker is None and not window.refresh_timer.isActive())
+        step('load_albums', lambda: window.tab_widget.setCurrentIndex(1))
+
+        def preview():
+            window.tab_widget.setCurrentIndex(2)
+            window.file_renamer.pattern_input.setText("artist - album - track - title")
+            window.file_renamer.preview_rename()
+        step('preview_rename', preview)
+
+        def apply_changes():
+            window.genre_input.setText("Benchmark")
+            window.apply_changes()
+            window.commit_changes()
+        step('apply_changes', apply_changes, lambda: window.write_worker is None)
+
+        def accept_track_order():
+            window.album_view.total_checkbox.setChecked(True)
+            window.album_view.accept_track_order()
+            window.commit_changes()
+        step('accept_track_order', accept_track_order, lambda: window.write_worker is None)
+
+        loaded = len(window.mp3_files)
+        window.close()
+    for result in results:
+        result['loaded'] = loaded
+        result['generate_seconds'] = round(generate_seconds, 4)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--albums', type=int, default=100)
+    parser.add_argument('--frames', type=int, default=2, help="MPEG frames per file")
+    parser.add_argument('--tag-kb', type=int, default=0, help="extra opaque tag data per file")
+    parser.add_argument('--depth', type=int, default=1, help="folder nesting (0 = flat)")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    options = parser.parse_args()
+
+    if options.run_one is not None:
+        json.dump(run_size(options.run_one, options), sys.stdout)
+        return
+
+    corpus_args = ['--albums', str(options.albums), '--frames', str(options.frames),
+                   '--tag-kb', str(options.tag_kb), '--depth', str(options.depth)]
+    results = []
+    print(f"{'files':>8} {'step':<20} {'seconds':>10} {'files/s':>12} {'peak MB':>10}")
+    for count in options.sizes:
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), '--run-one', str(count)] + corpus_args,
+                                check=True, capture_output=True, text=True).stdout
+        for result in json.loads(output):
+            results.append(result)
+            print(f"{count:>8} {result['step']:<20} {result['seconds']:>10.3f} "
+                  f"{result['files_per_second']:>12.1f} {result['peak_rss_mb']:>10.1f}")
+
+    meta = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count(), 'albums': options.albums,
+            'frames': options.frames, 'tag_kb': options.tag_kb, 'depth': options.depth}
+    with open(options.output, 'w') as f:
+        json.dump({'meta': meta, 'results': results}, f, indent=2)
+    print(f"Wrote {options.output}")
+
+if __name__ == '__main__':
+    main()
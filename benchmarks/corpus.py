@@ -0,0 +1,63 @@
+"""Reproducible synthetic MP3 corpora for the benchmarks.
+
+Files are tiny but valid: an ID3v2.4 tag followed by silent MPEG-1 Layer III frames.
+Tags are built directly (no mutagen) so 100k files can be written in seconds, and the
+same arguments always produce byte-identical files.
+"""
+import os
+
+# One silent MPEG-1 Layer III frame (128 kbps, 44.1 kHz): header plus zeroed payload
+MPEG_FRAME = bytes([0xFF, 0xFB, 0x90, 0x64]) + bytes(413)
+GENRES = ('Rock', 'Jazz', 'Electronic', 'Classical', 'Hip-Hop')
+
+def _syncsafe(value):
+    return bytes([(value >> 21) & 0x7F, (value >> 14) & 0x7F, (value >> 7) & 0x7F, value & 0x7F])
+
+def _frame(frame_id, body):
+    return frame_id + _syncsafe(len(body)) + b'\x00\x00' + body
+
+def _text_frame(frame_id, value):
+    return _frame(frame_id, b'\x03' + value.encode('utf-8')) # 3 = UTF-8
+
+def id3v2_tag(fields, filler=0, padding=0):
+    """An ID3v2.4 tag with the usual text frames, an optional opaque PRIV frame
+    of `filler` bytes (standing in for artwork) and `padding` bytes of padding."""
+    frames = b''.join(_text_frame(frame_id, fields[key]) for frame_id, key in (
+        (b'TPE1', 'artist'), (b'TALB', 'album'), (b'TIT2', 'title'),
+        (b'TDRC', 'date'), (b'TCON', 'genre'), (b'TRCK', 'tracknumber')) if key in fields)
+    if filler:
+        frames += _frame(b'PRIV', b'bench\x00' + bytes(filler))
+    return b'ID3\x04\x00\x00' + _syncsafe(len(frames) + padding) + frames + bytes(padding)
+
+def corpus_fields(i, albums):
+    album = i % albums
+    return {
+        'artist': f"Artist {album % 50}",
+        'album': f"Album {album}",
+        'title': f"Title {i}",
+        'date': str(1970 + album % 50),
+        'genre': GENRES[album % len(GENRES)],
+        'tracknumber': str(i // albums + 1),
+    }
+
+def generate_corpus(root, count, albums=10, frames=20, tag_kb=0, padding=0, depth=0):
+    """Write `count` small tagged MP3 files into root and return their paths.
+
+    Track i belongs to album i % albums. With depth > 0 each album gets its own
+    folder, nested `depth` levels below root (album folder, then sub1, sub2...).
+    `tag_kb` adds that much opaque frame data to every tag.
+    """
+    os.makedirs(root, exist_ok=True)
+    audio = MPEG_FRAME * frames
+    paths = []
+    for i in range(count):
+        folder = root
+        if depth > 0:
+            folder = os.path.join(root, f"album{i % albums:04d}", *[f"sub{level}" for level in range(1, depth)])
+            os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"track{i:06d}.mp3")
+        with open(path, 'wb') as f:
+            f.write(id3v2_tag(corpus_fields(i, albums), filler=tag_kb * 1024, padding=padding))
+            f.write(audio)
+        paths.append(path)
+    return paths
@@ -0,0 +1,277 @@
+"""Headless batch mode: scan, bulk tag, renumber, rename and find duplicates without starting Qt.
+
+Run with: python -m cli <command> PATH... (or python cli.py). PATH may be files or
+folders; folders are walked like Select Folder does. Every write command stages its
+edits and commits them once per file, exactly like Commit Changes in the window.
+Use --dry-run to print the pending changes without touching any file. Commits are
+journaled like the window's, so `undo` reverses them from either side.
+"""
+import os
+import argparse
+import sys
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from scanner import iter_mp3_paths, DEFAULT_INCLUDE
+from metadata_cache import open_cache
+from library import load_library, group_by_album, edit_fields, renumber
+from rename_pattern import compile_pattern
+from pending_changes import PendingChange, PendingChanges, commit_change
+from rename_plan import RenamePlan
+from audio_hash import find_duplicates
+from undo_journal import open_journal
+from profiling import profiler, profile_operation
+
+WRITE_CONCURRENCY = 4 # Same default as the window's write pool
+SCAN_COLUMNS = ('artist', 'album', 'year', 'genre', 'tracknumber', 'title')
+
+def load(args, cache):
+    options = {'max_depth': args.max_depth, 'include': tuple(args.include or DEFAULT_INCLUDE),
+               'exclude': tuple(args.exclude or ())}
+    paths = sorted(set(iter_mp3_paths(args.paths, **options)))
+    return load_library(paths, cache)
+
+def commit(pending, cache, args):
+    """Write pending changes (or print them for --dry-run); returns the number of failures.
+
+    Renames go through a RenamePlan: ones that would overwrite a file are skipped, and
+    if any rename can't be done they are all rolled back. What the commit overwrote is
+    journaled for undo.
+    """
+    if args.dry_run or not pending:
+        for line in pending.diff():
+            print(line)
+        print(f"{len(pending)} file(s) to change{' (dry run)' if args.dry_run else ''}.", file=sys.stderr)
+        return 0
+    changes = pending.entries()
+    previous = {id(change): {field: change.mp3_file.metadata.get(field, '') for field in change.fields}
+                for change in changes}
+    written, errors, targets, conflicts = write_changes([(change.mp3_file.path, change) for change in changes],
+                                                        cache, args)
+    journal = open_journal()
+    if journal is None:
+        print("The undo journal could not be opened; this commit can't be undone.", file=sys.stderr)
+    else:
+        entries = []
+        for (path, change), error in zip(written, errors):
+            new_path = targets.get(path) if error is None else None
+            entries.append((new_path or path, path if new_path else None, previous[id(change)]))
+        journal.record(entries)
+    failed = sum(error is not None for error in errors)
+    summary = f"Committed {len(written) - failed} files"
+    if failed:
+        summary += f", {failed} failed"
+    if conflicts:
+        summary += f", {conflicts} renames skipped"
+    print(summary + ".", file=sys.stderr)
+    return failed + conflicts
+
+def write_changes(changes, cache, args):
+    """Write (path, PendingChange) pairs on a thread pool, tags first, renames through one RenamePlan.
+
+    Returns (the pairs written, error or None per pair, {old path: new path} of the renames
+    done, number of renames skipped as conflicts).
+    """
+    plan = RenamePlan([(path, change.new_path) for path, change in changes if change.new_path is not None])
+    for source, target, reason in plan.conflicts:
+        print(f"{source}: not renamed to '{target}': {reason}", file=sys.stderr)
+    targets = dict(plan.moves)
+    changes = [(path, change) for path, change in changes if change.fields or path in targets]
+
+    def write(item):
+        path, change = item
+        try:
+            commit_change(path, (change.fields, targets.get(path)), plan)
+        except Exception as e:
+            return str(e) or type(e).__name__
+        return None
+
+    try:
+        plan.park()
+    except OSError as e:
+        errors = [str(e)] * len(changes)
+    else:
+        with ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            errors = []
+            for error in executor.map(write, changes):
+                errors.append(error)
+                if sys.stderr.isatty() and (len(errors) % 100 == 0 or len(errors) == len(changes)):
+                    print(f"\rWriting {len(errors)} / {len(changes)}", end='', file=sys.stderr)
+            if sys.stderr.isatty() and changes:
+                print(file=sys.stderr)
+    # Renames are all or nothing, like in the window
+    if not plan.complete():
+        for path, error in plan.rollback():
+            print(f"{path}: could not be renamed back: {error}", file=sys.stderr)
+        targets = {}
+        print("Renames were rolled back.", file=sys.stderr)
+
+    stale_paths, renames = [], []
+    for (path, change), error in zip(changes, errors):
+        if error is not None:
+            print(f"{path}: {error}", file=sys.stderr)
+            stale_paths.append(path)
+        elif change.fields:
+            stale_paths.append(path)
+        elif path in targets:
+            renames.append((path, targets[path]))
+    if cache:
+        cache.invalidate(stale_paths)
+        cache.rename(renames)
+    return changes, errors, targets, len(plan.conflicts)
+
+def run_scan(args, cache):
+    files = load(args, cache)
+    for mp3_file in files:
+        print("\t".join([mp3_file.path] + [mp3_file.metadata.get(field, '') for field in SCAN_COLUMNS]))
+    errors = [mp3_file for mp3_file in files if mp3_file.error]
+    for mp3_file in errors:
+        print(f"{mp3_file.path}: {mp3_file.error}", file=sys.stderr)
+    print(f"Loaded {len(files)} files, {len(errors)} with unreadable tags.", file=sys.stderr)
+    return 0
+
+def run_tag(args, cache):
+    fields = edit_fields({'artist': args.artist, 'album': args.album, 'year': args.year, 'genre': args.genre})
+    if not fields:
+        print("Nothing to set: give at least one non-blank --artist, --album, --year or --genre.", file=sys.stderr)
+        return 2
+    pending = PendingChanges()
+    for mp3_file in load(args, cache):
+        pending.stage_tags(mp3_file, fields)
+    return commit(pending, cache, args)
+
+def run_renumber(args, cache):
+    # Tracks are numbered in path order within each album
+    albums = group_by_album(load(args, cache)).values()
+    changed, unchanged = renumber(albums, with_total=args.total)
+    pending = PendingChanges()
+    for mp3_file, tracknumber in changed:
+        pending.stage_tags(mp3_file, {'tracknumber': tracknumber})
+    print(f"{len(unchanged)} unchanged files skipped.", file=sys.stderr)
+    return commit(pending, cache, args)
+
+def run_rename(args, cache):
+    try:
+        pattern = compile_pattern(args.pattern)
+    except ValueError as e:
+        print(f"Invalid pattern: {e}", file=sys.stderr)
+        return 2
+    files = load(args, cache)
+    root = os.path.abspath(os.path.expanduser(args.to)) if args.to else None
+    pending = PendingChanges()
+    for mp3_file, new_path in zip(files, pattern.targets(files, root)):
+        pending.stage_rename(mp3_file, new_path)
+    return commit(pending, cache, args)
+
+def run_undo(args, cache):
+    journal = open_journal()
+    operations = journal.operations() if journal else []
+    if args.list:
+        for number, operation in enumerate(reversed(operations), 1):
+            print(f"{number}\t{operation.describe()}")
+        return 0
+    if not operations:
+        print("Nothing to undo.", file=sys.stderr)
+        return 0
+    operations = operations[-args.count:]
+    changes = []
+    for path, fields, original in journal.restores(operations):
+        change = PendingChange(None)
+        change.fields = fields
+        change.new_path = original
+        changes.append((path, change))
+    if args.dry_run:
+        for path, change in changes:
+            parts = [f"{field} -> '{value}'" for field, value in change.fields.items()]
+            if change.new_path:
+                parts.append(f"move back -> '{change.new_path}'")
+            print(f"{path}: " + ", ".join(parts))
+        print(f"{len(operations)} commit(s), {len(changes)} file(s) to restore (dry run).", file=sys.stderr)
+        return 0
+    written, errors, _, conflicts = write_changes(changes, cache, args)
+    failed = sum(error is not None for error in errors)
+    # Anything short of a full undo keeps the commits journaled; undoing them again is safe
+    if not failed and not conflicts:
+        journal.mark_undone(operations)
+    print(f"Undid {len(operations)} commit(s): {len(written) - failed} files restored"
+          + (f", {failed} failed" if failed else "") + (f", {conflicts} not moved back" if conflicts else "")
+          + ".", file=sys.stderr)
+    return failed + conflicts
+
+def run_dupes(args, cache):
+    options = {'max_depth': args.max_depth, 'include': tuple(args.include or DEFAULT_INCLUDE),
+               'exclude': tuple(args.exclude or ())}
+    paths = sorted(set(iter_mp3_paths(args.paths, **options)))
+
+    def progress(stage, done, total):
+        if sys.stderr.isatty():
+            print(f"\r{stage} {done} / {total}", end='' if done < total else '\n', file=sys.stderr)
+
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=multiprocessing.get_context('spawn')) as executor:
+        groups, errors = find_duplicates(paths, executor, progress=progress)
+    # One group per paragraph, so the output is easy to read and to split
+    for group in groups:
+        print("\n".join(group) + "\n")
+    for path, error in errors:
+        print(f"{path}: {error}", file=sys.stderr)
+    print(f"Compared {len(paths)} files: {len(groups)} recording(s) with "
+          f"{sum(len(group) - 1 for group in groups)} extra copies.", file=sys.stderr)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='python -m cli', description="Batch MP3 tag maintenance without the GUI.")
+    parser.add_argument('--stats', metavar='FILE', help="append timings and counters as a JSON line to FILE")
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('paths', nargs='+', metavar='PATH', help="MP3 files or folders")
+    common.add_argument('--max-depth', type=int, default=None, help="folder levels to descend (0: top level only)")
+    common.add_argument('--include', action='append', metavar='GLOB', help="file pattern to load (default *.mp3)")
+    common.add_argument('--exclude', action='append', metavar='GLOB', help="file or folder pattern to skip")
+    common.add_argument('--no-cache', action='store_true', help="don't read or update the metadata cache")
+    writes = argparse.ArgumentParser(add_help=False)
+    writes.add_argument('--dry-run', action='store_true', help="print the changes instead of writing them")
+    writes.add_argument('--jobs', type=int, default=WRITE_CONCURRENCY, help="files saved in parallel")
+
+    commands = parser.add_subparsers(dest='command', required=True)
+    scan = commands.add_parser('scan', parents=[common], help="print path and tags, tab separated")
+    scan.set_defaults(run=run_scan)
+
+    tag = commands.add_parser('tag', parents=[common, writes], help="set tags on every file; blank keeps")
+    for field in ('artist', 'album', 'year', 'genre'):
+        tag.add_argument(f'--{field}', default='')
+    tag.set_defaults(run=run_tag)
+
+    renumber_cmd = commands.add_parser('renumber', parents=[common, writes],
+                                       help="number the tracks of each album in path order")
+    renumber_cmd.add_argument('--total', action='store_true', help="write n/total instead of n")
+    renumber_cmd.set_defaults(run=run_renumber)
+
+    rename = commands.add_parser('rename', parents=[common, writes], help="rename files from a tag pattern")
+    rename.add_argument('--pattern', required=True, help="e.g. 'artist - album - track - title' or '{track:02} {title}'; "
+                        "'/' makes folders, e.g. 'artist/album/{track:02} - title'")
+    rename.add_argument('--to', metavar='DIR', help="move files under DIR instead of renaming them in place")
+    rename.set_defaults(run=run_rename)
+
+    dupes = commands.add_parser('dupes', parents=[common], help="list files holding the same audio, one group per paragraph")
+    dupes.add_argument('--jobs', type=int, default=None, help="worker processes (default: one per CPU)")
+    dupes.set_defaults(run=run_dupes)
+
+    undo = commands.add_parser('undo', parents=[writes], help="undo the last commits of this tool or the window")
+    undo.add_argument('count', nargs='?', type=int, default=1, help="number of commits to undo (default 1)")
+    undo.add_argument('--list', action='store_true', help="list the commits that can be undone, newest first")
+    undo.add_argument('--no-cache', action='store_true', help="don't update the metadata cache")
+    undo.set_defaults(run=run_undo)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    cache = None if args.no_cache else open_cache()
+    try:
+        with profiler.span(args.command), profile_operation(args.command):
+            return args.run(args, cache)
+    finally:
+        if cache:
+            cache.close()
+        if args.stats:
+            profiler.dump(args.stats, command=args.command)
+
+if __name__ == '__main__':
+    sys.exit(main())
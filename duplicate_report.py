@@ -0,0 +1,83 @@
+from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTreeWidget,
+                             QTreeWidgetItem, QHeaderView)
+from PyQt6.QtCore import Qt, pyqtSignal
+import os
+
+class DuplicateReport(QDialog):
+    """Groups of files holding the same recording; ticked copies can be deactivated or removed from the list.
+
+    Every copy but the first of each group starts ticked, so one click keeps one file per recording.
+    """
+    deactivate_requested = pyqtSignal(list) # list of MP3File
+    remove_requested = pyqtSignal(list) # list of MP3File
+
+    def __init__(self, groups, parent=None):
+        """groups: lists of MP3File with identical audio."""
+        super().__init__(parent)
+        self.setWindowTitle("Duplicate Recordings")
+        self.resize(900, 600)
+        self.setStyleSheet("QDialog { background-color: white; } QLabel { color: black; } "
+                           "QTreeWidget { color: black; background-color: white; }")
+        self.files = {} # id(MP3File) -> MP3File shown in the tree
+        layout = QVBoxLayout(self)
+
+        copies = sum(len(group) for group in groups)
+        self.summary = QLabel(f"{len(groups)} recording(s) have more than one copy ({copies} files). "
+                              "Tags and names may differ; only the audio was compared.")
+        self.summary.setWordWrap(True)
+        layout.addWidget(self.summary)
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["File", "Artist", "Title", "Folder"])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
+        self.tree.setUniformRowHeights(True) # Keeps thousands of groups cheap to lay out
+        for number, group in enumerate(groups, 1):
+            group_item = QTreeWidgetItem(self.tree, [f"Recording {number}: {len(group)} copies"])
+            group_item.setFirstColumnSpanned(True)
+            for index, mp3_file in enumerate(group):
+                metadata = mp3_file.metadata
+                item = QTreeWidgetItem(group_item, [os.path.basename(mp3_file.path), metadata.get('artist', ''),
+                                                    metadata.get('title', ''), os.path.dirname(mp3_file.path)])
+                item.setData(0, Qt.ItemDataRole.UserRole, id(mp3_file))
+                item.setCheckState(0, Qt.CheckState.Checked if index else Qt.CheckState.Unchecked)
+                self.files[id(mp3_file)] = mp3_file
+        self.tree.expandAll()
+        layout.addWidget(self.tree)
+
+        button_layout = QHBoxLayout()
+        deactivate_button = QPushButton("Deactivate Ticked")
+        deactivate_button.setToolTip("Untick the copies in the file list so edits skip them")
+        deactivate_button.clicked.connect(lambda: self.emit_ticked(self.deactivate_requested))
+        button_layout.addWidget(deactivate_button)
+        remove_button = QPushButton("Remove Ticked From List")
+        remove_button.setToolTip("Unload the copies; nothing is deleted from disk")
+        remove_button.clicked.connect(lambda: self.emit_ticked(self.remove_requested))
+        button_layout.addWidget(remove_button)
+        button_layout.addStretch(1)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.close)
+        button_layout.addWidget(close_button)
+        layout.addLayout(button_layout)
+
+    def ticked_items(self):
+        items = []
+        for group_index in range(self.tree.topLevelItemCount()):
+            group_item = self.tree.topLevelItem(group_index)
+            for index in range(group_item.childCount()):
+                item = group_item.child(index)
+                if item.checkState(0) == Qt.CheckState.Checked:
+                    items.append(item)
+        return items
+
+    def emit_ticked(self, signal):
+        """Hand the ticked copies to the window and drop them (and groups left with one file) from the tree."""
+        items = self.ticked_items()
+        if not items:
+            return
+        signal.emit([self.files.pop(item.data(0, Qt.ItemDataRole.UserRole)) for item in items])
+        for item in items:
+            item.parent().removeChild(item)
+        for group_index in reversed(range(self.tree.topLevelItemCount())):
+            if self.tree.topLevelItem(group_index).childCount() < 2:
+                self.tree.takeTopLevelItem(group_index)
+        self.summary.setText(f"{len(items)} copies handled; {self.tree.topLevelItemCount()} group(s) left.")
@@ -0,0 +1,35 @@
+import os
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from PyQt6.QtCore import QObject, pyqtSignal
+from audio_hash import find_duplicates
+from profiling import profile_operation
+
+class DuplicateWorker(QObject):
+    """Groups files with identical audio on a process pool; see audio_hash.find_duplicates.
+
+    Meant to be moved to a QThread.
+    """
+    progress = pyqtSignal(str, int, int) # stage, done, total
+    finished = pyqtSignal(list, list, bool) # groups of paths, [(path, error)], cancelled
+
+    def __init__(self, paths, max_workers=None, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        # 'spawn' for the same reason as the scan pool: forking a process that runs Qt threads is unsafe
+        context = multiprocessing.get_context('spawn')
+        with profile_operation('duplicates'), ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            groups, errors = find_duplicates(self.paths, executor, progress=self.progress.emit,
+                                             cancelled=self.is_cancelled)
+        self.finished.emit(groups or [], errors, groups is None)
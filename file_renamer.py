@@ -1,12 +1,20 @@
-from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QAbstractItemView, QMessageBox, QListWidgetItem, QCheckBox)
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QPushButton, QListWidget, QAbstractItemView, QMessageBox, QListWidgetItem, QCheckBox, QFileDialog)
+from PyQt6.QtCore import Qt, QSize, pyqtSignal
 import os
+from bisect import bisect_left
+from rename_pattern import compile_pattern
+from rename_plan import RenamePlan
 from PyQt6.QtGui import QPalette
 
 class FileRenamer(QWidget):
+    renames_staged = pyqtSignal(list) # list of (MP3File, new_path); files are renamed on commit
+    
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mp3_files = []
+        self.preview_source = None # (pattern text, destination folder) of the current preview
+        self.preview_targets = {} # file index -> new path rendered by the preview
+        self.preview_plan = None # (file indices, RenamePlan) of the last check, reused by Apply Rename
         self.setup_ui()
     
     def setup_ui(self):
@@ -35,7 +43,8 @@ class FileRenamer(QWidget):
         """)
         
         # Instructions
-        instruction_label = QLabel("Enter the renaming pattern using metadata tags (e.g., artist - album - track - title).")
+        instruction_label = QLabel("Enter the renaming pattern using metadata tags (e.g., artist - album - track - title). "
+                                   "Braces add padding and fallbacks: {track:02} - {title|Untitled}.")
         instruction_label.setWordWrap(True)
         layout.addWidget(instruction_label)
         
@@ -53,6 +62,17 @@ class FileRenamer(QWidget):
         pattern_layout.addWidget(self.pattern_input)
         layout.addLayout(pattern_layout)
         
+        # Organizing: with a folder here (or '/' in the pattern, e.g. artist/album/title) files are moved
+        root_layout = QHBoxLayout()
+        root_layout.addWidget(QLabel("Move into:"))
+        self.root_input = QLineEdit()
+        self.root_input.setPlaceholderText("Each file's own folder")
+        root_layout.addWidget(self.root_input)
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self.browse_root)
+        root_layout.addWidget(browse_button)
+        layout.addLayout(root_layout)
+        
         # Buttons
         button_layout = QHBoxLayout()
         self.preview_button = QPushButton("Preview Rename")
@@ -82,168 +102,204 @@ class FileRenamer(QWidget):
         
     def load_files(self, mp3_files):
         self.mp3_files = mp3_files
+        self.preview_source = None
+        self.preview_targets = {}
+        self.preview_plan = None
         self.file_list.clear()
         self.apply_button.setEnabled(False) # Disable apply button when files are loaded/cleared
         
         # print(f"FileRenamer.load_files called with {len(mp3_files)} files.") # Debug print
 
         for i, mp3_file in enumerate(self.mp3_files):
-            # Create the list item
-            item = QListWidgetItem(self.file_list) # Pass list widget as parent
-            item.setData(Qt.ItemDataRole.UserRole, i) # Store the index of the file
-            
-            # Create the checkbox
-            checkbox = QCheckBox(os.path.basename(mp3_file.path))
-            checkbox.setChecked(True) # Start with all files selected
-            # Apply inline stylesheet for text color and font - indicator style comes from parent stylesheet
-            checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
-            
-            # Set the checkbox as the item widget
-            self.file_list.setItemWidget(item, checkbox)
+            self.add_item(i, os.path.basename(mp3_file.path), True) # Start with all files selected
+
+    def add_files(self, mp3_files):
+        """Show files just appended to the shared file list, without rebuilding the others."""
+        start = len(self.mp3_files) - len(mp3_files)
+        indices = range(start, len(self.mp3_files))
+        if self.preview_source is not None:
+            # Keep the preview complete: new files get their names under the same pattern
+            pattern, root = compile_pattern(self.preview_source[0]), self.preview_source[1]
+            self.preview_targets.update(zip(indices, pattern.targets(list(mp3_files), root)))
+            self.preview_plan = None
+        for i in indices:
+            self.add_item(i, self.item_text(i), True)
+    
+    def remove_rows(self, rows):
+        """Drop the items of files removed from the shared list at rows (their old indices)."""
+        rows = sorted(rows)
+        removed = set(rows)
+        for position in reversed(range(self.file_list.count())):
+            item = self.file_list.item(position)
+            i = item.data(Qt.ItemDataRole.UserRole)
+            if i in removed:
+                self.file_list.removeItemWidget(item)
+                self.file_list.takeItem(position)
+            else:
+                item.setData(Qt.ItemDataRole.UserRole, i - bisect_left(rows, i))
+        self.preview_targets = {i - bisect_left(rows, i): target
+                                for i, target in self.preview_targets.items() if i not in removed}
+        self.preview_plan = None
+    
+    def refresh_rows(self, rows):
+        """Update the labels (and previewed names) of files whose tags or paths changed."""
+        rows = [i for i in rows if i < len(self.mp3_files)]
+        if self.preview_source is not None:
+            previewed = [i for i in rows if i in self.preview_targets]
+            pattern, root = compile_pattern(self.preview_source[0]), self.preview_source[1]
+            self.preview_targets.update(zip(previewed, pattern.targets([self.mp3_files[i] for i in previewed], root)))
+            self.preview_plan = None
+        wanted = set(rows)
+        for position in range(self.file_list.count()):
+            item = self.file_list.item(position)
+            i = item.data(Qt.ItemDataRole.UserRole)
+            checkbox = self.file_list.itemWidget(item)
+            if i in wanted and checkbox:
+                checkbox.setText(self.item_text(i))
+    
+    def item_text(self, i):
+        """Checkbox label of a file: its name, or 'old' -> 'new' while previewing."""
+        original_name = os.path.basename(self.mp3_files[i].path)
+        new_path = self.preview_targets.get(i)
+        if new_path is None:
+            return original_name
+        # Moves into another folder show the whole new path
+        same_folder = os.path.dirname(new_path) == os.path.dirname(self.mp3_files[i].path)
+        return f"'{original_name}' -> '{os.path.basename(new_path) if same_folder else new_path}'"
+    
+    def add_item(self, i, text, checked):
+        item = QListWidgetItem(self.file_list) # Pass list widget as parent
+        item.setData(Qt.ItemDataRole.UserRole, i) # Store the index of the file
+        checkbox = QCheckBox(text)
+        checkbox.setChecked(checked)
+        # Apply inline stylesheet for text color and font - indicator style comes from parent stylesheet
+        checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
+        self.file_list.setItemWidget(item, checkbox)
 
     def preview_rename(self):
-        raw_pattern = self.pattern_input.text()
-        # Automatically add curly braces around known tags
-        pattern = raw_pattern.replace("artist", "{artist}").replace("album", "{album}").replace("year", "{year}").replace("genre", "{genre}").replace("title", "{title}").replace("track", "{tracknumber}")
+        # The pattern is parsed once; an invalid one is reported instead of failing per file
+        try:
+            pattern = compile_pattern(self.pattern_input.text())
+        except ValueError as e:
+            self.show_pattern_error(e)
+            return
         
         # --- Start: Get checked items before clearing ---
-        files_to_preview_indices = []
-        # print(f"Preview Rename: Getting checked items. List count: {self.file_list.count()}") # Debug print
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            # Assuming the item widget is the checkbox itself
-            checkbox = self.file_list.itemWidget(item)
-            if checkbox and checkbox.isChecked():
-                 files_to_preview_indices.append(item.data(Qt.ItemDataRole.UserRole))
+        files_to_preview_indices = self.checked_indices()
         # --- End: Get checked items before clearing ---
+        
+        # Render every checked file in one pass
+        root = self.destination()
+        targets = pattern.targets([self.mp3_files[i] for i in files_to_preview_indices], root)
+        self.preview_source = (pattern.source, root)
+        self.preview_targets = dict(zip(files_to_preview_indices, targets))
+        self.preview_plan = None
+        # Names that collide with each other or with files on disk are shown unchecked
+        conflicts = {source: reason for source, _, reason in self.plan_for(files_to_preview_indices).conflicts}
 
         self.file_list.clear() # Clear and re-populate with previews
         preview_available = False
         
         # print(f"Preview Rename: Found {len(files_to_preview_indices)} files to preview.") # Debug print
 
-        for i in files_to_preview_indices:
-            mp3_file = self.mp3_files[i]
-            original_name = os.path.basename(mp3_file.path)
-            try:
-                # Build the new filename based on the pattern and metadata
-                new_name = pattern.format(
-                    artist=mp3_file.metadata.get('artist', 'Unknown Artist'),
-                    album=mp3_file.metadata.get('album', 'Unknown Album'),
-                    year=mp3_file.metadata.get('year', 'Unknown Year'),
-                    genre=mp3_file.metadata.get('genre', 'Unknown Genre'),
-                    title=mp3_file.metadata.get('title', 'Unknown Title'),
-                    tracknumber=mp3_file.metadata.get('tracknumber', '') # Include tracknumber in format
-                ) + os.path.splitext(original_name)[1] # Keep original extension
-                
-                # Simple validation for invalid characters (platform dependent, but covers common issues)
-                # Replace invalid characters with underscores, for example
-                invalid_chars = '<|>|:|"|/|\\|\?|\*'
-                for char in invalid_chars:
-                     new_name = new_name.replace(char, '_')
-
-                # Create the list item
-                item = QListWidgetItem(self.file_list) # Pass list widget as parent
-                item.setData(Qt.ItemDataRole.UserRole, i) # Store index in new item
-                
-                # Create the checkbox with preview text
-                checkbox = QCheckBox(f"'{original_name}' -> '{new_name}'")
-                checkbox.setChecked(True) # Keep the item checked in preview
-                 # Apply inline stylesheet for text color and font
-                checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
-                
-                # Set the checkbox as the item widget
-                self.file_list.setItemWidget(item, checkbox)
-                # print(f"Preview Rename: Added item for {original_name}") # Debug print
-                preview_available = True
+        for i, new_path in self.preview_targets.items():
+            original_name = os.path.basename(self.mp3_files[i].path)
+            # Moves into another folder show the whole new path
+            same_folder = os.path.dirname(new_path) == os.path.dirname(self.mp3_files[i].path)
+            new_name = os.path.basename(new_path) if same_folder else new_path
 
-            except Exception as e:
-                # Create the list item
-                item = QListWidgetItem(self.file_list) # Pass list widget as parent
-                item.setData(Qt.ItemDataRole.UserRole, i) # Store index
-                
-                # Create the checkbox with error text
-                checkbox = QCheckBox(f"Error processing {original_name}: {str(e)}")
-                checkbox.setChecked(True) # Keep checked
-                 # Apply inline stylesheet for text color and font
-                checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
-                
-                # Set the checkbox as the item widget
-                self.file_list.setItemWidget(item, checkbox)
-                # print(f"Preview Rename: Error adding item for {original_name}: {str(e)}") # Debug print
+            # Create the list item
+            item = QListWidgetItem(self.file_list) # Pass list widget as parent
+            item.setData(Qt.ItemDataRole.UserRole, i) # Store index in new item
+            
+            # Create the checkbox with preview text
+            conflict = conflicts.get(self.mp3_files[i].path)
+            checkbox = QCheckBox(f"'{original_name}' -> '{new_name}'" + (f"  (conflict: {conflict})" if conflict else ""))
+            checkbox.setChecked(conflict is None) # Keep the item checked in preview
+             # Apply inline stylesheet for text color and font
+            checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
+            
+            # Set the checkbox as the item widget
+            self.file_list.setItemWidget(item, checkbox)
+            preview_available = True
 
         # print(f"Preview Rename: Finished processing. Preview available: {preview_available}") # Debug print
         self.apply_button.setEnabled(preview_available)
 
     def apply_rename(self):
-        renamed_count = 0
-        
         # Get indices of checked items from the preview list
-        files_to_rename_indices = []
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            checkbox = self.file_list.itemWidget(item) # Get the checkbox widget directly
-            if checkbox and checkbox.isChecked():
-                 files_to_rename_indices.append(item.data(Qt.ItemDataRole.UserRole))
-
-        for i in files_to_rename_indices:
-            mp3_file = self.mp3_files[i]
-            original_path = mp3_file.path
-            original_name = os.path.basename(original_path)
-            
+        files_to_rename_indices = self.checked_indices()
+        
+        # Reuse the preview's names; re-render only if the pattern was edited since
+        root = self.destination()
+        if (self.pattern_input.text(), root) != self.preview_source:
             try:
-                # Re-generate the new name to ensure consistency with preview
-                raw_pattern = self.pattern_input.text()
-                # Automatically add curly braces around known tags
-                pattern = raw_pattern.replace("artist", "{artist}").replace("album", "{album}").replace("year", "{year}").replace("genre", "{genre}").replace("title", "{title}").replace("track", "{tracknumber}")
-                
-                new_name = pattern.format(
-                    artist=mp3_file.metadata.get('artist', 'Unknown Artist'),
-                    album=mp3_file.metadata.get('album', 'Unknown Album'),
-                    year=mp3_file.metadata.get('year', 'Unknown Year'),
-                    genre=mp3_file.metadata.get('genre', 'Unknown Genre'),
-                    title=mp3_file.metadata.get('title', 'Unknown Title'),
-                    tracknumber=mp3_file.metadata.get('tracknumber', '') # Include tracknumber in format
-                ) + os.path.splitext(original_name)[1]
-                
-                invalid_chars = '<|>|:|"|/|\\|\?|\*'
-                for char in invalid_chars:
-                     new_name = new_name.replace(char, '_')
-
-                new_path = os.path.join(os.path.dirname(original_path), new_name)
-                
-                if original_path != new_path:
-                    os.rename(original_path, new_path)
-                    mp3_file.path = new_path # Update the path in the MP3File object
-                    renamed_count += 1
-                    
-            except Exception as e:
-                # Optionally show a message box for critical errors
-                # print(f"Error renaming {original_name} to {new_name}: {str(e)}") # Debug print
-                pass # Suppress error print for now
-                # Optionally show a message box for critical errors
-                
+                pattern = compile_pattern(self.pattern_input.text())
+            except ValueError as e:
+                self.show_pattern_error(e)
+                return
+            self.preview_source = (pattern.source, root)
+            self.preview_targets = dict(zip(files_to_rename_indices,
+                                            pattern.targets([self.mp3_files[i] for i in files_to_rename_indices], root)))
+            self.preview_plan = None
+        
+        plan = self.plan_for(files_to_rename_indices)
+        files_by_path = {self.mp3_files[i].path: self.mp3_files[i] for i in files_to_rename_indices}
+        renames = [(files_by_path[source], target) for source, target in plan.moves]
+        
         # Replace static QMessageBox.information with instance for styling
         msg_box = QMessageBox(self) # Create a QMessageBox instance
         msg_box.setIcon(QMessageBox.Icon.Information) # Set the information icon
-        msg_box.setWindowTitle("Rename Complete")
-        msg_box.setText(f"Successfully renamed {renamed_count} files.")
+        msg_box.setWindowTitle("Rename Staged")
+        msg_box.setText(f"Staged {len(renames)} renames. Use Commit Changes to apply them."
+                        + (f" {len(plan.conflicts)} conflicting renames were skipped." if plan.conflicts else ""))
         # Apply stylesheet for white mode, matching the duplicate file warning
         msg_box.setStyleSheet("QMessageBox { background-color: white; color: black; } QLabel { color: black; } QPushButton { background-color: #4a90e2; color: white; border: none; padding: 5px 10px; border-radius: 3px; }")
         msg_box.exec() # Use exec() to show the styled dialog
         
-        self.load_files(self.mp3_files) # Reload files to show updated names
+        if renames:
+            self.renames_staged.emit(renames)
 
-    def cancel_rename(self):
-        """Clears the current list and reloads the original files, preserving selection."""
-        # Store the indices of currently checked files
-        checked_indices = []
+    def destination(self):
+        """Folder to organize files into, or None to keep each file's own folder."""
+        return os.path.abspath(os.path.expanduser(self.root_input.text().strip())) if self.root_input.text().strip() else None
+    
+    def browse_root(self):
+        folder = QFileDialog.getExistingDirectory(self, "Move Files Into")
+        if folder:
+            self.root_input.setText(folder)
+    
+    def plan_for(self, indices):
+        """RenamePlan moving the given files to their previewed names; reused while the files are the same."""
+        key = frozenset(indices)
+        if self.preview_plan is None or self.preview_plan[0] != key:
+            self.preview_plan = (key, RenamePlan([(self.mp3_files[i].path, self.preview_targets[i])
+                                                  for i in indices if i in self.preview_targets]))
+        return self.preview_plan[1]
+    
+    def checked_indices(self):
+        """Indices (into mp3_files) of the files whose checkbox is ticked, in list order."""
+        indices = []
         for i in range(self.file_list.count()):
             item = self.file_list.item(i)
             # Assuming the item widget is the checkbox itself
             checkbox = self.file_list.itemWidget(item)
             if checkbox and checkbox.isChecked():
-                 checked_indices.append(item.data(Qt.ItemDataRole.UserRole))
+                 indices.append(item.data(Qt.ItemDataRole.UserRole))
+        return indices
+    
+    def show_pattern_error(self, error):
+        msg_box = QMessageBox(self)
+        msg_box.setIcon(QMessageBox.Icon.Warning)
+        msg_box.setWindowTitle("Invalid Pattern")
+        msg_box.setText(str(error))
+        msg_box.setStyleSheet("QMessageBox { background-color: white; color: black; } QLabel { color: black; } QPushButton { background-color: #4a90e2; color: white; border: none; padding: 5px 10px; border-radius: 3px; }")
+        msg_box.exec()
+    
+    def cancel_rename(self):
+        """Clears the current list and reloads the original files, preserving selection."""
+        # Store the indices of currently checked files
+        checked_indices = set(self.checked_indices())
 
         self.file_list.clear() # Clear the current list display
         self.load_files(self.mp3_files) # Reload the original list (defaults to all checked)
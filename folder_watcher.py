@@ -0,0 +1,213 @@
+import os
+import time
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+from profiling import profiler
+from scanner import walk_folders
+
+DEBOUNCE_MS = 400 # Quiet time after the last event before folders are re-listed
+MAX_DELAY_MS = 2000 # ...but never hold a burst of events back longer than this
+# Directory watches see creates, deletes and renames; in-place tag saves only show up on
+# file watches, which cost a descriptor each on some platforms, so they are capped
+FILE_WATCH_LIMIT = 8192
+
+class FolderWatcher(QObject):
+    """Reports files created, modified, deleted or renamed by other programs.
+
+    Every folder holding a watched file is watched, plus the files themselves up to
+    FILE_WATCH_LIMIT. Events only mark folders dirty; once things go quiet each dirty
+    folder is listed once and compared with a (size, mtime_ns) snapshot, so a burst of
+    thousands of changes costs one scandir per folder. A file that disappears while
+    another with the same size and mtime appears is reported as a rename. Every
+    folder below a root passed to watch_folder is watched, existing or created later,
+    within the root's max_depth and exclude patterns (the scanner's rules).
+    """
+    changed = pyqtSignal(list, list, list, list) # created, modified, deleted paths, [(old, new)] renames
+
+    def __init__(self, accept=None, parent=None):
+        super().__init__(parent)
+        self.accept = accept or (lambda path: path.lower().endswith('.mp3')) # Which new files to report
+        self.known = {} # folder -> {path: (size, mtime_ns)}
+        self.roots = {} # Folder (with trailing separator) -> (max_depth, exclude) for its subfolders
+        self.dirty = set()
+        self.paused = False
+        self.first_event = None # time.monotonic() of the first event of the burst being debounced
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(self.mark_dirty)
+        self.watcher.fileChanged.connect(self.on_file_changed)
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self.flush)
+
+    def watch_files(self, paths):
+        """Start watching paths (and their folders), taking their current state as known."""
+        new_folders = []
+        new_files = []
+        for path in paths:
+            folder = os.path.dirname(path)
+            files = self.known.get(folder)
+            if files is None:
+                files = self.known[folder] = {}
+                new_folders.append(folder)
+            if path in files:
+                continue
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (info.st_size, info.st_mtime_ns)
+            new_files.append(path)
+        if new_folders:
+            self.watcher.addPaths(new_folders)
+        self.add_file_watches(new_files)
+
+    def watch_folder(self, folder, max_depth=None, exclude=()):
+        """Watch a loaded root folder and the subfolders a scan of it would enter, including later ones."""
+        self.roots[os.path.join(folder, '')] = (max_depth, exclude)
+        self.add_folders(walk_folders(folder, max_depth, exclude))
+
+    def add_folders(self, folders):
+        """Start watching folders not watched yet; returns them."""
+        new_folders = [folder for folder in folders if folder not in self.known]
+        for folder in new_folders:
+            self.known[folder] = {}
+        if new_folders:
+            self.watcher.addPaths(new_folders)
+        return new_folders
+
+    def add_file_watches(self, paths):
+        room = FILE_WATCH_LIMIT - len(self.watcher.files())
+        if room > 0 and paths:
+            self.watcher.addPaths(paths[:room])
+
+    def forget(self, paths):
+        for path in paths:
+            files = self.known.get(os.path.dirname(path))
+            if files is not None and files.pop(path, None) is not None:
+                self.watcher.removePath(path)
+
+    def rebaseline(self, paths):
+        """Accept the current on-disk state of paths, e.g. after the app wrote them itself."""
+        new_files = []
+        for path in paths:
+            files = self.known.get(os.path.dirname(path))
+            if files is None:
+                continue
+            try:
+                info = os.stat(path)
+            except OSError:
+                files.pop(path, None)
+                continue
+            if path not in files:
+                new_files.append(path)
+            files[path] = (info.st_size, info.st_mtime_ns)
+        self.add_file_watches(new_files)
+
+    def pause(self):
+        """Hold events back (they are kept) while the app writes files itself."""
+        self.paused = True
+        self.timer.stop()
+
+    def resume(self):
+        self.paused = False
+        if self.dirty:
+            self.timer.start(DEBOUNCE_MS)
+
+    def clear(self):
+        self.timer.stop()
+        self.dirty.clear()
+        self.first_event = None
+        self.known = {}
+        self.roots = {}
+        for paths in (self.watcher.files(), self.watcher.directories()):
+            if paths:
+                self.watcher.removePaths(paths)
+
+    def on_file_changed(self, path):
+        self.mark_dirty(os.path.dirname(path))
+        # Tools that save by replacing the file drop the watch with it; re-arm it
+        if os.path.exists(path) and path not in self.watcher.files():
+            self.watcher.addPath(path)
+
+    def mark_dirty(self, folder):
+        if folder not in self.known:
+            return
+        self.dirty.add(folder)
+        if self.paused:
+            return
+        now = time.monotonic()
+        if self.first_event is None:
+            self.first_event = now
+        # Restart the quiet period, but flush anyway once the burst is MAX_DELAY_MS old
+        remaining = MAX_DELAY_MS - (now - self.first_event) * 1000
+        self.timer.start(int(max(0, min(DEBOUNCE_MS, remaining))))
+
+    def flush(self):
+        self.first_event = None
+        folders, self.dirty = self.dirty, set()
+        created, modified, deleted = [], [], []
+        with profiler.span('watch rescan'):
+            for folder in folders:
+                if folder in self.known:
+                    self.diff_folder(folder, created, modified, deleted)
+        renames = self.match_renames(created, deleted)
+        created = [path for path, _ in created]
+        profiler.count('watch changes', len(created) + len(modified) + len(deleted) + len(renames))
+        if created or modified or deleted or renames:
+            self.changed.emit(created, modified, deleted, renames)
+
+    def diff_folder(self, folder, created, modified, deleted):
+        known = self.known[folder]
+        current = {}
+        subfolders = []
+        root = next((root for root in self.roots if os.path.join(folder, '').startswith(root)), None)
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir():
+                            if root is not None and entry.path not in self.known:
+                                subfolders.append(entry.path)
+                        elif (entry.path in known or self.accept(entry.path)) and entry.is_file():
+                            info = entry.stat()
+                            current[entry.path] = (info.st_size, info.st_mtime_ns)
+                    except OSError:
+                        continue
+        except OSError:
+            pass # The folder itself is gone: everything in it was deleted
+        added = []
+        for path, state in current.items():
+            previous = known.get(path)
+            if previous is None:
+                created.append((path, state))
+                added.append(path)
+            elif previous != state:
+                modified.append(path)
+        for path, state in known.items():
+            if path not in current:
+                deleted.append((path, state))
+        self.known[folder] = current
+        self.add_file_watches(added)
+        # A folder created or moved in below a root: watch it (and its own subfolders,
+        # within the root's rules) and report what it holds
+        max_depth, exclude = self.roots.get(root, (None, ()))
+        for subfolder in subfolders:
+            for new_folder in self.add_folders(list(walk_folders(subfolder, max_depth, exclude, under=root))):
+                self.diff_folder(new_folder, created, modified, deleted)
+
+    def match_renames(self, created, deleted):
+        """Pair deleted and created files with identical (size, mtime_ns); renames keep both."""
+        by_state = {}
+        for path, state in deleted:
+            by_state.setdefault(state, []).append(path)
+        renames = []
+        still_created = []
+        for path, state in created:
+            olds = by_state.get(state)
+            if olds:
+                renames.append((olds.pop(), path))
+            else:
+                still_created.append((path, state))
+        renamed_from = {old for old, _ in renames}
+        created[:] = still_created
+        deleted[:] = [path for path, _ in deleted if path not in renamed_from]
+        return renames
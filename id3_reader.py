@@ -0,0 +1,178 @@
+import os
+from profiling import profiler
+
+# ID3v2 frame id -> EasyID3 key, for the only frames the app displays
+TEXT_FRAMES = {
+    b'TPE1': 'artist',
+    b'TALB': 'album',
+    b'TDRC': 'date',
+    b'TYER': 'date',
+    b'TCON': 'genre',
+    b'TIT2': 'title',
+    b'TRCK': 'tracknumber',
+}
+EASY_KEYS = ('artist', 'album', 'date', 'genre', 'title', 'tracknumber')
+TEXT_ENCODINGS = ('latin-1', 'utf-16', 'utf-16-be', 'utf-8')
+
+class UnsupportedTag(Exception):
+    """The tag uses a feature the fast path doesn't handle; callers should fall back to mutagen."""
+
+class _CountingFile:
+    """Just enough of a file object for the parser, tallying the bytes actually read."""
+    __slots__ = ('f', 'bytes_read')
+
+    def __init__(self, f):
+        self.f = f
+        self.bytes_read = 0
+
+    def read(self, size):
+        data = self.f.read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self.f.seek(offset, whence)
+
+    def fileno(self):
+        return self.f.fileno()
+
+def _syncsafe(data):
+    return (data[0] << 21) | (data[1] << 14) | (data[2] << 7) | data[3]
+
+def _decode_text(body):
+    if not body or body[0] > 3:
+        raise UnsupportedTag("unknown text encoding")
+    encoding = TEXT_ENCODINGS[body[0]]
+    payload = body[1:]
+    if body[0] in (1, 2) and len(payload) % 2:
+        payload = payload[:-1]
+    try:
+        text = payload.decode(encoding)
+    except UnicodeDecodeError:
+        raise UnsupportedTag("undecodable text frame")
+    # Values are NUL separated; UTF-16 values after the first may carry their own BOM
+    return [value.lstrip('\ufeff') for value in text.split('\x00') if value.strip('\ufeff')]
+
+def _genre(values):
+    # Numeric and "(17)" style genres need ID3's genre table, exactly as EasyID3 applies it
+    from mutagen.id3 import TCON
+    genres = TCON(encoding=3, text=values).genres
+    return genres[0] if genres else ''
+
+def _parse_frames(f, size, major):
+    # Frames are walked header by header and unwanted bodies (artwork, lyrics...) are
+    # seeked over, so only a few KB are read however large the tag is
+    found = {}
+    tdat = None
+    pos = 0
+    while pos + 10 <= size:
+        header = f.read(10)
+        if len(header) < 10 or header[0] == 0:
+            break # Reached padding
+        frame_id = header[:4]
+        frame_size = _syncsafe(header[4:8]) if major == 4 else int.from_bytes(header[4:8], 'big')
+        format_flags = header[9]
+        pos += 10 + frame_size
+        if pos > size:
+            raise UnsupportedTag("frame overruns tag")
+        if frame_id not in TEXT_FRAMES and frame_id != b'TDAT':
+            f.seek(frame_size, os.SEEK_CUR)
+            continue
+        body = f.read(frame_size)
+        # Compression, encryption, grouping, unsynchronisation or data length indicator
+        if format_flags & (0x4F if major == 4 else 0xE0):
+            raise UnsupportedTag(f"{frame_id.decode()} uses frame format flags")
+        values = _decode_text(body)
+        if not values:
+            continue
+        if frame_id == b'TDAT':
+            tdat = values[0]
+            continue
+        key = TEXT_FRAMES[frame_id]
+        if frame_id == b'TYER' and key in found:
+            continue # TDRC wins over the v2.3 year frame
+        found[key] = _genre(values) if key == 'genre' else values[0]
+    # v2.3 splits the date over TYER (YYYY) and TDAT (DDMM); mutagen merges them like this
+    if major == 3 and tdat and len(tdat) == 4 and 'date' in found:
+        found['date'] = f"{found['date']}-{tdat[2:]}-{tdat[:2]}"
+    return found
+
+def _read_id3v1(f, file_size):
+    if file_size < 128:
+        return {}
+    f.seek(-128, os.SEEK_END)
+    tail = f.read(128)
+    if tail[:3] != b'TAG':
+        return {}
+
+    def text(raw):
+        return raw.split(b'\x00')[0].strip().decode('latin-1')
+
+    found = {}
+    for key, start, end in (('title', 3, 33), ('artist', 33, 63), ('album', 63, 93), ('date', 93, 97)):
+        value = text(tail[start:end])
+        if value:
+            found[key] = value
+    comment = tail[97:127]
+    if comment[28] == 0 and comment[29] != 0:
+        found['tracknumber'] = str(comment[29])
+    if tail[127] != 255:
+        found['genre'] = _genre([str(tail[127])])
+    return found
+
+def _read_tags(f):
+    header = f.read(10)
+    found = {}
+    has_v2 = len(header) == 10 and header[:3] == b'ID3'
+    if has_v2:
+        major, flags = header[3], header[5]
+        if major not in (3, 4):
+            raise UnsupportedTag(f"ID3v2.{major}")
+        if flags & 0x80:
+            raise UnsupportedTag("unsynchronised tag")
+        size = _syncsafe(header[6:10])
+        if flags & 0x40:
+            # Skip the extended header (v2.4 counts its own size field, v2.3 doesn't)
+            raw = f.read(4)
+            skip = _syncsafe(raw) if major == 4 else 4 + int.from_bytes(raw, 'big')
+            f.seek(10 + skip)
+            size -= skip
+        found = _parse_frames(f, size, major)
+    if len(found) < len(EASY_KEYS):
+        v1 = _read_id3v1(f, os.fstat(f.fileno()).st_size)
+        if not has_v2 and not v1:
+            return None
+        for key, value in v1.items():
+            found.setdefault(key, value)
+    return found
+
+def read_id3_fast(path):
+    """Read EasyID3-style artist/album/date/genre/title/tracknumber without mutagen.
+
+    Only the 10-byte ID3v2 header and the wanted frames are read (plus the 128-byte
+    ID3v1 tail when fields are missing, which fills gaps like mutagen does). Returns None if
+    the file has no ID3 tag and raises UnsupportedTag for anything unusual.
+    """
+    with open(path, 'rb') as raw:
+        f = _CountingFile(raw)
+        try:
+            return _read_tags(f)
+        finally:
+            profiler.count('bytes read', f.bytes_read)
+
+def read_id3_mutagen(path):
+    """Slow path through EasyID3; same return contract as read_id3_fast."""
+    from mutagen.easyid3 import EasyID3
+    from mutagen.id3 import ID3NoHeaderError
+    try:
+        audio = EasyID3(path)
+    except ID3NoHeaderError:
+        return None
+    return {key: audio[key][0] for key in EASY_KEYS if audio.get(key)}
+
+def read_id3(path):
+    try:
+        return read_id3_fast(path)
+    except UnsupportedTag:
+        profiler.count('mutagen fallbacks')
+        return read_id3_mutagen(path)
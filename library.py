@@ -0,0 +1,83 @@
+"""Library operations shared by the GUI and the command line; nothing here imports PyQt6."""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from mp3_file import MP3File, load_mp3_batch
+from profiling import profiler, run_profiled
+
+# Fields of the bulk edit panel (title and track number are edited elsewhere)
+EDIT_FIELDS = ('artist', 'album', 'year', 'genre')
+SCAN_CHUNK_SIZE = 200
+
+def album_name(mp3_file):
+    return mp3_file.metadata.get('album', 'Unknown Album')
+
+def parse_track_number(value):
+    """'3', '03' or '3/12' -> (3, 12); (None, None) for missing or unparsable numbers."""
+    number, _, total = (value or '').partition('/')
+    try:
+        return int(number), int(total) if total.strip() else None
+    except ValueError:
+        return None, None
+
+def group_by_album(mp3_files):
+    """Group files by album name, keeping first-seen album order and file order."""
+    with profiler.span('album grouping'):
+        albums = {}
+        for mp3_file in mp3_files:
+            album = album_name(mp3_file)
+            if album not in albums:
+                albums[album] = []
+            albums[album].append(mp3_file)
+    return albums
+
+def edit_fields(values):
+    """Bulk edit semantics: blank values mean 'keep what each file has'."""
+    return {field: value for field, value in values.items() if field in EDIT_FIELDS and value and value.strip()}
+
+def renumber(albums, with_total=False):
+    """Number each album's files by position; returns ([(MP3File, tracknumber)], [unchanged MP3File]).
+
+    `albums` is an iterable of file lists in track order. A file is unchanged when its tag
+    already holds that number ('03' counts as 3); without with_total an existing total is kept.
+    """
+    changed, unchanged = [], []
+    for files in albums:
+        total = len(files)
+        for index, mp3_file in enumerate(files):
+            number, current_total = parse_track_number(mp3_file.metadata.get('tracknumber', ''))
+            if number == index + 1 and (not with_total or current_total == total):
+                unchanged.append(mp3_file)
+            else:
+                changed.append((mp3_file, f"{index + 1}/{total}" if with_total else str(index + 1)))
+    return changed, unchanged
+
+def load_library(paths, cache=None, max_workers=None):
+    """Load MP3Files for paths (in order), parsing cache misses on a process pool."""
+    stats = []
+    for path in paths:
+        try:
+            info = os.stat(path)
+        except OSError:
+            continue
+        stats.append((path, info.st_size, info.st_mtime_ns))
+    hits = cache.lookup_many(stats) if cache else {}
+    misses = [stat for stat in stats if stat[0] not in hits]
+    parsed = {}
+    if len(misses) <= SCAN_CHUNK_SIZE:
+        batches = [load_mp3_batch([path for path, _, _ in misses])]
+    else:
+        chunks = [[path for path, _, _ in misses[i:i + SCAN_CHUNK_SIZE]]
+                  for i in range(0, len(misses), SCAN_CHUNK_SIZE)]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            batches = []
+            for batch, numbers in executor.map(run_profiled, [load_mp3_batch] * len(chunks), chunks):
+                profiler.merge(numbers)
+                batches.append(batch)
+    for batch in batches:
+        for mp3_file in batch:
+            parsed[mp3_file.path] = mp3_file
+    if cache:
+        # Files that failed to parse are retried next time rather than cached
+        cache.store_many([(path, size, mtime_ns, parsed[path].record())
+                          for path, size, mtime_ns in misses if parsed[path].error is None])
+    return [MP3File(path, hits[path]) if path in hits else parsed[path] for path, _, _ in stats]
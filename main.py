@@ -1,40 +1,29 @@
 import sys
 import os
+import time
+STARTUP_START = time.perf_counter()
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
-                            QHBoxLayout, QPushButton, QFileDialog, QListWidget, 
+                            QHBoxLayout, QPushButton, QFileDialog,
                             QLabel, QLineEdit, QGroupBox, QCheckBox, QTabWidget,
-                            QListWidgetItem, QFrame, QMessageBox)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QPalette, QColor, QFont
-from mutagen.easyid3 import EasyID3
-from album_view import AlbumView
-from file_renamer import FileRenamer
+                            QFrame, QMessageBox, QProgressBar, QTableView,
+                            QAbstractItemView, QHeaderView, QToolButton, QMenu)
+from PyQt6.QtCore import Qt, QThread, QTimer, QObject, QEvent
+from PyQt6.QtGui import QPalette, QColor, QFont, QShortcut, QKeySequence
+from mp3_file import path_key
+from scan_worker import ScanWorker
+from write_worker import WriteWorker, DEFAULT_CONCURRENCY
+from functools import partial
+from pending_changes import PendingChange, PendingChanges, commit_change
+from rename_plan import RenamePlan
+from tag_io import normalize_padding
+from library import edit_fields
+from profiling import profiler, profile_operation, default_log_path
+from scanner import walk_mp3_files, iter_mp3_paths, matches_file, DEFAULT_INCLUDE
+from metadata_cache import open_cache
+from track_table_model import TrackTableModel, TrackDelegate
 
-class MP3File:
-    def __init__(self, path):
-        self.path = path
-        self.active = True
-        self.metadata = self.load_metadata()
-    
-    def load_metadata(self):
-        try:
-            audio = EasyID3(self.path)
-            return {
-                'artist': audio.get('artist', [''])[0],
-                'album': audio.get('album', [''])[0],
-                'year': audio.get('date', [''])[0],
-                'genre': audio.get('genre', [''])[0],
-                'title': audio.get('title', [''])[0],
-                'tracknumber': audio.get('tracknumber', [''])[0]
-            }
-        except:
-            return {
-                'artist': '',
-                'album': '',
-                'year': '',
-                'genre': '',
-                'title': os.path.basename(self.path)
-            }
+UNDO_MENU_SIZE = 20 # Recent commits offered by the Undo button's menu
+UNOPENED = object() # The undo journal before its first use
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -100,6 +89,24 @@ class MainWindow(QMainWindow):
                 background-color: #e8f0fe;
                 color: #222;
             }
+            QTableView {
+                background-color: white;
+                alternate-background-color: #f7faff;
+                border: 1px solid #bbb;
+                border-radius: 4px;
+                font-size: 15px;
+                color: #000;
+                selection-background-color: #e8f0fe;
+                selection-color: #222;
+            }
+            QHeaderView::section {
+                background-color: #e6e9ef;
+                color: #222;
+                padding: 6px 8px;
+                border: none;
+                border-right: 1px solid #ddd;
+                font-weight: bold;
+            }
             QTabWidget::pane {
                 border: 1px solid #bbb;
                 border-radius: 4px;
@@ -143,7 +150,78 @@ class MainWindow(QMainWindow):
         """)
         
         self.mp3_files = []
-        self.setup_ui()
+        self.path_index = {} # path_key(path) -> MP3File, kept in sync with mp3_files
+        self.scan_duplicates = [] # Paths skipped as duplicates during the current scan
+        self.scan_errors = [] # (path, error) for files whose tags couldn't be read
+        self.duplicate_box = None
+        self.error_box = None
+        self.write_error_box = None
+        self.conflict_box = None
+        self.duplicate_report = None
+        
+        # Tag edits and renames are staged here and written by commit_changes
+        self.pending_changes = PendingChanges()
+        
+        # Background commit of the pending changes
+        self.write_thread = None
+        self.write_worker = None
+        self.write_changes = [] # PendingChange per write job, in job order (mp3_file None: not loaded)
+        self.write_previous = [] # Per write job, the values its fields had, for the undo journal
+        self.write_undoing = None # Journal operations the running write undoes, None for a commit
+        self.rename_plan = None # RenamePlan of the commit being written
+        self.write_paths = [] # Path per write job, for error reports
+        self.write_concurrency = DEFAULT_CONCURRENCY # Parallel saves; keep low for spinning disks
+        self.metadata_cache = open_cache() # None if the cache can't be created
+        self._undo_journal = UNOPENED # Read on first use, see the undo_journal property
+        self.scan_thread = None
+        self.scan_worker = None
+        self.pending_scans = [] # Path sources queued while another scan is running
+        self.reloading = set() # path_key of loaded files queued for a re-read by the scan worker
+        self.duplicate_thread = None
+        self.duplicate_worker = None # Audio comparison for Find Duplicates
+        
+        # Folder walk options (shared by Select Folder and folder drops)
+        self.scan_max_depth = None # None walks the whole tree, 0 only the top level
+        self.scan_include = DEFAULT_INCLUDE
+        self.scan_exclude = ()
+        
+        # Watch for changes: re-reads files other programs touch (off by default)
+        self.watch_roots = [] # Loaded or dropped folders; new subfolders in them are picked up
+        self.folder_watcher = None # Created the first time watching is turned on
+        
+        # Coalesces view refresh requests into a single rebuild on the next event loop pass
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setSingleShot(True)
+        self.refresh_timer.timeout.connect(self.refresh_views)
+        self.scan_started = None # perf_counter() of the running scan, for the files/s counter
+        self.scan_delivered = 0 # Files the running scan has sent so far, duplicates included
+        
+        with profiler.span('build window'):
+            self.setup_ui()
+        
+        # Hot-path counters in the status bar, refreshed once a second
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats_label)
+        self.stats_timer.start(1000)
+        self.update_stats_label()
+        # The Undo button stays disabled until the journal has been read, after startup
+        QTimer.singleShot(0, self.load_undo_state)
+    
+    @property
+    def undo_journal(self):
+        """The undo journal, opened on first use; None if it can't be created."""
+        if self._undo_journal is UNOPENED:
+            from undo_journal import open_journal # Deferred: not needed to show the window
+            self._undo_journal = open_journal()
+        return self._undo_journal
+    
+    @undo_journal.setter
+    def undo_journal(self, journal):
+        self._undo_journal = journal
+    
+    def load_undo_state(self):
+        if self.undo_journal is not None:
+            self.update_pending_status()
     
     def setup_ui(self):
         # Main widget and layout
@@ -165,6 +243,35 @@ class MainWindow(QMainWindow):
         # Spacer to push button to the right
         header_layout.addStretch(1)
         
+        # Pending changes: count plus review / commit / discard
+        self.pending_label = QLabel()
+        self.pending_label.setStyleSheet("font-size: 14px; color: #555; margin-right: 8px;")
+        header_layout.addWidget(self.pending_label)
+        
+        self.review_btn = QPushButton("Review")
+        self.review_btn.clicked.connect(self.review_changes)
+        header_layout.addWidget(self.review_btn)
+        
+        self.commit_btn = QPushButton("Commit Changes")
+        self.commit_btn.clicked.connect(self.commit_changes)
+        header_layout.addWidget(self.commit_btn)
+        
+        self.discard_btn = QPushButton("Discard")
+        self.discard_btn.clicked.connect(self.discard_changes)
+        header_layout.addWidget(self.discard_btn)
+        
+        # Undo: click undoes the last commit, the arrow lists older ones to undo back to
+        self.undo_btn = QToolButton()
+        self.undo_btn.setText("Undo")
+        self.undo_btn.setToolTip("Undo the last commit (the arrow undoes several)")
+        self.undo_btn.setPopupMode(QToolButton.ToolButtonPopupMode.MenuButtonPopup)
+        self.undo_btn.setStyleSheet("QToolButton { background-color: #4a90e2; color: white; border: none; padding: 8px 24px 8px 16px; border-radius: 4px; font-weight: bold; } QToolButton:hover { background-color: #357abd; }")
+        self.undo_menu = QMenu(self.undo_btn)
+        self.undo_menu.aboutToShow.connect(self.populate_undo_menu)
+        self.undo_btn.setMenu(self.undo_menu)
+        self.undo_btn.clicked.connect(lambda: self.undo_operations(1))
+        header_layout.addWidget(self.undo_btn)
+        
         # Folder selection button with icon
         self.folder_btn = QPushButton("Select Folder")
         self.folder_btn.setMinimumWidth(150)
@@ -181,7 +288,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(separator)
         
         # Tab widget
-        tab_widget = QTabWidget()
+        self.tab_widget = tab_widget = QTabWidget()
         
         # File list tab
         file_list_tab = QWidget()
@@ -201,6 +308,17 @@ class MainWindow(QMainWindow):
         file_list_label = QLabel("MP3 Files")
         file_list_label.setStyleSheet("font-size: 18px; font-weight: bold; color: #222; background: #e6e9ef; padding: 6px 12px; border-radius: 4px;")
         file_list_header_layout.addWidget(file_list_label)
+        file_list_header_layout.addStretch(1)
+        
+        self.duplicates_btn = QPushButton("Find Duplicates")
+        self.duplicates_btn.setToolTip("Find loaded files holding the same recording, whatever their names and tags")
+        self.duplicates_btn.clicked.connect(self.find_duplicates)
+        file_list_header_layout.addWidget(self.duplicates_btn)
+        
+        self.watch_checkbox = QCheckBox("Watch for changes")
+        self.watch_checkbox.setToolTip("Pick up files added, edited, renamed or deleted by other programs")
+        self.watch_checkbox.toggled.connect(self.set_watching)
+        file_list_header_layout.addWidget(self.watch_checkbox)
         
         left_layout.addWidget(file_list_header)
         
@@ -222,12 +340,37 @@ class MainWindow(QMainWindow):
         left_layout.addWidget(self.drop_zone)
         
         # File list
-        self.file_list = QListWidget()
+        # Model/view table: only visible rows are painted, no widget per track
+        self.file_model = TrackTableModel(self)
+        self.file_model.set_files(self.mp3_files)
+        self.file_list = QTableView()
+        self.file_list.setModel(self.file_model)
+        self.file_list.setItemDelegate(TrackDelegate(self.file_list))
         self.file_list.setAcceptDrops(True)
         self.file_list.dragEnterEvent = self.dragEnterEvent
+        self.file_list.dragMoveEvent = self.dragEnterEvent
         self.file_list.dropEvent = self.dropEvent
+        self.file_list.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.file_list.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.file_list.setAlternatingRowColors(True)
+        self.file_list.setShowGrid(False)
+        self.file_list.setWordWrap(False)
+        self.file_list.verticalHeader().hide()
+        # Fixed row heights let the view map scroll offsets to rows without measuring any
+        self.file_list.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.file_list.verticalHeader().setDefaultSectionSize(36)
+        self.file_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        # Title takes the spare width; the audio columns after it only need a few characters
+        self.file_list.horizontalHeader().setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
+        self.file_list.horizontalHeader().resizeSection(0, 260)
+        for column in (4, 5, 6):
+            self.file_list.horizontalHeader().resizeSection(column, 80)
         left_layout.addWidget(self.file_list)
         
+        # Delete removes the selected files from the list (files on disk are untouched)
+        remove_shortcut = QShortcut(QKeySequence(QKeySequence.StandardKey.Delete), self.file_list)
+        remove_shortcut.activated.connect(self.remove_selected_files)
+        
         # Right panel for metadata editing
         right_panel = QWidget()
         right_layout = QVBoxLayout(right_panel)
@@ -275,10 +418,16 @@ class MainWindow(QMainWindow):
         metadata_layout.addLayout(genre_layout)
         
         # Apply button
-        apply_btn = QPushButton("Apply Changes")
-        apply_btn.setMinimumHeight(40)
-        apply_btn.clicked.connect(self.apply_changes)
-        metadata_layout.addWidget(apply_btn)
+        self.apply_btn = QPushButton("Apply Changes")
+        self.apply_btn.setMinimumHeight(40)
+        self.apply_btn.clicked.connect(self.apply_changes)
+        metadata_layout.addWidget(self.apply_btn)
+        
+        # Reserve tag headroom up front so later edits don't rewrite whole files
+        self.normalize_btn = QPushButton("Normalize Padding")
+        self.normalize_btn.setToolTip("Rewrite the selected files once with standard tag padding")
+        self.normalize_btn.clicked.connect(self.normalize_selected_padding)
+        metadata_layout.addWidget(self.normalize_btn)
         
         right_layout.addWidget(metadata_group)
         right_layout.addStretch()
@@ -287,16 +436,73 @@ class MainWindow(QMainWindow):
         file_list_layout.addWidget(left_panel, 1)
         file_list_layout.addWidget(right_panel, 1)
         
-        # Album view tab
-        self.album_view = AlbumView()
-        self.file_renamer = FileRenamer()
+        # Album view and renamer tabs are built on first activation (see build_tab)
+        self.album_view = None
+        self.file_renamer = None
         
         # Add tabs
         tab_widget.addTab(file_list_tab, "File List")
-        tab_widget.addTab(self.album_view, "Album View")
-        tab_widget.addTab(self.file_renamer, "File Renamer")
+        for name in ("Album View", "File Renamer"):
+            placeholder = QWidget()
+            QVBoxLayout(placeholder).setContentsMargins(0, 0, 0, 0)
+            tab_widget.addTab(placeholder, name)
+        tab_widget.currentChanged.connect(self.build_tab)
         
         layout.addWidget(tab_widget)
+        
+        # Scan progress (shown in the status bar while a folder is being loaded)
+        self.scan_progress = QProgressBar()
+        self.scan_progress.setMaximumWidth(240)
+        self.scan_progress.setFormat("%v / %m")
+        self.scan_progress.hide()
+        self.statusBar().addPermanentWidget(self.scan_progress)
+        
+        self.cancel_scan_btn = QPushButton("Cancel")
+        self.cancel_scan_btn.clicked.connect(self.cancel_scan)
+        self.cancel_scan_btn.hide()
+        self.statusBar().addPermanentWidget(self.cancel_scan_btn)
+        
+        # Write progress (shown while Commit Changes saves files in the background)
+        self.write_progress = QProgressBar()
+        self.write_progress.setMaximumWidth(240)
+        self.write_progress.setFormat("Saving %v / %m")
+        self.write_progress.hide()
+        self.statusBar().addPermanentWidget(self.write_progress)
+        
+        self.cancel_write_btn = QPushButton("Stop Saving")
+        self.cancel_write_btn.clicked.connect(self.cancel_write)
+        self.cancel_write_btn.hide()
+        self.statusBar().addPermanentWidget(self.cancel_write_btn)
+        
+        self.stats_label = QLabel()
+        self.stats_label.setStyleSheet("color: #555; margin-left: 8px;")
+        self.statusBar().addPermanentWidget(self.stats_label)
+        
+        self.save_stats_btn = QPushButton("Save Stats")
+        self.save_stats_btn.setToolTip("Append the timings and counters to " + default_log_path())
+        self.save_stats_btn.clicked.connect(self.save_stats)
+        self.statusBar().addPermanentWidget(self.save_stats_btn)
+        
+        self.update_pending_status()
+    
+    def build_tab(self, index):
+        """Create the Album View or File Renamer the first time its tab is shown."""
+        with profiler.span('build tab'), profile_operation('build-tab'):
+            self._build_tab(index, self.tab_widget.widget(index))
+    
+    def _build_tab(self, index, placeholder):
+        if index == 1 and self.album_view is None:
+            from album_view import AlbumView # Deferred: only needed once the tab is opened
+            self.album_view = AlbumView()
+            self.album_view.track_order_accepted.connect(self.stage_track_numbers)
+            self.album_view.load_albums(self.mp3_files)
+            placeholder.layout().addWidget(self.album_view)
+        elif index == 2 and self.file_renamer is None:
+            from file_renamer import FileRenamer
+            self.file_renamer = FileRenamer()
+            self.file_renamer.renames_staged.connect(self.stage_renames)
+            self.file_renamer.load_files(self.mp3_files)
+            placeholder.layout().addWidget(self.file_renamer)
     
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
@@ -335,9 +541,13 @@ class MainWindow(QMainWindow):
     
     def dropEvent(self, event):
         files = [url.toLocalFile() for url in event.mimeData().urls()]
-        for file_path in files:
-            if file_path.lower().endswith('.mp3'):
-                self.add_mp3_file(file_path)
+        self.watch_roots.extend(path for path in files if os.path.isdir(path))
+        if self.watch_checkbox.isChecked():
+            for folder in files:
+                if os.path.isdir(folder):
+                    self.folder_watcher.watch_folder(folder, self.scan_max_depth, self.scan_exclude)
+        # Dropped folders are walked lazily by the scan worker, like Select Folder
+        self.add_mp3_files(iter_mp3_paths(files, **self.scan_options()))
         # Remove highlight from drop zone
         if hasattr(self, 'drop_zone'):
             self.drop_zone.setStyleSheet('''
@@ -353,33 +563,158 @@ class MainWindow(QMainWindow):
             ''')
     
     def add_mp3_file(self, file_path):
-        # Check for duplicates before adding
-        for existing_file in self.mp3_files:
-            if existing_file.path == file_path:
-                msg_box = QMessageBox(self) # Create a QMessageBox instance
-                msg_box.setIcon(QMessageBox.Icon.Warning)
-                msg_box.setWindowTitle("Duplicate File")
-                msg_box.setText(f"File with path:\n{file_path}\nis already loaded.")
-                # Apply stylesheet for white mode
-                msg_box.setStyleSheet("QMessageBox { background-color: white; color: black; } QLabel { color: black; } QPushButton { background-color: #4a90e2; color: white; border: none; padding: 5px 10px; border-radius: 3px; }")
-                msg_box.exec() # Use exec() to show the dialog
-                return # Stop adding the file if it's a duplicate
-                
-        mp3_file = MP3File(file_path)
-        self.mp3_files.append(mp3_file)
-        
-        # Create list item with checkbox
-        item = QListWidgetItem()
-        checkbox = QCheckBox(os.path.basename(file_path))
-        checkbox.setChecked(True)
-        checkbox.setStyleSheet('color: #000; font-size: 16px; font-weight: 500;')
-        self.file_list.addItem(item)
-        self.file_list.setItemWidget(item, checkbox)
-        
-        # Update album view
-        self.album_view.load_albums(self.mp3_files)
+        self.add_mp3_files([file_path])
+    
+    def add_mp3_files(self, paths):
+        """Bulk entry point: parse paths in the background and refresh the views once at the end."""
+        if self.scan_worker is not None:
+            self.pending_scans.append(paths)
+            return
+        self.start_scan(paths)
+    
+    def schedule_view_refresh(self):
+        self.refresh_timer.start(0)
+    
+    def refresh_views(self):
+        self.refresh_timer.stop()
+        # The album view is kept up to date incrementally; only the renamer is rebuilt
         # Update file renamer view
-        self.file_renamer.load_files(self.mp3_files)
+        if self.file_renamer is not None:
+            with profiler.span('renamer rebuild'):
+                self.file_renamer.load_files(self.mp3_files)
+    
+    def update_stats_label(self):
+        counters = profiler.counters
+        scan_seconds = profiler.seconds('scan')
+        if self.scan_started is not None:
+            scan_seconds += time.perf_counter() - self.scan_started
+        rate = counters.get('files loaded', 0) / scan_seconds if scan_seconds else 0
+        errors = sum(counters.get(name, 0) for name in ('parse errors', 'write errors', 'unreadable folders'))
+        self.stats_label.setText(
+            f"{rate:,.0f} files/s | {counters.get('bytes read', 0) / 1e6:.1f} MB read | "
+            f"{counters.get('bytes written', 0) / 1e6:.1f} MB written | {errors} errors")
+    
+    def save_stats(self, path=None):
+        path = path or default_log_path()
+        try:
+            profiler.dump(path, files=len(self.mp3_files))
+        except OSError as e:
+            self.statusBar().showMessage(f"Could not save stats: {e}")
+            return
+        self.statusBar().showMessage(f"Stats appended to {path}.")
+    
+    def append_mp3_files(self, mp3_files, keys=None):
+        """Add already-parsed files to the list without rebuilding the other views.
+
+        keys are the files' path_key, when the scan worker has already resolved them.
+        """
+        added = []
+        reloaded = []
+        for mp3_file, key in zip(mp3_files, keys or map(path_key, (mp3_file.path for mp3_file in mp3_files))):
+            # Check for duplicates before adding (collected and reported once per scan)
+            if key in self.path_index:
+                if key in self.reloading:
+                    self.reloading.discard(key)
+                    reloaded.append((self.path_index[key], mp3_file))
+                else:
+                    self.scan_duplicates.append(mp3_file.path)
+                continue
+            self.path_index[key] = mp3_file
+            added.append(mp3_file)
+        self.file_model.append_files(added)
+        if self.album_view is not None:
+            self.album_view.add_files(added)
+        if self.file_renamer is not None and added:
+            self.file_renamer.add_files(added)
+        if reloaded:
+            self.apply_reloads(reloaded)
+        return added
+    
+    def apply_reloads(self, reloaded):
+        """Copy freshly parsed (loaded file, parsed file) pairs onto the loaded files."""
+        retagged = []
+        for mp3_file, parsed in reloaded:
+            mp3_file.metadata.update(mp3_file.take_audio(parsed.record(), parsed.error))
+            retagged.append(mp3_file)
+        reloaded_ids = {id(mp3_file) for mp3_file in retagged}
+        rows = [row for row, mp3_file in enumerate(self.mp3_files) if id(mp3_file) in reloaded_ids]
+        self.file_model.refresh_rows(rows)
+        if self.album_view is not None:
+            self.album_view.retag_files(retagged)
+        if self.file_renamer is not None:
+            self.file_renamer.refresh_rows(rows)
+        # Staged edits that now match the file drop out
+        for mp3_file in retagged:
+            self.pending_changes.settle(mp3_file)
+        self.update_pending_status()
+    
+    def remove_mp3_files(self, mp3_files):
+        """Drop files from the loaded set, keeping the file list and path index in sync."""
+        removed = {id(mp3_file) for mp3_file in mp3_files}
+        rows = [row for row, mp3_file in enumerate(self.mp3_files) if id(mp3_file) in removed]
+        for row in rows:
+            self.path_index.pop(path_key(self.mp3_files[row].path), None)
+        self.file_model.remove_rows(rows)
+        if self.album_view is not None:
+            self.album_view.remove_files(mp3_files)
+        if self.file_renamer is not None:
+            self.file_renamer.remove_rows(rows)
+        if self.folder_watcher is not None:
+            self.folder_watcher.forget([mp3_file.path for mp3_file in mp3_files])
+        self.pending_changes.forget(mp3_files)
+        self.update_pending_status()
+    
+    def remove_selected_files(self):
+        rows = [index.row() for index in self.file_list.selectionModel().selectedRows()]
+        self.remove_mp3_files([self.mp3_files[row] for row in rows])
+    
+    def on_files_renamed(self, renames):
+        """Re-key renamed files in the path index and refresh their list labels."""
+        if self.metadata_cache:
+            self.metadata_cache.rename([(old_path, mp3_file.path) for old_path, mp3_file in renames])
+        renamed = {id(mp3_file) for _, mp3_file in renames}
+        # All old keys go first: in a swap one file's old path is another's new one
+        for old_path, _ in renames:
+            self.path_index.pop(path_key(old_path), None)
+        for _, mp3_file in renames:
+            self.path_index[path_key(mp3_file.path)] = mp3_file
+        rows = [row for row, mp3_file in enumerate(self.mp3_files) if id(mp3_file) in renamed]
+        self.file_model.refresh_rows(rows)
+        if self.album_view is not None:
+            self.album_view.refresh_files([mp3_file for _, mp3_file in renames])
+        if self.file_renamer is not None:
+            self.file_renamer.refresh_rows(rows)
+    
+    def invalidate_cached_metadata(self, paths):
+        """Drop cache rows for files whose tags were just written."""
+        if self.metadata_cache:
+            self.metadata_cache.invalidate(paths)
+    
+    def show_report(self, title, text, lines, icon=QMessageBox.Icon.Warning):
+        """Show a non-modal message with one line per affected file in the details."""
+        msg_box = QMessageBox(self) # Create a QMessageBox instance
+        msg_box.setIcon(icon)
+        msg_box.setWindowTitle(title)
+        msg_box.setText(text)
+        msg_box.setDetailedText("\n".join(lines))
+        # Apply stylesheet for white mode
+        msg_box.setStyleSheet("QMessageBox { background-color: white; color: black; } QLabel { color: black; } QPushButton { background-color: #4a90e2; color: white; border: none; padding: 5px 10px; border-radius: 3px; }")
+        msg_box.setModal(False)
+        msg_box.show() # Non-modal so loading and editing can continue
+        return msg_box
+    
+    def show_duplicate_summary(self):
+        duplicates, self.scan_duplicates = self.scan_duplicates, []
+        if duplicates:
+            self.duplicate_box = self.show_report(
+                "Duplicate Files", f"{len(duplicates)} file(s) were already loaded and have been skipped.", duplicates)
+    
+    def show_error_summary(self):
+        errors, self.scan_errors = self.scan_errors, []
+        if errors:
+            self.error_box = self.show_report(
+                "Unreadable Tags", f"The tags of {len(errors)} file(s) could not be read.",
+                [f"{path}: {error}" for path, error in errors])
     
     def select_folder(self):
         folder = QFileDialog.getExistingDirectory(self, "Select MP3 Folder")
@@ -387,49 +722,544 @@ class MainWindow(QMainWindow):
             self.load_mp3_files(folder)
     
     def load_mp3_files(self, folder):
+        self.cancel_scan()
         self.mp3_files = []
-        self.file_list.clear()
+        self.path_index = {}
+        self.file_model.set_files(self.mp3_files)
+        if self.folder_watcher is not None:
+            self.folder_watcher.clear()
+        self.watch_roots = [folder]
+        if self.watch_checkbox.isChecked():
+            self.folder_watcher.watch_folder(folder, self.scan_max_depth, self.scan_exclude)
+        if self.album_view is not None:
+            self.album_view.load_albums(self.mp3_files)
+        self.pending_changes.discard() # Staged edits belong to the files just unloaded
+        self.update_pending_status()
+        self.schedule_view_refresh()
+        
+        self.add_mp3_files(walk_mp3_files(folder, **self.scan_options()))
+    
+    def scan_options(self):
+        return {'max_depth': self.scan_max_depth, 'include': self.scan_include, 'exclude': self.scan_exclude}
+    
+    def accepts_new_file(self, path):
+        return matches_file(path, self.scan_include, self.scan_exclude)
+    
+    def set_watching(self, enabled):
+        if self.folder_watcher is None:
+            from folder_watcher import FolderWatcher # Deferred: watching is off by default
+            self.folder_watcher = FolderWatcher(accept=self.accepts_new_file, parent=self)
+            self.folder_watcher.changed.connect(self.on_folder_changes)
+        self.folder_watcher.clear()
+        if enabled:
+            self.folder_watcher.watch_files([mp3_file.path for mp3_file in self.mp3_files])
+            for folder in self.watch_roots:
+                self.folder_watcher.watch_folder(folder, self.scan_max_depth, self.scan_exclude)
+    
+    def on_folder_changes(self, created, modified, deleted, renames):
+        """Apply what other programs changed on disk: only the affected files are re-read."""
+        lookup = self.path_index.get
+        gone = [mp3_file for mp3_file in map(lookup, map(path_key, deleted)) if mp3_file is not None]
+        if gone:
+            self.invalidate_cached_metadata([mp3_file.path for mp3_file in gone])
+            self.remove_mp3_files(gone)
         
-        for file in os.listdir(folder):
-            if file.lower().endswith('.mp3'):
-                file_path = os.path.join(folder, file)
-                self.add_mp3_file(file_path)
+        moved = []
+        for old_path, new_path in renames:
+            mp3_file = lookup(path_key(old_path))
+            if mp3_file is None:
+                created.append(new_path) # Renamed from something that wasn't loaded
+                continue
+            mp3_file.path = new_path
+            moved.append((old_path, mp3_file))
+        if moved:
+            self.on_files_renamed(moved)
         
-        # Update album view
-        self.album_view.load_albums(self.mp3_files)
-        # Update file renamer view
-        self.file_renamer.load_files(self.mp3_files)
+        retagged = [mp3_file for mp3_file in map(lookup, map(path_key, modified)) if mp3_file is not None]
+        added = [path for path in created if path_key(path) not in self.path_index]
+        retagged += [lookup(path_key(path)) for path in created if path_key(path) in self.path_index]
+        # A reached rename target drops out of the staged changes
+        for _, mp3_file in moved:
+            self.pending_changes.settle(mp3_file)
+        if retagged:
+            # Re-read on the scan worker like new files; apply_reloads updates them in place
+            self.invalidate_cached_metadata([mp3_file.path for mp3_file in retagged])
+            self.reloading.update(path_key(mp3_file.path) for mp3_file in retagged)
+        if added or retagged:
+            self.add_mp3_files(added + [mp3_file.path for mp3_file in retagged])
+        self.update_pending_status()
+        self.statusBar().showMessage(
+            f"Changes on disk: {len(added)} added, {len(retagged)} modified, {len(gone)} removed, {len(moved)} renamed.")
+    
+    def start_scan(self, paths):
+        """Parse paths on a background worker pool; results stream in through on_scan_batch."""
+        cache_path = self.metadata_cache.db_path if self.metadata_cache else None
+        self.scan_worker = ScanWorker(paths, cache_path=cache_path)
+        self.scan_thread = QThread(self)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_worker.batch_ready.connect(self.on_scan_batch)
+        self.scan_worker.progress.connect(self.on_scan_progress)
+        self.scan_worker.finished.connect(self.on_scan_finished)
+        self.scan_worker.finished.connect(self.scan_thread.quit)
+        self.scan_thread.finished.connect(self.scan_worker.deleteLater)
+        self.scan_thread.finished.connect(self.scan_thread.deleteLater)
+        
+        self.scan_progress.setRange(0, 0) # Busy indicator until the first count arrives
+        self.scan_progress.show()
+        self.cancel_scan_btn.show()
+        self.statusBar().showMessage("Scanning...")
+        self.scan_started = time.perf_counter()
+        self.scan_delivered = 0
+        self.scan_thread.start()
+    
+    def cancel_scan(self, wait=False):
+        self.pending_scans = []
+        self.reloading = set()
+        if self.scan_worker is None:
+            return
+        # Detach the old worker so its late batches can't leak into a new load;
+        # its thread quits and is deleted on its own once the pool has wound down
+        worker, thread = self.scan_worker, self.scan_thread
+        worker.batch_ready.disconnect(self.on_scan_batch)
+        worker.progress.disconnect(self.on_scan_progress)
+        worker.finished.disconnect(self.on_scan_finished)
+        worker.cancel()
+        if wait:
+            # Closing: the thread must not outlive the window
+            thread.quit()
+            thread.wait()
+        self.on_scan_finished(self.scan_delivered, 0, True)
+    
+    def find_duplicates(self):
+        """Compare the audio of every loaded file in the background; clicking again stops the search."""
+        if self.duplicate_worker is not None:
+            self.cancel_duplicate_search()
+            return
+        if not self.mp3_files:
+            return
+        from duplicate_worker import DuplicateWorker # Deferred: only needed once a search runs
+        self.duplicate_worker = DuplicateWorker([mp3_file.path for mp3_file in self.mp3_files])
+        self.duplicate_thread = QThread(self)
+        self.duplicate_worker.moveToThread(self.duplicate_thread)
+        self.duplicate_thread.started.connect(self.duplicate_worker.run)
+        self.duplicate_worker.progress.connect(self.on_duplicate_progress)
+        self.duplicate_worker.finished.connect(self.on_duplicates_found)
+        self.duplicate_worker.finished.connect(self.duplicate_thread.quit)
+        self.duplicate_thread.finished.connect(self.duplicate_worker.deleteLater)
+        self.duplicate_thread.finished.connect(self.duplicate_thread.deleteLater)
+        self.duplicates_btn.setText("Stop Search")
+        self.statusBar().showMessage(f"Comparing the audio of {len(self.mp3_files)} files...")
+        self.duplicate_thread.start()
+    
+    def cancel_duplicate_search(self, wait=False):
+        if self.duplicate_worker is None:
+            return
+        self.duplicate_worker.cancel()
+        if wait:
+            # Closing: let the pool wind down before the window goes
+            self.duplicate_thread.quit()
+            self.duplicate_thread.wait()
+    
+    def on_duplicate_progress(self, stage, done, total):
+        self.statusBar().showMessage(f"Finding duplicates: {stage.lower()} {done} / {total} files")
+    
+    def on_duplicates_found(self, groups, errors, cancelled):
+        self.duplicate_worker = None
+        self.duplicate_thread = None
+        self.duplicates_btn.setText("Find Duplicates")
+        if cancelled:
+            self.statusBar().showMessage("Duplicate search stopped.")
+            return
+        # Files may have been renamed or unloaded while the search ran
+        by_path = {mp3_file.path: mp3_file for mp3_file in self.mp3_files}
+        groups = [[by_path[path] for path in group if path in by_path] for group in groups]
+        groups = [group for group in groups if len(group) > 1]
+        copies = sum(len(group) - 1 for group in groups)
+        self.statusBar().showMessage(f"Found {len(groups)} recording(s) with {copies} extra copies"
+                                     + (f", {len(errors)} file(s) could not be read." if errors else "."))
+        if errors:
+            self.error_box = self.show_report(
+                "Unreadable Files", f"The audio of {len(errors)} file(s) could not be read.",
+                [f"{path}: {error}" for path, error in errors])
+        if groups:
+            from duplicate_report import DuplicateReport
+            self.duplicate_report = DuplicateReport(groups, self)
+            self.duplicate_report.deactivate_requested.connect(self.deactivate_files)
+            self.duplicate_report.remove_requested.connect(self.remove_mp3_files)
+            self.duplicate_report.show() # Non-modal, like the other reports
+    
+    def deactivate_files(self, mp3_files):
+        """Untick files in the file list so edits skip them."""
+        for mp3_file in mp3_files:
+            mp3_file.active = False
+        deactivated = {id(mp3_file) for mp3_file in mp3_files}
+        self.file_model.refresh_rows([row for row, mp3_file in enumerate(self.mp3_files) if id(mp3_file) in deactivated])
+    
+    def on_scan_batch(self, mp3_files, keys):
+        self.scan_delivered += len(mp3_files)
+        added = self.append_mp3_files(mp3_files, keys)
+        profiler.count('files loaded', len(added))
+        if self.watch_checkbox.isChecked():
+            self.folder_watcher.watch_files([mp3_file.path for mp3_file in added])
+        for mp3_file in added:
+            if mp3_file.error:
+                self.scan_errors.append((mp3_file.path, mp3_file.error))
+    
+    def on_scan_progress(self, parsed, found):
+        self.scan_progress.setRange(0, found)
+        self.scan_progress.setValue(parsed)
+    
+    def on_scan_finished(self, loaded, failed, cancelled):
+        if self.scan_started is not None:
+            profiler.record('scan', time.perf_counter() - self.scan_started)
+            self.scan_started = None
+        self.update_stats_label()
+        self.scan_worker = None
+        self.scan_thread = None
+        self.scan_progress.hide()
+        self.cancel_scan_btn.hide()
+        
+        summary = f"Loaded {loaded - len(self.scan_duplicates)} files"
+        if self.scan_duplicates:
+            summary += f", {len(self.scan_duplicates)} duplicates skipped"
+        if self.scan_errors:
+            summary += f", {len(self.scan_errors)} with unreadable tags"
+        if failed:
+            summary += f", {failed} failed"
+        if cancelled:
+            summary += " (cancelled)"
+        self.statusBar().showMessage(summary + ".")
+        self.show_duplicate_summary()
+        self.show_error_summary()
+        
+        if self.pending_scans and not cancelled:
+            self.start_scan(self.pending_scans.pop(0))
+    
+    def closeEvent(self, event):
+        if self.pending_changes and self.write_worker is None:
+            answer = QMessageBox.question(
+                self, "Uncommitted Changes",
+                f"{len(self.pending_changes)} file(s) have changes that were not committed. Quit anyway?")
+            if answer != QMessageBox.StandardButton.Yes:
+                event.ignore()
+                return
+        self.cancel_scan(wait=True)
+        self.cancel_duplicate_search(wait=True)
+        self.cancel_write(wait=True)
+        if self.metadata_cache:
+            self.metadata_cache.close()
+        if os.environ.get('MP3_MANAGER_STATS_LOG'):
+            self.save_stats(os.environ['MP3_MANAGER_STATS_LOG'])
+        super().closeEvent(event)
     
     def apply_changes(self):
-        for i in range(self.file_list.count()):
-            item = self.file_list.item(i)
-            checkbox = self.file_list.itemWidget(item)
-            
-            if checkbox.isChecked():
-                mp3_file = self.mp3_files[i]
-                try:
-                    audio = EasyID3(mp3_file.path)
-                    
-                    # Only update fields that have values
-                    if self.artist_input.text().strip():
-                        audio['artist'] = self.artist_input.text()
-                    if self.album_input.text().strip():
-                        audio['album'] = self.album_input.text()
-                    if self.year_input.text().strip():
-                        audio['date'] = self.year_input.text()
-                    if self.genre_input.text().strip():
-                        audio['genre'] = self.genre_input.text()
-                    
-                    audio.save()
-                except Exception as e:
-                    # print(f"Error saving {mp3_file.path}: {str(e)}")
-                    pass # Suppress error print for now
-        
-        # Refresh album view after changes
-        self.album_view.load_albums(self.mp3_files)
+        # Only update fields that have values
+        fields = edit_fields({'artist': self.artist_input.text(), 'album': self.album_input.text(),
+                              'year': self.year_input.text(), 'genre': self.genre_input.text()})
+        files = self.file_model.active_files()
+        if not fields or not files:
+            return
+        for mp3_file in files:
+            self.pending_changes.stage_tags(mp3_file, fields)
+        self.update_pending_status()
+    
+    def stage_track_numbers(self, track_numbers, unchanged):
+        for mp3_file, tracknumber in track_numbers:
+            self.pending_changes.stage_tags(mp3_file, {'tracknumber': tracknumber})
+        # A number staged by an earlier Accept may no longer be needed
+        self.pending_changes.unstage(unchanged, 'tracknumber')
+        self.update_pending_status()
+        self.statusBar().showMessage(
+            f"Staged {len(track_numbers)} track numbers, {len(unchanged)} unchanged files skipped.")
+    
+    def stage_renames(self, renames):
+        for mp3_file, new_path in renames:
+            self.pending_changes.stage_rename(mp3_file, new_path)
+        self.update_pending_status()
+    
+    def update_pending_status(self):
+        count = len(self.pending_changes)
+        self.pending_label.setText(f"{count} file(s) with pending changes" if count else "No pending changes")
+        idle = self.write_worker is None
+        self.review_btn.setEnabled(count > 0)
+        self.commit_btn.setEnabled(count > 0 and idle)
+        self.discard_btn.setEnabled(count > 0 and idle)
+        journal = None if self._undo_journal is UNOPENED else self._undo_journal
+        self.undo_btn.setEnabled(idle and journal is not None and bool(journal.operations()))
+    
+    def review_changes(self):
+        self.review_box = self.show_report(
+            "Pending Changes", f"{len(self.pending_changes)} file(s) will be written on commit.",
+            self.pending_changes.diff(), icon=QMessageBox.Icon.Information)
+    
+    def discard_changes(self):
+        self.pending_changes.discard()
+        self.update_pending_status()
+    
+    def commit_changes(self):
+        """Write every pending change: one tag save per file, then its rename."""
+        if self.write_worker is not None or not self.pending_changes:
+            return
+        changes = self.pending_changes.entries()
+        # The values being overwritten are journaled once the commit is done, so it can be undone
+        self.start_commit([(change.mp3_file.path, change) for change in changes],
+                          [{field: change.mp3_file.metadata.get(field, '') for field in change.fields}
+                           for change in changes])
+    
+    def populate_undo_menu(self):
+        self.undo_menu.clear()
+        operations = self.undo_journal.operations()[-UNDO_MENU_SIZE:] if self.undo_journal else []
+        if not operations:
+            self.undo_menu.addAction("Nothing to undo").setEnabled(False)
+            return
+        self.undo_menu.addAction("Undo back to and including:").setEnabled(False)
+        for count, operation in enumerate(reversed(operations), 1):
+            self.undo_menu.addAction(operation.describe()).triggered.connect(partial(self.undo_operations, count))
+    
+    def undo_operations(self, count):
+        """Put back what the last count commits overwrote, as one parallel write."""
+        if self.write_worker is not None or self.undo_journal is None:
+            return
+        operations = self.undo_journal.operations()[-count:]
+        if not operations:
+            return
+        try:
+            restores = self.undo_journal.restores(operations)
+        except (OSError, ValueError) as e:
+            self.statusBar().showMessage(f"Undo journal could not be read: {e}")
+            return
+        changes = []
+        for path, fields, original in restores:
+            # Files that aren't loaded (any more) are restored on disk only
+            change = PendingChange(self.path_index.get(path_key(path)))
+            change.fields = fields
+            change.new_path = original
+            changes.append((path, change))
+        self.start_commit(changes, undoing=operations)
+    
+    def start_commit(self, changes, previous=None, undoing=None):
+        """Write (path, PendingChange) pairs: tags first, renames through one RenamePlan.
+
+        previous holds, per change, the values its fields had, to journal a commit;
+        an undo passes the journal operations it reverses instead.
+        """
+        # Renames are checked against each other and the disk as a whole; conflicting ones stay pending
+        plan = RenamePlan([(path, change.new_path) for path, change in changes if change.new_path is not None])
+        targets = dict(plan.moves)
+        kept = [index for index, (path, change) in enumerate(changes) if change.fields or path in targets]
+        self.write_changes = [changes[index][1] for index in kept]
+        self.write_previous = [previous[index] for index in kept] if previous is not None else []
+        self.write_undoing = undoing
+        self.rename_plan = plan
+        if plan.conflicts:
+            left = "were not undone" if undoing else "were left pending"
+            self.conflict_box = self.show_report(
+                "Rename Conflicts", f"{len(plan.conflicts)} rename(s) {left} because they would overwrite a file.",
+                [f"{os.path.basename(source)} -> {os.path.basename(target)}: {reason}"
+                 for source, target, reason in plan.conflicts])
+        if not self.write_changes:
+            return
+        # Jobs get their own copies, edits staged while saving stay pending for the next commit
+        jobs = [(path, (dict(change.fields), targets.get(path))) for path, change in (changes[index] for index in kept)]
+        self.start_write(jobs, partial(commit_change, plan=plan), self.on_commit_finished, prepare=plan.park)
+    
+    def normalize_selected_padding(self):
+        if self.write_worker is not None:
+            return
+        files = self.file_model.active_files()
+        if files:
+            self.start_write([(mp3_file.path, None) for mp3_file in files], normalize_padding,
+                             self.on_normalize_finished)
+    
+    def start_write(self, jobs, write, on_finished, prepare=None):
+        """Run write(path, payload) for each job on the write pool; on_finished gets the WriteWorker results."""
+        self.write_paths = [path for path, _ in jobs]
+        self.write_worker = WriteWorker(jobs, max_workers=self.write_concurrency, write=write, prepare=prepare)
+        self.write_thread = QThread(self)
+        self.write_worker.moveToThread(self.write_thread)
+        self.write_thread.started.connect(self.write_worker.run)
+        self.write_worker.progress.connect(self.on_write_progress)
+        self.write_worker.finished.connect(self.on_write_finished)
+        self.write_worker.finished.connect(on_finished)
+        self.write_worker.finished.connect(self.write_thread.quit)
+        self.write_thread.finished.connect(self.write_worker.deleteLater)
+        self.write_thread.finished.connect(self.write_thread.deleteLater)
+        
+        self.write_progress.setRange(0, len(jobs))
+        self.write_progress.setValue(0)
+        self.write_progress.show()
+        self.cancel_write_btn.show()
+        self.normalize_btn.setEnabled(False)
+        self.update_pending_status()
+        # Our own saves aren't external changes; the handlers rebaseline the written files
+        if self.folder_watcher is not None:
+            self.folder_watcher.pause()
+        self.write_thread.start()
+    
+    def cancel_write(self, wait=False):
+        if self.write_worker is None:
+            return
+        self.write_worker.cancel()
+        if wait:
+            # Closing: let in-flight saves finish so no file is left half-written
+            self.write_thread.quit()
+            self.write_thread.wait()
+    
+    def on_write_progress(self, done, total):
+        self.write_progress.setRange(0, total)
+        self.write_progress.setValue(done)
+    
+    def on_write_finished(self, succeeded, failed, cancelled):
+        self.write_worker = None
+        self.write_thread = None
+        self.write_progress.hide()
+        self.cancel_write_btn.hide()
+        self.normalize_btn.setEnabled(True)
+        self.update_pending_status()
+        if self.folder_watcher is not None:
+            self.folder_watcher.resume()
+    
+    def on_normalize_finished(self, succeeded, failed, cancelled):
+        if self.folder_watcher is not None:
+            self.folder_watcher.rebaseline(self.write_paths)
+        summary = f"Normalized tag padding of {len(succeeded)} files"
+        if failed:
+            summary += f", {len(failed)} failed"
+        if cancelled:
+            summary += " (stopped)"
+        self.statusBar().showMessage(summary + ".")
+        if failed:
+            self.write_error_box = self.show_report(
+                "Save Errors", f"{len(failed)} file(s) could not be rewritten.",
+                [f"{self.write_paths[index]}: {error}" for index, error in failed])
+    
+    def journal_commit(self, previous, undoing, succeeded, failed, targets, plan):
+        """Journal what a commit overwrote, or retire the operations an undo fully reversed.
+
+        Returns False if the journal couldn't be written.
+        """
+        if self.undo_journal is None:
+            return True
+        try:
+            if undoing:
+                # Anything short of a full undo keeps the operations; undoing them again is safe
+                if len(succeeded) == len(self.write_paths) and plan.complete() and not plan.conflicts:
+                    self.undo_journal.mark_undone(undoing)
+                return True
+            entries = []
+            for index in succeeded:
+                old_path = self.write_paths[index]
+                new_path = targets.get(old_path)
+                entries.append((new_path or old_path, old_path if new_path else None, previous[index]))
+            # A failed job may have saved its tags before the rename failed; writing them back is harmless
+            entries.extend((self.write_paths[index], None, previous[index]) for index, _ in failed)
+            self.undo_journal.record(entries)
+        except OSError:
+            return False
+        return True
+    
+    def on_commit_finished(self, succeeded, failed, cancelled):
+        changes, self.write_changes = self.write_changes, []
+        previous, self.write_previous = self.write_previous, []
+        undoing, self.write_undoing = self.write_undoing, None
+        plan, self.rename_plan = self.rename_plan, None
+        # Renames are all or nothing: a plan cut short by a failure or Stop Saving is undone
+        rollback_errors = [] if plan.complete() else plan.rollback()
+        targets = dict(plan.moves) if plan.complete() else {}
+        if targets and self.watch_checkbox.isChecked():
+            # The organizer may have moved files into folders that didn't exist yet
+            self.folder_watcher.watch_files(list(targets.values()))
+        if self.folder_watcher is not None:
+            self.folder_watcher.rebaseline(self.write_paths + [target for _, target in plan.moves]
+                                           + [path for path, _ in rollback_errors])
+        journaled = self.journal_commit(previous, undoing, succeeded, failed, targets, plan)
+        
+        # Mirror the written tags and paths in memory so the views don't need to re-read the files
+        tagged, renames, stale_paths = [], [], []
+        for index in succeeded:
+            change = changes[index]
+            mp3_file, old_path = change.mp3_file, self.write_paths[index]
+            if change.fields:
+                stale_paths.append(old_path)
+            if mp3_file is None:
+                continue
+            if change.fields:
+                mp3_file.metadata.update(change.fields)
+                tagged.append(mp3_file)
+            if old_path in targets:
+                mp3_file.path = targets[old_path]
+                renames.append((old_path, mp3_file))
+        # A failed job may have saved its tags before the rename failed; trust the file
+        for index, _ in failed:
+            mp3_file = changes[index].mp3_file
+            stale_paths.append(self.write_paths[index])
+            if mp3_file is not None:
+                mp3_file.metadata.update(mp3_file.load_metadata())
+                tagged.append(mp3_file)
+        self.invalidate_cached_metadata(stale_paths)
+        for change in changes:
+            if change.mp3_file is not None:
+                self.pending_changes.settle(change.mp3_file)
+        
+        # Only the edited rows and the album groups they leave or join are touched
+        saved = {id(mp3_file) for mp3_file in tagged}
+        self.file_model.refresh_rows([row for row, mp3_file in enumerate(self.mp3_files) if id(mp3_file) in saved])
+        if self.album_view is not None:
+            self.album_view.retag_files(tagged)
+        if renames:
+            self.on_files_renamed(renames)
+        self.schedule_view_refresh()
+        self.update_pending_status()
+        
+        summary = f"{'Undid changes to' if undoing else 'Committed'} {len(succeeded)} files"
+        if failed:
+            summary += f", {len(failed)} failed"
+        if plan.moves and not targets:
+            summary += ", renames rolled back"
+        if cancelled:
+            summary += " (stopped)"
+        if not journaled:
+            summary += "; the undo journal could not be updated"
+        self.statusBar().showMessage(summary + ".")
+        if failed or rollback_errors:
+            self.write_error_box = self.show_report(
+                "Save Errors", f"{len(failed)} file(s) could not be saved; "
+                + ("undo them again to retry." if undoing else "their changes are still pending.")
+                + (f" {len(rollback_errors)} file(s) could not be renamed back." if rollback_errors else ""),
+                [f"{self.write_paths[index]}: {error}" for index, error in failed]
+                + [f"{path}: {error}" for path, error in rollback_errors])
+    
+class StartupProbe(QObject):
+    """Prints import, construction and first-paint times when MP3_MANAGER_STARTUP_TIMING is set."""
+
+    def __init__(self, window):
+        super().__init__(window)
+        self.marks = [('start', STARTUP_START)]
+        window.installEventFilter(self)
+
+    def mark(self, label, at=None):
+        self.marks.append((label, time.perf_counter() if at is None else at))
+
+    def eventFilter(self, watched, event):
+        if event.type() == QEvent.Type.Paint:
+            watched.removeEventFilter(self)
+            self.mark('first paint')
+            self.report()
+        return False
+
+    def report(self):
+        for (_, previous), (label, at) in zip(self.marks, self.marks[1:]):
+            print(f"startup: {label:<14} {(at - previous) * 1000:8.1f} ms", file=sys.stderr)
+        print(f"startup: {'total':<14} {(self.marks[-1][1] - STARTUP_START) * 1000:8.1f} ms", file=sys.stderr)
 
 if __name__ == '__main__':
+    imported = time.perf_counter()
     app = QApplication(sys.argv)
     window = MainWindow()
+    if os.environ.get('MP3_MANAGER_STARTUP_TIMING'):
+        probe = StartupProbe(window)
+        probe.mark('imports', imported)
+        probe.mark('window built')
     window.show()
     sys.exit(app.exec()) 
\ No newline at end of file
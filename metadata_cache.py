@@ -0,0 +1,107 @@
+import os
+import sys
+import sqlite3
+
+APP_NAME = 'meta-data-mp3-manager'
+FIELDS = ('artist', 'album', 'year', 'genre', 'title', 'tracknumber')
+# From the MPEG headers; added to older databases, whose rows then read as misses once
+AUDIO_COLUMNS = (('duration', 'REAL'), ('bitrate', 'INTEGER'), ('vbr', 'INTEGER'))
+COLUMNS = FIELDS + tuple(name for name, _ in AUDIO_COLUMNS)
+QUERY_CHUNK = 500 # Stay below SQLite's bound-parameter limit
+
+def default_cache_dir():
+    """Per-user cache directory, following each platform's convention."""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~\\AppData\\Local')
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser('~/Library/Caches')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, APP_NAME)
+
+def default_cache_path():
+    return os.path.join(default_cache_dir(), 'metadata.sqlite3')
+
+class MetadataCache:
+    """SQLite cache of parsed tags and audio info, valid only while a file's (size, mtime_ns) is unchanged.
+
+    A connection is bound to the thread that created it, so the scan worker and the
+    UI each open their own instance on the same database file.
+    """
+
+    def __init__(self, db_path=None):
+        self.db_path = db_path or default_cache_path()
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        self.connection = sqlite3.connect(self.db_path, timeout=10)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS tracks ('
+            'path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, '
+            + ', '.join(f'{field} TEXT' for field in FIELDS) + ')')
+        existing = {row[1] for row in self.connection.execute('PRAGMA table_info(tracks)')}
+        for name, kind in AUDIO_COLUMNS:
+            if name not in existing:
+                self.connection.execute(f'ALTER TABLE tracks ADD COLUMN {name} {kind}')
+        self.connection.commit()
+
+    def close(self):
+        self.connection.close()
+
+    def lookup_many(self, stats):
+        """Return {path: metadata} for every (path, size, mtime_ns) whose row is still fresh."""
+        wanted = {path: (size, mtime_ns) for path, size, mtime_ns in stats}
+        paths = list(wanted)
+        found = {}
+        for start in range(0, len(paths), QUERY_CHUNK):
+            chunk = paths[start:start + QUERY_CHUNK]
+            rows = self.connection.execute(
+                f'SELECT path, size, mtime_ns, {", ".join(COLUMNS)} FROM tracks '
+                f'WHERE path IN ({", ".join("?" * len(chunk))})', chunk)
+            for path, size, mtime_ns, *values in rows:
+                # Rows written before audio info was cached have no duration
+                if wanted[path] == (size, mtime_ns) and values[len(FIELDS)] is not None:
+                    found[path] = {field: value for field, value in zip(COLUMNS, values) if value is not None}
+        return found
+
+    def store_many(self, records):
+        """Insert or replace rows from (path, size, mtime_ns, metadata) tuples."""
+        self.connection.executemany(
+            f'INSERT OR REPLACE INTO tracks (path, size, mtime_ns, {", ".join(COLUMNS)}) '
+            f'VALUES ({", ".join("?" * (len(COLUMNS) + 3))})',
+            [(path, size, mtime_ns, *(metadata.get(field) for field in COLUMNS))
+             for path, size, mtime_ns, metadata in records])
+        self.connection.commit()
+
+    def invalidate(self, paths):
+        self.connection.executemany('DELETE FROM tracks WHERE path = ?', [(path,) for path in paths])
+        self.connection.commit()
+
+    def rename(self, renames):
+        """Move rows for (old_path, new_path) pairs; a rename leaves size and mtime untouched.
+
+        All old rows are read before any is written, so chains (1 -> 2, 2 -> 3) and swaps
+        move each row exactly once.
+        """
+        targets = dict(renames)
+        olds = list(targets)
+        rows = []
+        for start in range(0, len(olds), QUERY_CHUNK):
+            chunk = olds[start:start + QUERY_CHUNK]
+            rows.extend(self.connection.execute(
+                f'SELECT path, size, mtime_ns, {", ".join(COLUMNS)} FROM tracks '
+                f'WHERE path IN ({", ".join("?" * len(chunk))})', chunk))
+        with self.connection:
+            self.connection.executemany('DELETE FROM tracks WHERE path = ?',
+                                        [(path,) for path in {*targets, *targets.values()}])
+            self.connection.executemany(
+                f'INSERT INTO tracks (path, size, mtime_ns, {", ".join(COLUMNS)}) '
+                f'VALUES ({", ".join("?" * (len(COLUMNS) + 3))})',
+                [(targets[path], *values) for path, *values in rows])
+
+def open_cache(db_path=None):
+    """Open the cache, or return None when it can't be created (read-only home, etc.)."""
+    try:
+        return MetadataCache(db_path)
+    except (OSError, sqlite3.Error):
+        return None
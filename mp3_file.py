@@ -0,0 +1,121 @@
+import os
+from id3_reader import read_id3
+from track_store import TrackMetadata, AUDIO_FIELDS, default_store
+from mpeg_info import read_audio_info
+from profiling import profiler
+
+def read_metadata(path):
+    """Parse a file's tags into the app's metadata dict, plus the AUDIO_FIELDS from its
+    MPEG headers; returns (metadata, error)."""
+    metadata, error = read_tags(path)
+    metadata.update(zip(AUDIO_FIELDS, read_audio_info(path)))
+    return metadata, error
+
+def read_tags(path):
+    """The tag fields alone; returns (metadata, error)."""
+    with profiler.span('tag parse'):
+        try:
+            tags = read_id3(path)
+            error = None
+        except Exception as e:
+            tags = None
+            error = str(e) or type(e).__name__
+    profiler.count('files parsed')
+    if error is not None:
+        profiler.count('parse errors')
+    if tags is None:
+        return {
+            'artist': '',
+            'album': '',
+            'year': '',
+            'genre': '',
+            'title': os.path.basename(path)
+        }, error
+    return {
+        'artist': tags.get('artist', ''),
+        'album': tags.get('album', ''),
+        'year': tags.get('date', ''),
+        'genre': tags.get('genre', ''),
+        'title': tags.get('title', ''),
+        'tracknumber': tags.get('tracknumber', '')
+    }, error
+
+class MP3File:
+    """Light handle on one row of a TrackStore; the row is released when the handle dies."""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, path, metadata=None, error=None, store=None):
+        self.store = store if store is not None else default_store
+        # Metadata may come from the cache, in which case the file isn't parsed at all
+        if metadata is None:
+            metadata, error = read_metadata(path)
+        self.row = self.store.add(path, metadata, error)
+
+    def __del__(self):
+        try:
+            self.store.release(self.row)
+        except AttributeError:
+            pass # __init__ failed before a row was allocated
+
+    def __reduce__(self):
+        # Worker processes send plain values; the receiving process stores them itself
+        return (MP3File, (self.path, self.record(), self.error))
+
+    @property
+    def path(self):
+        return self.store.paths[self.row]
+
+    @path.setter
+    def path(self, path):
+        self.store.paths[self.row] = path
+
+    @property
+    def active(self):
+        return bool(self.store.active[self.row])
+
+    @active.setter
+    def active(self, active):
+        self.store.active[self.row] = int(active)
+
+    @property
+    def error(self):
+        """Why the tags couldn't be read, if they couldn't."""
+        return self.store.errors.get(self.row)
+
+    @property
+    def metadata(self):
+        return TrackMetadata(self.store, self.row)
+
+    @property
+    def audio(self):
+        """(duration in seconds, bitrate in kbps, VBR) from the MPEG headers; 0 when unknown."""
+        return self.store.audio(self.row)
+
+    def record(self):
+        """Tags plus audio fields as one plain dict, as read_metadata returns them and the cache stores them."""
+        record = dict(self.metadata)
+        record.update(zip(AUDIO_FIELDS, self.audio))
+        return record
+
+    def load_metadata(self):
+        """Re-read the file: the audio fields are updated in place, the tags returned for the caller to apply."""
+        return self.take_audio(*read_metadata(self.path))
+
+    def take_audio(self, metadata, error=None):
+        """Apply the audio fields and parse error of a fresh read (e.g. a worker's record());
+        the tags are returned for the caller to apply."""
+        metadata = dict(metadata)
+        self.store.set_audio(self.row, *(metadata.pop(field, 0) for field in AUDIO_FIELDS))
+        if error is None:
+            self.store.errors.pop(self.row, None)
+        else:
+            self.store.errors[self.row] = error
+        return metadata
+
+def path_key(path):
+    """Normalized key used to detect the same file reached through different spellings."""
+    return os.path.normcase(os.path.realpath(path))
+
+def load_mp3_batch(paths):
+    """Parse a chunk of paths into MP3File objects (runs inside a worker process)."""
+    return [MP3File(path) for path in paths]
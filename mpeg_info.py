@@ -0,0 +1,130 @@
+"""Duration, bitrate and VBR/CBR from MPEG headers, without decoding; nothing here imports PyQt6.
+
+Only the first frame is parsed: its header gives bitrate and sample rate, and a
+Xing/Info (LAME, ffmpeg...) or VBRI (Fraunhofer) header inside it gives the exact
+frame count of a VBR file. Without one the file is taken as CBR and its length is
+estimated from the size of the audio. Files are memory-mapped, so only the pages
+holding the tag header, the first frames and the trailing tags are read.
+"""
+from audio_hash import audio_bounds, map_file
+from profiling import profiler
+
+# (duration in seconds, bitrate in kbps, VBR) of a file whose audio couldn't be parsed
+UNKNOWN = (0.0, 0, False)
+FRAME_SEARCH = 64 * 1024 # How far into the audio to look for two consecutive frame headers
+MAX_KBPS = 640 # Above any MPEG bitrate: a frame count or size that implies more is corrupt
+
+# kbps by bitrate index, per (MPEG-1?, layer)
+BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# Hz by sample rate index, per version bits (0: MPEG-2.5, 2: MPEG-2, 3: MPEG-1)
+SAMPLE_RATES = {0: (11025, 12000, 8000), 2: (22050, 24000, 16000), 3: (44100, 48000, 32000)}
+
+def parse_header(header):
+    """(version bits, layer, kbps, sample rate, samples per frame, frame length, mono) of a
+    4-byte frame header, or None if it isn't one."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 3
+    layer = 4 - ((header[1] >> 1) & 3)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index == 15 or rate_index == 3:
+        return None # Reserved values
+    mpeg1 = version == 3
+    kbps = BITRATES[mpeg1, layer][bitrate_index]
+    sample_rate = SAMPLE_RATES[version][rate_index]
+    padding = (header[2] >> 1) & 1
+    if layer == 1:
+        samples = 384
+        length = (12 * kbps * 1000 // sample_rate + padding) * 4
+    else:
+        samples = 1152 if mpeg1 or layer == 2 else 576
+        length = samples // 8 * kbps * 1000 // sample_rate + padding
+    return version, layer, kbps, sample_rate, samples, length, header[3] >> 6 == 3
+
+def _first_frame(data, start, end):
+    """Offset and parsed header of the first frame followed by a matching one (free-format frames accepted alone)."""
+    position = start
+    limit = min(end, start + FRAME_SEARCH)
+    while position < limit:
+        position = data.find(b'\xff', position, limit)
+        if position < 0:
+            return None
+        frame = parse_header(data[position:position + 4])
+        if frame is not None:
+            following_at = position + frame[5]
+            # Free format has no length to check the next header with; a lone frame has no next header
+            if frame[2] == 0 or following_at >= end:
+                return position, frame
+            following = parse_header(data[following_at:following_at + 4])
+            if following is not None and following[0] == frame[0] and following[3] == frame[3]:
+                return position, frame
+        position += 1
+    return None
+
+def audio_info(data):
+    """(duration in seconds, kbps, VBR) of a file's bytes (a mmap or bytes object); UNKNOWN if there is no audio."""
+    start, end = audio_bounds(data)
+    found = _first_frame(data, start, end)
+    if found is None:
+        return UNKNOWN
+    position, (version, _, kbps, sample_rate, samples, _, mono) = found
+    # Xing/Info sits after the side information, VBRI at a fixed offset
+    side_info = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    frames = size = None
+    vbr = False
+    tag = data[position + 4 + side_info:position + 8 + side_info]
+    if tag in (b'Xing', b'Info'):
+        offset = position + 8 + side_info
+        flags = int.from_bytes(data[offset:offset + 4], 'big')
+        offset += 4
+        if flags & 1:
+            frames = int.from_bytes(data[offset:offset + 4], 'big')
+            offset += 4
+        if flags & 2:
+            size = int.from_bytes(data[offset:offset + 4], 'big')
+        vbr = tag == b'Xing'
+    elif data[position + 36:position + 40] == b'VBRI':
+        size = int.from_bytes(data[position + 46:position + 50], 'big')
+        frames = int.from_bytes(data[position + 50:position + 54], 'big')
+        vbr = True
+    if not size:
+        size = end - position
+    if frames:
+        duration = frames * samples / sample_rate
+        if vbr or not kbps:
+            kbps = round(size * 8 / duration / 1000) if duration else 0
+        return (duration, kbps, vbr) if 0 < kbps <= MAX_KBPS else UNKNOWN
+    if not kbps:
+        return UNKNOWN # Free format without a frame count: the length would be a guess
+    # CBR: every frame has the same bitrate, so the size gives the length
+    return size * 8 / (kbps * 1000), kbps, False
+
+def read_audio_info(path):
+    """audio_info() of a file; UNKNOWN if it can't be read."""
+    with profiler.span('audio info'):
+        try:
+            data = map_file(path)
+            try:
+                return audio_info(data)
+            finally:
+                if data:
+                    data.close()
+        except (OSError, ValueError):
+            profiler.count('audio info errors')
+            return UNKNOWN
+
+def format_duration(seconds):
+    """'3:07', or '1:02:45' from an hour on; '' when unknown."""
+    if not seconds:
+        return ''
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
@@ -0,0 +1,118 @@
+import os
+from tag_io import write_tags
+from profiling import profiler
+
+class PendingChange:
+    __slots__ = ('mp3_file', 'fields', 'new_path')
+
+    def __init__(self, mp3_file):
+        self.mp3_file = mp3_file
+        self.fields = {} # app metadata field -> new value
+        self.new_path = None
+
+    def is_empty(self):
+        return not self.fields and self.new_path is None
+
+class PendingChanges:
+    """In-memory journal of staged tag edits and renames, coalesced per file.
+
+    Staging the same file several times (Apply Changes, Save Track Order, Apply
+    Rename) merges into one entry, and values equal to what the file already holds
+    are dropped, so committing costs at most one tag save plus one rename per file.
+    """
+
+    def __init__(self):
+        self.changes = {} # id(MP3File) -> PendingChange, in staging order
+
+    def __len__(self):
+        return len(self.changes)
+
+    def _entry(self, mp3_file):
+        change = self.changes.get(id(mp3_file))
+        if change is None:
+            change = self.changes[id(mp3_file)] = PendingChange(mp3_file)
+        return change
+
+    def _settle(self, change):
+        if change.is_empty():
+            del self.changes[id(change.mp3_file)]
+
+    def stage_tags(self, mp3_file, fields):
+        change = self._entry(mp3_file)
+        metadata = mp3_file.metadata
+        for field, value in fields.items():
+            if metadata.get(field, '') == value:
+                change.fields.pop(field, None)
+            else:
+                change.fields[field] = value
+        self._settle(change)
+
+    def stage_rename(self, mp3_file, new_path):
+        change = self._entry(mp3_file)
+        change.new_path = None if new_path == mp3_file.path else new_path
+        self._settle(change)
+
+    def unstage(self, mp3_files, field):
+        """Drop one staged field, e.g. track numbers that are back to what the file holds."""
+        for mp3_file in mp3_files:
+            change = self.changes.get(id(mp3_file))
+            if change is not None:
+                change.fields.pop(field, None)
+                self._settle(change)
+
+    def settle(self, mp3_file):
+        """Drop staged values the file already holds, e.g. after a (partial) commit."""
+        change = self.changes.get(id(mp3_file))
+        if change is None:
+            return
+        self.stage_tags(mp3_file, dict(change.fields))
+        if change.new_path is not None:
+            self.stage_rename(mp3_file, change.new_path)
+
+    def get(self, mp3_file):
+        return self.changes.get(id(mp3_file))
+
+    def forget(self, mp3_files):
+        """Drop staged changes for files that are no longer loaded."""
+        for mp3_file in mp3_files:
+            self.changes.pop(id(mp3_file), None)
+
+    def discard(self):
+        self.changes = {}
+
+    def entries(self):
+        return list(self.changes.values())
+
+    def describe(self, change):
+        """One human-readable diff line for a staged change."""
+        metadata = change.mp3_file.metadata
+        parts = [f"{field}: '{metadata.get(field, '')}' -> '{value}'" for field, value in change.fields.items()]
+        if change.new_path is not None:
+            if os.path.dirname(change.new_path) == os.path.dirname(change.mp3_file.path):
+                parts.append(f"rename -> '{os.path.basename(change.new_path)}'")
+            else:
+                parts.append(f"move -> '{change.new_path}'")
+        return f"{os.path.basename(change.mp3_file.path)}: " + ", ".join(parts)
+
+    def diff(self):
+        return [self.describe(change) for change in self.changes.values()]
+
+def commit_change(path, change, plan=None):
+    """Apply one staged change: a single tag save, then the rename.
+
+    With a RenamePlan the rename is its phase two step; the file may be parked under
+    a temporary name until then, which is where its tags are saved.
+    """
+    fields, new_path = change
+    if plan is not None:
+        if fields:
+            write_tags(plan.current_path(path), fields)
+        if new_path is not None:
+            plan.move(path, new_path)
+        return
+    if fields:
+        write_tags(path, fields)
+    if new_path is not None and new_path != path:
+        with profiler.span('rename'):
+            os.rename(path, new_path)
+        profiler.count('files renamed')
@@ -0,0 +1,131 @@
+"""Timing spans and counters for the hot paths, plus opt-in cProfile/tracemalloc reports.
+
+Instrumented code calls profiler.span('tag parse') or profiler.count('bytes read', n);
+both are cheap enough to stay on permanently. Worker processes have their own
+profiler; run_profiled ships their numbers back so the parent can merge them.
+
+Set MP3_MANAGER_PROFILE=cprofile or =tracemalloc to have every profile_operation()
+block write a report to profile_dir(). cProfile only sees the thread that runs
+the block; tracemalloc covers the whole process.
+"""
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from metadata_cache import default_cache_dir
+
+PROFILE_MODE = os.environ.get('MP3_MANAGER_PROFILE', '').lower()
+REPORT_LINES = 40
+
+class Profiler:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.spans = {} # name -> [calls, seconds]
+        self.counters = {} # name -> int
+
+    def record(self, name, seconds, calls=1):
+        with self.lock:
+            span = self.spans.get(name)
+            if span is None:
+                self.spans[name] = [calls, seconds]
+            else:
+                span[0] += calls
+                span[1] += seconds
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def count(self, name, value=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def seconds(self, name):
+        return self.spans.get(name, (0, 0.0))[1]
+
+    def snapshot(self):
+        with self.lock:
+            return {'spans': {name: {'calls': calls, 'seconds': round(seconds, 6)}
+                              for name, (calls, seconds) in self.spans.items()},
+                    'counters': dict(self.counters)}
+
+    def take(self):
+        """Snapshot and reset, for shipping a worker's numbers to the parent."""
+        with self.lock:
+            spans, counters = self.spans, self.counters
+            self.spans, self.counters = {}, {}
+        return spans, counters
+
+    def merge(self, taken):
+        spans, counters = taken
+        for name, (calls, seconds) in spans.items():
+            self.record(name, seconds, calls)
+        for name, value in counters.items():
+            self.count(name, value)
+
+    def reset(self):
+        self.take()
+
+    def dump(self, path, **extra):
+        """Append one JSON line with the current numbers (plus any extra keys) to path."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **extra, **self.snapshot()}
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record) + '\n')
+
+profiler = Profiler()
+
+def run_profiled(func, *args):
+    """Call func in a worker process and return (result, numbers recorded meanwhile)."""
+    profiler.reset()
+    result = func(*args)
+    return result, profiler.take()
+
+def profile_dir():
+    return os.path.join(default_cache_dir(), 'profiles')
+
+def default_log_path():
+    return os.path.join(profile_dir(), 'stats.jsonl')
+
+@contextmanager
+def profile_operation(name):
+    """Write a cProfile or tracemalloc report for the block when MP3_MANAGER_PROFILE asks for one."""
+    if PROFILE_MODE not in ('cprofile', 'tracemalloc'):
+        yield
+        return
+    os.makedirs(profile_dir(), exist_ok=True)
+    stem = os.path.join(profile_dir(), f"{name}-{PROFILE_MODE}-{time.strftime('%Y%m%d-%H%M%S')}")
+    if PROFILE_MODE == 'cprofile':
+        import cProfile
+        import pstats
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(stem + '.prof')
+            with open(stem + '.txt', 'w', encoding='utf-8') as f:
+                pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(REPORT_LINES)
+    else:
+        import tracemalloc
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        try:
+            yield
+        finally:
+            after = tracemalloc.take_snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            if started:
+                tracemalloc.stop()
+            with open(stem + '.txt', 'w', encoding='utf-8') as f:
+                f.write(f"current {current / 1024:.1f} KB, peak {peak / 1024:.1f} KB\n\n")
+                for stat in after.compare_to(before, 'lineno')[:REPORT_LINES]:
+                    f.write(f"{stat}\n")
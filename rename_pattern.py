@@ -0,0 +1,215 @@
+"""Rename patterns, compiled once and rendered for many files; nothing here imports PyQt6.
+
+A pattern mixes literal text with fields:
+
+    artist - album - track - title          bare words (whole words only)
+    {track:02} {title|Untitled}             braces: format spec and fallbacks
+    {artist|album|Unknown}                  first non-empty field, else the literal
+
+Specs are [0][width][.max]: '02' zero-pads to two characters, '3' pads with spaces,
+'.40' cuts the value at 40 characters. 'track' is the number part of the
+tracknumber tag ('3' for '3/12'), 'total' the part after the slash. Use {{ and }}
+for literal braces. Invalid filename characters in the result become '_'.
+
+A '/' (or '\\') in the literal text starts a folder, e.g. 'artist/album/{track:02} - title';
+a '/' inside a tag value never does ('AC/DC' becomes 'AC_DC').
+"""
+import os
+import re
+
+# Bare pattern words, not matched inside longer words so 'title' in 'subtitle' stays literal
+PATTERN_FIELDS = ('artist', 'album', 'year', 'genre', 'title', 'track')
+# Every field braces accept, with the value used when a file has none
+FIELD_DEFAULTS = {
+    'artist': 'Unknown Artist',
+    'album': 'Unknown Album',
+    'year': 'Unknown Year',
+    'genre': 'Unknown Genre',
+    'title': 'Unknown Title',
+    'track': '',
+    'total': '',
+    'tracknumber': '',
+}
+INVALID_FILENAME_CHARS = '<>:"/\\|?*'
+# One C-level pass replaces every invalid character (control characters included)
+SANITIZE_TABLE = str.maketrans({char: '_' for char in INVALID_FILENAME_CHARS + ''.join(map(chr, range(32)))})
+
+_SEPARATOR = re.compile(r'[/\\]')
+# Bare fields can't touch a letter or digit ('subtitle' stays literal) but '_' separates ('artist_title')
+_TOKEN = re.compile(r'\{\{|\}\}|\{([^{}]*)\}|[{}]|(?<![^\W_])(' + '|'.join(PATTERN_FIELDS) + r')(?![^\W_])')
+_SPEC = re.compile(r'(0?)(\d*)(?:\.(\d+))?$')
+
+# Fields derived from another tag: name -> (source field, part of 'n/total')
+DERIVED_FIELDS = {'track': ('tracknumber', 0), 'total': ('tracknumber', 2)}
+
+def _source_field(field):
+    return DERIVED_FIELDS[field][0] if field in DERIVED_FIELDS else field
+
+def _split_path(path):
+    """(folder with its trailing separator, extension) of a path."""
+    cut = max(path.rfind(os.sep), path.rfind(os.altsep)) if os.altsep else path.rfind(os.sep)
+    dot = path.rfind('.')
+    return path[:cut + 1], path[dot:] if dot > cut + 1 else '' # A leading dot isn't an extension
+
+def _format(token, raw_values):
+    """Final text of a field token given the raw tag values of its fields."""
+    fields, fallback, zero, width, limit = token
+    for field, value in zip(fields, raw_values):
+        if field in DERIVED_FIELDS:
+            value = value.partition('/')[DERIVED_FIELDS[field][1]].strip()
+        if value:
+            break
+    else:
+        value = fallback
+    if limit is not None:
+        value = value[:limit].rstrip()
+    if width and value:
+        value = value.zfill(width) if zero else value.rjust(width)
+    return value
+
+def _folder_name(name):
+    # '.', '..' and names ending in a dot or space would be misread or rejected as folders
+    return name.strip().rstrip('.') or '_'
+
+class RenamePattern:
+    """A parsed pattern: one token list per path level, of literal strings and
+    (fields, fallback, zero, width, limit) slots. The last level is the file name."""
+    __slots__ = ('source', 'levels')
+
+    def __init__(self, source):
+        self.source = source
+        self.levels = [[]]
+        literal = []
+        position = 0
+        for match in _TOKEN.finditer(source):
+            literal.append(source[position:match.start()])
+            position = match.end()
+            text = match.group()
+            if text in ('{{', '}}'):
+                literal.append(text[0])
+            elif text in ('{', '}'):
+                raise ValueError(f"Unbalanced '{text}' at position {match.start() + 1}")
+            else:
+                self._add_literal(''.join(literal))
+                literal = []
+                if match.group(2):
+                    self.levels[-1].append(((match.group(2),), FIELD_DEFAULTS[match.group(2)], False, 0, None))
+                else:
+                    self.levels[-1].append(self._parse_field(match.group(1)))
+        literal.append(source[position:])
+        self._add_literal(''.join(literal))
+
+    def _add_literal(self, text):
+        for index, part in enumerate(_SEPARATOR.split(text)):
+            if index:
+                self.levels.append([])
+            if part:
+                self.levels[-1].append(part)
+
+    @property
+    def has_folders(self):
+        return len(self.levels) > 1
+
+    @staticmethod
+    def _parse_field(body):
+        # {title|Untitled:.20}: the spec after the first ':' applies to whichever value is used
+        expression, _, spec = body.partition(':')
+        alternatives = [part.strip() for part in expression.split('|')]
+        fields = []
+        fallback = None
+        for index, name in enumerate(alternatives):
+            if name in FIELD_DEFAULTS:
+                fields.append(name)
+            elif index == 0:
+                raise ValueError(f"Unknown field '{name}' (use {', '.join(FIELD_DEFAULTS)})")
+            else:
+                fallback = '|'.join(alternatives[index:]) # Literal text, may itself contain '|'
+                break
+        spec_match = _SPEC.match(spec.strip())
+        if spec_match is None:
+            raise ValueError(f"Bad format '{spec}' for {{{body}}}: use [0][width][.max]")
+        zero, width, limit = spec_match.groups()
+        if fallback is None:
+            fallback = FIELD_DEFAULTS[fields[-1]]
+        return (tuple(fields), fallback, bool(zero), int(width or 0), int(limit) if limit else None)
+
+    def render(self, metadata):
+        """Relative path (without extension) for one file's metadata, each level sanitized."""
+        names = [''.join(token if token.__class__ is str
+                         else _format(token, [metadata.get(_source_field(field), '') for field in token[0]])
+                         for token in tokens).translate(SANITIZE_TABLE)
+                 for tokens in self.levels]
+        return os.path.join(*map(_folder_name, names[:-1]), names[-1])
+
+    def target(self, mp3_file, root=None):
+        """New path for a file: rendered name plus original extension, under root or the file's folder.
+
+        A name that renders empty (e.g. '{tracknumber}' on an untagged file) keeps the file where it is.
+        """
+        relative = self.render(mp3_file.metadata)
+        if not os.path.basename(relative).strip():
+            return mp3_file.path
+        prefix, extension = _split_path(mp3_file.path)
+        return os.path.join(root, relative + extension) if root else prefix + relative + extension
+
+    def targets(self, mp3_files, root=None):
+        """New paths for many files in one pass, like target().
+
+        Works column by column: each field is read straight from the TrackStore for all
+        rows and each distinct value is formatted once (artists, albums and track
+        numbers repeat across thousands of files); names are sanitized once when joined.
+        """
+        if not mp3_files:
+            return []
+        store = mp3_files[0].store
+        if any(mp3_file.store is not store for mp3_file in mp3_files):
+            return [self.target(mp3_file, root) for mp3_file in mp3_files]
+        rows = [mp3_file.row for mp3_file in mp3_files]
+        levels = [self._render_level(tokens, store, rows) for tokens in self.levels]
+        names = levels.pop()
+        if levels:
+            folder_names = {}
+            for folders in levels:
+                for name in folders:
+                    if name not in folder_names:
+                        folder_names[name] = _folder_name(name)
+            # Folders repeat (one per artist or album), so each is joined once too
+            joined = {}
+            relative_folders = []
+            for parts in zip(*levels):
+                folder = joined.get(parts)
+                if folder is None:
+                    folder = joined[parts] = os.path.join(*[folder_names[name] for name in parts]) + os.sep
+                relative_folders.append(folder)
+            names = [folder + name if name.strip() else '' for folder, name in zip(relative_folders, names)]
+        paths = [store.paths[row] for row in rows]
+        base = os.path.join(root, '') if root else None
+        return [(base or prefix) + name + extension if name.strip() else path
+                for path, (prefix, extension), name in zip(paths, map(_split_path, paths), names)]
+
+    @staticmethod
+    def _render_level(tokens, store, rows):
+        """Sanitized text of one path level for every row."""
+        columns = []
+        for token in tokens:
+            if token.__class__ is str:
+                columns.append([token] * len(rows))
+                continue
+            fields, fallback, zero, width, limit = token
+            raw = []
+            for field in fields:
+                keys, values = store.column(_source_field(field))
+                raw.append([keys[row] for row in rows] if values is None else [values[keys[row]] for row in rows])
+            if len(fields) == 1 and fields[0] not in DERIVED_FIELDS and not width and limit is None:
+                columns.append([value or fallback for value in raw[0]]) # Plain field: nothing to format
+                continue
+            raw = list(zip(*raw))
+            formatted = {key: _format(token, key) for key in set(raw)}
+            columns.append(map(formatted.__getitem__, raw))
+        if not columns:
+            return [''] * len(rows)
+        return [''.join(parts).translate(SANITIZE_TABLE) for parts in zip(*columns)]
+
+def compile_pattern(source):
+    """Parse a pattern once; raises ValueError for unknown fields, bad specs or stray braces."""
+    return RenamePattern(source)
@@ -0,0 +1,205 @@
+"""Collision-safe batch renames; nothing here imports PyQt6.
+
+A RenamePlan checks a batch of (source, target) renames in O(N): two files may not
+claim the same target, and a target may only exist if the plan moves that file away
+too. Swaps, cycles and chains (a -> b while b -> c) need no ordering: phase one
+parks every file that another rename wants to move into under a temporary name,
+after which every phase two rename targets a free name and they can run in any
+order, in parallel. Every rename done is journaled so an incomplete plan can be
+rolled back, leaving each file under its original name.
+
+Targets may be in other folders: missing folders are created in one pass before
+anything moves. Moves use os.replace; only when a target is on another device is
+the file copied, verified and then deleted.
+"""
+import os
+import uuid
+import errno
+import shutil
+import hashlib
+import threading
+from profiling import profiler
+
+COPY_CHUNK = 1024 * 1024
+
+def _key(path):
+    # Case-insensitive filesystems see 'A.mp3' and 'a.mp3' as the same file
+    return os.path.normcase(os.path.abspath(path))
+
+def _file_digest(path):
+    digest = hashlib.blake2b()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COPY_CHUNK), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+def move_file(old, new):
+    """os.replace, or a streamed copy + verify + unlink when new is on another device."""
+    try:
+        os.replace(old, new)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    digest = hashlib.blake2b()
+    size = 0
+    try:
+        with open(old, 'rb') as source, open(new, 'xb') as target:
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b''):
+                digest.update(chunk)
+                target.write(chunk)
+                size += len(chunk)
+            target.flush()
+            os.fsync(target.fileno())
+        if _file_digest(new) != digest.digest():
+            raise OSError(errno.EIO, f"copy of '{os.path.basename(old)}' does not match the original")
+    except BaseException:
+        try:
+            os.remove(new)
+        except OSError:
+            pass
+        raise
+    shutil.copystat(old, new)
+    os.remove(old)
+    profiler.count('cross-device moves')
+    profiler.count('bytes copied', size)
+
+def _folder_listing(folder):
+    try:
+        return {_key(os.path.join(folder, name)) for name in os.listdir(folder)}
+    except OSError:
+        return set()
+
+class RenamePlan:
+    """Renames validated against each other and the disk, ready to execute in two phases."""
+
+    def __init__(self, renames):
+        """renames: iterable of (source, target) paths; renames to the same path are dropped."""
+        with profiler.span('rename plan'):
+            moves, self.conflicts = self._validate([(source, target) for source, target in renames
+                                                     if source != target])
+            self.moves = [(source, target) for source, target, _, _ in moves]
+            targets = {target_key for _, _, _, target_key in moves}
+            token = uuid.uuid4().hex[:8]
+            # Sources another rename moves into are parked first (a case-only rename parks itself)
+            self.parking = {}
+            for source, _, source_key, _ in moves:
+                if source_key in targets:
+                    folder, name = os.path.split(source)
+                    self.parking[source] = os.path.join(folder, f".{name}.{token}.renaming")
+            # Parents sort before their subfolders
+            folders = {os.path.dirname(target) for _, target in self.moves}
+            self.new_folders = sorted(folder for folder in folders if folder and not os.path.isdir(folder))
+        self.lock = threading.Lock()
+        self.journal = [] # (from, to) of every rename done, in order
+        self.created_folders = [] # Folders made by make_folders, parents first
+        self.moved = 0 # Phase two renames done
+
+    def __len__(self):
+        return len(self.moves)
+
+    @staticmethod
+    def _validate(renames):
+        """Split renames into moves, (source, target, source key, target key), and (source, target, reason) conflicts."""
+        target_keys = [_key(target) for _, target in renames]
+        claims = {}
+        for key in target_keys:
+            claims[key] = claims.get(key, 0) + 1
+        conflicts = []
+        candidates = []
+        for (source, target), key in zip(renames, target_keys):
+            if claims[key] > 1:
+                conflicts.append((source, target, f"{claims[key]} files would get this name"))
+            else:
+                candidates.append((source, target, _key(source), key))
+
+        # A target may exist on disk only while its file is itself being renamed away
+        sources = {source_key for _, _, source_key, _ in candidates}
+        listings = {}
+        blocked_by = {} # source key -> indices of candidates waiting for that file to move
+        rejected = set()
+        stack = []
+        for index, (source, target, _, key) in enumerate(candidates):
+            if key in sources:
+                blocked_by.setdefault(key, []).append(index)
+                continue
+            folder = os.path.dirname(target)
+            if folder not in listings:
+                listings[folder] = _folder_listing(folder)
+            if key in listings[folder]:
+                stack.append((index, "a file with this name already exists"))
+        # A rejected rename leaves its file in place, which blocks whoever wanted that name
+        while stack:
+            index, reason = stack.pop()
+            if index in rejected:
+                continue
+            rejected.add(index)
+            source, target, source_key, _ = candidates[index]
+            conflicts.append((source, target, reason))
+            for waiting in blocked_by.get(source_key, ()):
+                stack.append((waiting, f"'{os.path.basename(source)}' keeps this name"))
+        moves = [move for index, move in enumerate(candidates) if index not in rejected]
+        return moves, conflicts
+
+    def current_path(self, source):
+        """Where a source file is right now (its temporary name once parked)."""
+        return self.parking.get(source, source)
+
+    def _rename(self, old, new):
+        # os.replace silently replaces an existing file; never let it
+        if os.path.exists(new) and _key(new) != _key(old):
+            raise FileExistsError(f"'{os.path.basename(new)}' already exists")
+        with profiler.span('rename'):
+            move_file(old, new)
+        with self.lock:
+            self.journal.append((old, new))
+
+    def make_folders(self):
+        """Create every missing target folder (and missing parents) once."""
+        for folder in self.new_folders:
+            missing = []
+            while folder and not os.path.isdir(folder):
+                missing.append(folder)
+                folder = os.path.dirname(folder)
+            for folder in reversed(missing):
+                os.mkdir(folder)
+                self.created_folders.append(folder)
+        profiler.count('folders created', len(self.created_folders))
+
+    def park(self):
+        """Phase one: create the target folders, then move every file that is in another
+        rename's way to its temporary name."""
+        self.make_folders()
+        for source, temp in self.parking.items():
+            self._rename(source, temp)
+
+    def move(self, source, target):
+        """Phase two for one file; thread-safe once park() has run."""
+        self._rename(self.current_path(source), target)
+        with self.lock:
+            self.moved += 1
+        profiler.count('files renamed')
+
+    def complete(self):
+        return self.moved == len(self.moves)
+
+    def rollback(self):
+        """Undo every journaled rename, newest first; returns [(path, error)] for any that failed."""
+        errors = []
+        with self.lock:
+            journal, self.journal = self.journal, []
+            self.moved = 0
+        for old, new in reversed(journal):
+            try:
+                move_file(new, old)
+            except OSError as e:
+                errors.append((new, str(e) or type(e).__name__))
+        profiler.count('renames rolled back', len(journal) - len(errors))
+        # Folders made for this plan go too, unless something else now lives in them
+        folders, self.created_folders = self.created_folders, []
+        for folder in reversed(folders):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                pass
+        return errors
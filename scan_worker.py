@@ -0,0 +1,130 @@
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from PyQt6.QtCore import QObject, pyqtSignal
+from mp3_file import MP3File, load_mp3_batch, path_key
+from metadata_cache import open_cache
+from profiling import profiler, profile_operation, run_profiled
+
+CHUNK_SIZE = 200 # Paths parsed per worker task (and emitted to the UI per batch)
+FLUSH_INTERVAL = 0.25 # Seconds before a partial chunk is submitted anyway (slow walks)
+
+class ScanWorker(QObject):
+    """Parses MP3 tags in a process pool and streams MP3File batches back to the UI thread.
+
+    Meant to be moved to a QThread; `paths` may be any iterable (including a lazy
+    generator), it is consumed inside run() so directory listing never blocks the UI.
+    """
+    batch_ready = pyqtSignal(list, list) # list of MP3File, their path_key (resolved here, off the UI thread)
+    progress = pyqtSignal(int, int) # parsed, found
+    finished = pyqtSignal(int, int, bool) # loaded, failed, cancelled
+
+    def __init__(self, paths, chunk_size=CHUNK_SIZE, max_workers=None, cache_path=None, parent=None):
+        super().__init__(parent)
+        self.paths = paths
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cache_path = cache_path # None disables the metadata cache
+        self._cancelled = threading.Event()
+        self.executor = None
+
+    def cancel(self):
+        """Stop the scan without waiting: queued chunks are dropped, chunks being parsed finish in the background."""
+        self._cancelled.set()
+        executor = self.executor
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        found = 0
+        loaded = 0
+        failed = 0
+        pending = {} # future -> [(path, size, mtime_ns)] of the chunk being parsed
+        max_pending = self.max_workers * 4 # Bound memory when the path source is huge
+        # The cache connection must be created on this thread
+        cache = open_cache(self.cache_path) if self.cache_path else None
+
+        # 'spawn' keeps children clean: forking a process that runs Qt threads is unsafe.
+        # Worker processes only start on the first cache miss.
+        context = multiprocessing.get_context('spawn')
+        with profile_operation('scan'), ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context) as executor:
+            self.executor = executor
+
+            def submit(chunk):
+                nonlocal loaded, failed
+                stats = []
+                for path in chunk:
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        failed += 1
+                        continue
+                    stats.append((path, info.st_size, info.st_mtime_ns))
+                hits = cache.lookup_many(stats) if cache else {}
+                if hits:
+                    profiler.count('cache hits', len(hits))
+                    batch = [MP3File(path, hits[path]) for path, _, _ in stats if path in hits]
+                    loaded += len(batch)
+                    self.batch_ready.emit(batch, [path_key(mp3_file.path) for mp3_file in batch])
+                misses = [stat for stat in stats if stat[0] not in hits]
+                if misses:
+                    try:
+                        pending[executor.submit(run_profiled, load_mp3_batch, [path for path, _, _ in misses])] = misses
+                    except RuntimeError:
+                        pass # Shut down by cancel()
+
+            def collect(timeout):
+                nonlocal loaded, failed
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stats = pending.pop(future)
+                    try:
+                        batch, numbers = future.result()
+                    except Exception:
+                        failed += len(stats)
+                        continue
+                    # Parse timings and bytes read were recorded in the worker process
+                    profiler.merge(numbers)
+                    if cache:
+                        # Files that failed to parse are retried next time rather than cached
+                        cache.store_many([(path, size, mtime_ns, mp3_file.record())
+                                          for (path, size, mtime_ns), mp3_file in zip(stats, batch)
+                                          if mp3_file.error is None])
+                    loaded += len(batch)
+                    self.batch_ready.emit(batch, [path_key(mp3_file.path) for mp3_file in batch])
+                if done:
+                    self.progress.emit(loaded + failed, found)
+
+            chunk = []
+            last_submit = time.monotonic()
+            for path in self.paths:
+                if self.is_cancelled():
+                    break
+                chunk.append(path)
+                found += 1
+                if len(chunk) >= self.chunk_size or time.monotonic() - last_submit > FLUSH_INTERVAL:
+                    submit(chunk)
+                    chunk = []
+                    last_submit = time.monotonic()
+                    collect(0 if len(pending) < max_pending else None)
+                    self.progress.emit(loaded + failed, found)
+
+            if chunk and not self.is_cancelled():
+                submit(chunk)
+            self.progress.emit(loaded + failed, found)
+
+            while pending and not self.is_cancelled():
+                collect(0.1)
+
+            for future in pending:
+                future.cancel()
+            self.executor = None
+
+        if cache:
+            cache.close()
+        self.finished.emit(loaded, failed, self.is_cancelled())
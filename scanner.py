@@ -0,0 +1,104 @@
+import os
+import time
+from fnmatch import fnmatchcase
+from profiling import profiler
+
+DEFAULT_INCLUDE = ('*.mp3',)
+
+def _matches(patterns, name, rel_path):
+    # Patterns are matched case-insensitively against the bare name or the root-relative path
+    return any(fnmatchcase(name, pattern) or fnmatchcase(rel_path, pattern) for pattern in patterns)
+
+def walk_mp3_files(root, max_depth=None, include=DEFAULT_INCLUDE, exclude=(), follow_symlinks=True):
+    """Recursively yield matching file paths under root as soon as they are found.
+
+    Built on os.scandir so the file type comes from the directory listing itself and
+    stat results are cached on each DirEntry. max_depth=0 only lists root itself,
+    None walks the whole tree. Excluded directories are pruned, unreadable ones are
+    skipped, and each directory is only entered once per (device, inode), however
+    many symlinks lead to it.
+    """
+    return _walk(root, '', 0, max_depth, include, exclude, follow_symlinks, folders=False)
+
+def walk_folders(root, max_depth=None, exclude=(), follow_symlinks=True, under=None):
+    """Yield root and every folder below it that walk_mp3_files would enter.
+
+    With under, root is a folder inside that tree and depth and exclude patterns
+    count from under instead; nothing is yielded if root itself is out of bounds.
+    """
+    rel_folder, depth = '', 0
+    if under is not None:
+        rel = os.path.relpath(root, under)
+        if rel != os.curdir:
+            parts = rel.replace(os.sep, '/').lower().split('/')
+            rel_folder, depth = '/'.join(parts) + '/', len(parts)
+            excluded = [pattern.lower() for pattern in exclude]
+            if ((max_depth is not None and depth > max_depth)
+                    or any(_matches(excluded, part, '/'.join(parts[:index + 1]))
+                           for index, part in enumerate(parts))):
+                return iter(())
+    return _walk(root, rel_folder, depth, max_depth, (), exclude, follow_symlinks, folders=True)
+
+def _walk(root, rel_root, root_depth, max_depth, include, exclude, follow_symlinks, folders):
+    include = [pattern.lower() for pattern in include]
+    exclude = [pattern.lower() for pattern in exclude]
+    try:
+        root_stat = os.stat(root)
+    except OSError:
+        return
+    visited = {(root_stat.st_dev, root_stat.st_ino)}
+    stack = [(root, rel_root, root_depth)]
+
+    while stack:
+        folder, rel_folder, depth = stack.pop()
+        if folders:
+            yield folder
+        # Listing time per folder, excluding the time the consumer holds each yielded path
+        elapsed = 0.0
+        started = time.perf_counter()
+        try:
+            with os.scandir(folder) as entries:
+                subfolders = []
+                for entry in entries:
+                    name = entry.name.lower()
+                    rel_path = rel_folder + name
+                    if exclude and _matches(exclude, name, rel_path):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=follow_symlinks):
+                            if max_depth is not None and depth >= max_depth:
+                                continue
+                            # Every folder is recorded, so a symlink to a sibling or parent isn't walked twice
+                            info = entry.stat()
+                            if (info.st_dev, info.st_ino) in visited:
+                                continue
+                            visited.add((info.st_dev, info.st_ino))
+                            subfolders.append((entry.path, rel_path + '/', depth + 1))
+                        elif not folders and entry.is_file(follow_symlinks=follow_symlinks) and _matches(include, name, rel_path):
+                            elapsed += time.perf_counter() - started
+                            yield entry.path
+                            started = time.perf_counter()
+                    except OSError:
+                        continue
+        except OSError:
+            profiler.count('unreadable folders')
+            continue
+        finally:
+            profiler.record('directory walk', elapsed + time.perf_counter() - started)
+        # Reverse so folders are visited in listing order when popped from the stack
+        stack.extend(reversed(subfolders))
+
+def iter_mp3_paths(paths, **options):
+    """Expand a mix of files and folders (e.g. a drop) into MP3 paths, walking folders lazily."""
+    include = [pattern.lower() for pattern in options.get('include', DEFAULT_INCLUDE)]
+    for path in paths:
+        if os.path.isdir(path):
+            yield from walk_mp3_files(path, **options)
+        elif _matches(include, os.path.basename(path).lower(), os.path.basename(path).lower()):
+            yield path
+
+def matches_file(path, include=DEFAULT_INCLUDE, exclude=()):
+    """Whether a single file passes the include/exclude patterns; only its name is matched."""
+    name = os.path.basename(path).lower()
+    return (_matches([pattern.lower() for pattern in include], name, name)
+            and not _matches([pattern.lower() for pattern in exclude], name, name))
@@ -0,0 +1,88 @@
+from profiling import profiler
+
+# mutagen is imported on first save so it doesn't count against startup time
+
+# App metadata field -> EasyID3 key (the app calls the date frame "year")
+EASY_KEYS = {
+    'artist': 'artist',
+    'album': 'album',
+    'year': 'date',
+    'genre': 'genre',
+    'title': 'title',
+    'tracknumber': 'tracknumber',
+}
+
+# Free space reserved after the tag whenever a save has to rewrite the whole file anyway,
+# so later edits (a longer genre, a track total) fit and only the tag is rewritten in place
+PADDING_HEADROOM = 64 * 1024
+# In-place saves write the padding too, so more than this is shrunk once instead of rewritten every save
+PADDING_MAX = 1024 * 1024
+
+def keep_padding(info):
+    """mutagen padding policy: reuse the padding while the tag fits, grow it with headroom when it doesn't."""
+    if info.padding < 0:
+        return max(PADDING_HEADROOM, info.get_default_padding())
+    if info.padding > PADDING_MAX:
+        return PADDING_HEADROOM
+    return info.padding
+
+class PaddingInRange(Exception):
+    """Raised from the padding policy to stop a save that wouldn't change anything worth writing."""
+
+def normalized_padding(info):
+    # Raised before mutagen writes a byte: files already holding a reasonable amount aren't saved at all
+    if PADDING_HEADROOM // 4 <= info.padding <= PADDING_MAX:
+        raise PaddingInRange
+    return PADDING_HEADROOM
+
+def _save(tags, path, policy):
+    # Counts what the save costs on disk: the tag region, plus the audio when the file had to be rewritten
+    rewritten = []
+
+    def padding(info):
+        new_padding = policy(info)
+        # Any change in padding (growing the tag, or shrinking oversized padding) moves the audio
+        if new_padding != info.padding:
+            rewritten.append(info.size)
+        return new_padding
+
+    with profiler.span('tag save'):
+        tags.save(padding=padding)
+    with open(path, 'rb') as f:
+        header = f.read(10)
+    tag_size = 10 + ((header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]) if header[:3] == b'ID3' else 0
+    profiler.count('files saved')
+    profiler.count('bytes written', tag_size + sum(rewritten))
+    if rewritten:
+        profiler.count('full rewrites')
+
+def write_tags(path, fields):
+    """Set the given app metadata fields (e.g. {'genre': 'Jazz'}) and save the file once.
+
+    An empty value removes the frame, e.g. when an undo restores a tag the file didn't have.
+    """
+    from mutagen.easyid3 import EasyID3
+    audio = EasyID3(path)
+    for field, value in fields.items():
+        if value:
+            audio[EASY_KEYS[field]] = value
+        elif EASY_KEYS[field] in audio:
+            del audio[EASY_KEYS[field]]
+    _save(audio, path, keep_padding)
+
+def normalize_padding(path, _=None):
+    """Resize the tag padding to PADDING_HEADROOM; files without an ID3v2 tag, or whose
+    padding is already within range, are skipped without being written.
+
+    Costs one full rewrite for files that are off, after which tag edits are patched in place.
+    The unused second argument lets it run as a WriteWorker job.
+    """
+    from mutagen.id3 import ID3, ID3NoHeaderError
+    try:
+        tags = ID3(path)
+    except ID3NoHeaderError:
+        return
+    try:
+        _save(tags, path, normalized_padding)
+    except PaddingInRange:
+        profiler.count('padding in range')
@@ -0,0 +1,36 @@
+import pytest
+
+from metadata_cache import MetadataCache
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'cache.sqlite3'))
+    yield cache
+    cache.close()
+
+def store(cache, titles):
+    cache.store_many([(path, 100, 5, {'title': title, 'duration': 1.0}) for path, title in titles.items()])
+
+def titles(cache, paths):
+    found = cache.lookup_many([(path, 100, 5) for path in paths])
+    return {path: metadata['title'] for path, metadata in found.items()}
+
+def test_rename_moves_rows(cache):
+    store(cache, {'a.mp3': 'A'})
+    cache.rename([('a.mp3', 'b.mp3')])
+    assert titles(cache, ['a.mp3', 'b.mp3']) == {'b.mp3': 'A'}
+
+def test_rename_chain(cache):
+    store(cache, {'1.mp3': 'one', '2.mp3': 'two'})
+    cache.rename([('1.mp3', '2.mp3'), ('2.mp3', '3.mp3')])
+    assert titles(cache, ['1.mp3', '2.mp3', '3.mp3']) == {'2.mp3': 'one', '3.mp3': 'two'}
+
+def test_rename_swap(cache):
+    store(cache, {'a.mp3': 'A', 'b.mp3': 'B'})
+    cache.rename([('a.mp3', 'b.mp3'), ('b.mp3', 'a.mp3')])
+    assert titles(cache, ['a.mp3', 'b.mp3']) == {'a.mp3': 'B', 'b.mp3': 'A'}
+
+def test_rename_drops_stale_row_at_target(cache):
+    store(cache, {'new.mp3': 'stale'})
+    cache.rename([('uncached.mp3', 'new.mp3')])
+    assert titles(cache, ['new.mp3']) == {}
@@ -0,0 +1,61 @@
+import os
+
+import pytest
+
+from mp3_file import MP3File
+from rename_pattern import compile_pattern
+from track_store import TrackStore
+
+@pytest.fixture
+def files(tmp_path):
+    store = TrackStore()
+    return [
+        MP3File(str(tmp_path / 'a.mp3'), {'artist': 'AC/DC', 'album': 'Back in Black', 'title': 'Hells Bells',
+                                          'tracknumber': '1/10'}, store=store),
+        MP3File(str(tmp_path / 'b.mp3'), {'artist': 'AC/DC', 'album': 'Back in Black', 'title': 'Shoot to Thrill',
+                                          'tracknumber': '2/10'}, store=store),
+        MP3File(str(tmp_path / 'c.mp3'), {'title': ''}, store=store),
+    ]
+
+@pytest.mark.parametrize('source', [
+    'subtitle',
+    'plain text',
+    '{{braces}}',
+    'artist - title',
+    'artist_title',
+    'track_title',
+    '{track:02}_title',
+    '{track:02} - {title|Untitled:.5}',
+    '{artist|album|Unknown}',
+    'Music/artist - title',
+    'Library/artist/title',
+    'Library/Shared/Files',
+    'artist/album/{track:02} - title',
+])
+def test_targets_match_target(files, source):
+    pattern = compile_pattern(source)
+    assert pattern.targets(files) == [pattern.target(f) for f in files]
+    root = os.path.join('out', 'library')
+    assert pattern.targets(files, root) == [pattern.target(f, root) for f in files]
+
+def test_literal_only_pattern_names_every_file(files):
+    targets = compile_pattern('Library/subtitle').targets(files)
+    assert [os.path.basename(target) for target in targets] == ['subtitle.mp3'] * len(files)
+    assert all(os.path.basename(os.path.dirname(target)) == 'Library' for target in targets)
+
+def test_targets_of_no_files():
+    assert compile_pattern('subtitle').targets([]) == []
+
+def test_organizer_patterns_under_root(files, tmp_path):
+    root = str(tmp_path / 'Library')
+    targets = compile_pattern('Music/artist/{track:02} - title').targets(files, root)
+    assert targets[0] == os.path.join(root, 'Music', 'AC_DC', '01 - Hells Bells.mp3')
+    assert targets[1] == os.path.join(root, 'Music', 'AC_DC', '02 - Shoot to Thrill.mp3')
+    assert targets[2] == os.path.join(root, 'Music', 'Unknown Artist', ' - Unknown Title.mp3')
+
+def test_underscore_separates_bare_fields(files):
+    names = lambda source: [os.path.basename(target) for target in compile_pattern(source).targets(files[:2])]
+    assert names('artist_title') == ['AC_DC_Hells Bells.mp3', 'AC_DC_Shoot to Thrill.mp3']
+    assert names('{track:02}_title') == ['01_Hells Bells.mp3', '02_Shoot to Thrill.mp3']
+    assert names('track_title') == ['1_Hells Bells.mp3', '2_Shoot to Thrill.mp3']
+    assert names('subtitle2title') == ['subtitle2title.mp3'] * 2
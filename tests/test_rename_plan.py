@@ -0,0 +1,120 @@
+import errno
+import os
+
+import pytest
+
+import rename_plan
+from rename_plan import RenamePlan, move_file
+
+def make(tmp_path, *names):
+    for name in names:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+def contents(tmp_path):
+    """{relative path: original name} of every file left under tmp_path."""
+    found = {}
+    for folder, _, names in os.walk(str(tmp_path)):
+        for name in names:
+            path = os.path.join(folder, name)
+            with open(path) as f:
+                found[os.path.relpath(path, str(tmp_path))] = f.read()
+    return found
+
+def plan_for(tmp_path, renames):
+    return RenamePlan([(str(tmp_path / old), str(tmp_path / new)) for old, new in renames])
+
+def execute(plan):
+    plan.park()
+    for source, target in plan.moves:
+        plan.move(source, target)
+    assert plan.complete()
+
+def test_swap(tmp_path):
+    make(tmp_path, 'a.mp3', 'b.mp3')
+    plan = plan_for(tmp_path, [('a.mp3', 'b.mp3'), ('b.mp3', 'a.mp3')])
+    assert not plan.conflicts
+    execute(plan)
+    assert contents(tmp_path) == {'b.mp3': 'a.mp3', 'a.mp3': 'b.mp3'}
+
+def test_three_cycle(tmp_path):
+    make(tmp_path, 'a.mp3', 'b.mp3', 'c.mp3')
+    execute(plan_for(tmp_path, [('a.mp3', 'b.mp3'), ('b.mp3', 'c.mp3'), ('c.mp3', 'a.mp3')]))
+    assert contents(tmp_path) == {'b.mp3': 'a.mp3', 'c.mp3': 'b.mp3', 'a.mp3': 'c.mp3'}
+
+def test_chain(tmp_path):
+    make(tmp_path, '1.mp3', '2.mp3')
+    plan = plan_for(tmp_path, [('1.mp3', '2.mp3'), ('2.mp3', '3.mp3')])
+    assert list(plan.parking) == [str(tmp_path / '2.mp3')]
+    execute(plan)
+    assert contents(tmp_path) == {'2.mp3': '1.mp3', '3.mp3': '2.mp3'}
+
+def test_existing_target_cascades_to_dependents(tmp_path):
+    make(tmp_path, 'a.mp3', 'b.mp3', 'taken.mp3', 'd.mp3')
+    # b can't move onto taken.mp3, so a (waiting for b's name) can't move either; d is independent
+    plan = plan_for(tmp_path, [('b.mp3', 'taken.mp3'), ('a.mp3', 'b.mp3'), ('d.mp3', 'e.mp3')])
+    conflicts = {os.path.basename(source): reason for source, _, reason in plan.conflicts}
+    assert conflicts == {'b.mp3': "a file with this name already exists", 'a.mp3': "'b.mp3' keeps this name"}
+    assert plan.moves == [(str(tmp_path / 'd.mp3'), str(tmp_path / 'e.mp3'))]
+    execute(plan)
+    assert contents(tmp_path) == {'a.mp3': 'a.mp3', 'b.mp3': 'b.mp3', 'taken.mp3': 'taken.mp3', 'e.mp3': 'd.mp3'}
+
+def test_two_sources_same_target(tmp_path):
+    make(tmp_path, 'a.mp3', 'b.mp3')
+    plan = plan_for(tmp_path, [('a.mp3', 'c.mp3'), ('b.mp3', 'c.mp3')])
+    assert not plan.moves
+    assert [reason for _, _, reason in plan.conflicts] == ["2 files would get this name"] * 2
+
+def test_case_only_rename(tmp_path):
+    make(tmp_path, 'song.mp3')
+    plan = plan_for(tmp_path, [('song.mp3', 'Song.mp3')])
+    assert not plan.conflicts
+    execute(plan)
+    assert contents(tmp_path) == {'Song.mp3': 'song.mp3'}
+
+def test_moves_into_new_folders(tmp_path):
+    make(tmp_path, 'a.mp3')
+    plan = plan_for(tmp_path, [('a.mp3', os.path.join('Artist', 'Album', 'a.mp3'))])
+    execute(plan)
+    assert contents(tmp_path) == {os.path.join('Artist', 'Album', 'a.mp3'): 'a.mp3'}
+
+def test_rollback_after_a_failed_move(tmp_path, monkeypatch):
+    make(tmp_path, 'a.mp3', 'b.mp3', 'c.mp3')
+    plan = plan_for(tmp_path, [('a.mp3', 'b.mp3'), ('b.mp3', 'a.mp3'),
+                               ('c.mp3', os.path.join('new', 'c.mp3'))])
+    plan.park()
+    real_move = rename_plan.move_file
+    moves = []
+
+    def failing_move(old, new):
+        moves.append(new)
+        if len(moves) == 2:
+            raise OSError(errno.EIO, "disk error")
+        real_move(old, new)
+    monkeypatch.setattr(rename_plan, 'move_file', failing_move)
+    with pytest.raises(OSError):
+        for source, target in plan.moves:
+            plan.move(source, target)
+    assert not plan.complete()
+    monkeypatch.setattr(rename_plan, 'move_file', real_move)
+    assert plan.rollback() == []
+    assert contents(tmp_path) == {'a.mp3': 'a.mp3', 'b.mp3': 'b.mp3', 'c.mp3': 'c.mp3'}
+    assert not (tmp_path / 'new').exists() # Folders made for the plan are removed too
+
+def cross_device(old, new):
+    raise OSError(errno.EXDEV, "Invalid cross-device link")
+
+def test_cross_device_move_copies_and_verifies(tmp_path, monkeypatch):
+    make(tmp_path, 'a.mp3')
+    monkeypatch.setattr(os, 'replace', cross_device)
+    move_file(str(tmp_path / 'a.mp3'), str(tmp_path / 'b.mp3'))
+    assert contents(tmp_path) == {'b.mp3': 'a.mp3'}
+
+def test_cross_device_move_keeps_the_source_when_the_copy_differs(tmp_path, monkeypatch):
+    make(tmp_path, 'a.mp3')
+    monkeypatch.setattr(os, 'replace', cross_device)
+    monkeypatch.setattr(rename_plan, '_file_digest', lambda path: b'corrupt')
+    with pytest.raises(OSError):
+        move_file(str(tmp_path / 'a.mp3'), str(tmp_path / 'b.mp3'))
+    assert contents(tmp_path) == {'a.mp3': 'a.mp3'}
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from scanner import walk_folders, walk_mp3_files
+
+def touch(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, 'wb').close()
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='needs symlinks')
+@pytest.mark.parametrize('link_name', ['b/link', 'a/loop', 'z/link'])
+def test_symlinked_folders_are_walked_once(tmp_path, link_name):
+    touch(str(tmp_path / 'a' / 'x.mp3'))
+    touch(str(tmp_path / 'b' / 'y.mp3'))
+    link = tmp_path / link_name
+    link.parent.mkdir(exist_ok=True)
+    os.symlink(os.path.relpath(tmp_path / 'a', link.parent), str(link), target_is_directory=True)
+    found = [os.path.basename(path) for path in walk_mp3_files(str(tmp_path))]
+    assert sorted(found) == ['x.mp3', 'y.mp3']
+
+def test_max_depth_and_exclude(tmp_path):
+    touch(str(tmp_path / 'top.mp3'))
+    touch(str(tmp_path / 'sub' / 'deep.mp3'))
+    touch(str(tmp_path / 'skip' / 'other.mp3'))
+    assert [os.path.basename(p) for p in walk_mp3_files(str(tmp_path), max_depth=0)] == ['top.mp3']
+    found = sorted(os.path.basename(p) for p in walk_mp3_files(str(tmp_path), exclude=('skip',)))
+    assert found == ['deep.mp3', 'top.mp3']
+
+def test_walk_folders_follows_scan_rules(tmp_path):
+    for folder in ('a/b/c', 'skip/d', 'e'):
+        os.makedirs(str(tmp_path / folder))
+    rel = lambda paths: sorted(os.path.relpath(path, str(tmp_path)) for path in paths)
+    assert rel(walk_folders(str(tmp_path), max_depth=2, exclude=('skip',))) == [
+        '.', 'a', os.path.join('a', 'b'), 'e']
+
+def test_walk_folders_under_root(tmp_path):
+    os.makedirs(str(tmp_path / 'a' / 'b' / 'c'))
+    os.makedirs(str(tmp_path / 'skip' / 'd'))
+    root = str(tmp_path)
+    found = list(walk_folders(str(tmp_path / 'a'), max_depth=2, under=root))
+    assert found == [str(tmp_path / 'a'), str(tmp_path / 'a' / 'b')]
+    assert list(walk_folders(str(tmp_path / 'a' / 'b' / 'c'), max_depth=2, under=root)) == []
+    assert list(walk_folders(str(tmp_path / 'skip' / 'd'), exclude=('skip',), under=root)) == []
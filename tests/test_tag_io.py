@@ -0,0 +1,55 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+pytest.importorskip('mutagen')
+from mutagen.id3 import ID3
+
+from corpus import MPEG_FRAME, id3v2_tag
+from profiling import profiler
+from tag_io import PADDING_HEADROOM, PADDING_MAX, normalize_padding, write_tags
+
+def make_file(tmp_path, padding):
+    path = str(tmp_path / 'song.mp3')
+    with open(path, 'wb') as f:
+        f.write(id3v2_tag({'artist': 'Artist', 'title': 'Title'}, padding=padding) + MPEG_FRAME * 4)
+    return path
+
+def counter(name):
+    return profiler.counters.get(name, 0)
+
+def test_normalize_skips_padding_in_range(tmp_path):
+    path = make_file(tmp_path, PADDING_HEADROOM // 2)
+    with open(path, 'rb') as f:
+        before = f.read()
+    saved = counter('files saved')
+    normalize_padding(path)
+    with open(path, 'rb') as f:
+        assert f.read() == before
+    assert counter('files saved') == saved
+
+@pytest.mark.parametrize('padding', [0, PADDING_MAX + 4096])
+def test_normalize_counts_the_rewrite(tmp_path, padding):
+    path = make_file(tmp_path, padding)
+    rewrites = counter('full rewrites')
+    normalize_padding(path)
+    assert counter('full rewrites') == rewrites + 1
+    assert ID3(path).getall('TIT2')[0].text == ['Title']
+
+def test_oversized_padding_shrink_counts_as_rewrite(tmp_path):
+    path = make_file(tmp_path, PADDING_MAX + 4096)
+    rewrites = counter('full rewrites')
+    written = counter('bytes written')
+    write_tags(path, {'genre': 'Jazz'})
+    assert counter('full rewrites') == rewrites + 1
+    assert counter('bytes written') - written > len(MPEG_FRAME) * 4
+    assert os.path.getsize(path) < PADDING_MAX
+
+def test_in_place_save_is_not_a_rewrite(tmp_path):
+    path = make_file(tmp_path, PADDING_HEADROOM)
+    rewrites = counter('full rewrites')
+    write_tags(path, {'genre': 'Jazz'})
+    assert counter('full rewrites') == rewrites
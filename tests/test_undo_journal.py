@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+import undo_journal
+from undo_journal import UndoJournal
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'undo.journal')
+
+def p(tmp_path, name):
+    return str(tmp_path / name)
+
+def test_operations_survive_reopening(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    first = journal.record([(p(tmp_path, 'a.mp3'), None, {'genre': 'Rock'})])
+    second = journal.record([(p(tmp_path, 'b.mp3'), p(tmp_path, 'old.mp3'), {'artist': 'X', 'year': ''})])
+    reopened = UndoJournal(journal_path)
+    operations = reopened.operations()
+    assert [operation.id for operation in operations] == [first.id, second.id]
+    assert operations[1].fields == ['artist', 'year'] and operations[1].renames == 1
+    assert reopened.load(operations[0]) == [(p(tmp_path, 'a.mp3'), None, {'genre': 'Rock'})]
+    assert reopened.load(operations[1]) == [(p(tmp_path, 'b.mp3'), p(tmp_path, 'old.mp3'), {'artist': 'X', 'year': ''})]
+
+def test_frames_appended_by_another_instance_are_read(tmp_path, journal_path):
+    reader = UndoJournal(journal_path)
+    writer = UndoJournal(journal_path)
+    writer.record([(p(tmp_path, 'a.mp3'), None, {'title': 'T'})])
+    assert len(reader.operations()) == 1
+    operation = reader.record([(p(tmp_path, 'b.mp3'), None, {'title': 'U'})])
+    assert operation.id == 2 # The id taken by the other instance isn't reused
+
+def test_torn_last_write_is_ignored_and_overwritten(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'a.mp3'), None, {'title': 'T'})])
+    size = os.path.getsize(journal_path)
+    journal.record([(p(tmp_path, 'b.mp3'), None, {'title': 'U'})])
+    with open(journal_path, 'r+b') as f:
+        f.truncate(os.path.getsize(journal_path) - 3)
+    reopened = UndoJournal(journal_path)
+    assert len(reopened.operations()) == 1
+    reopened.record([(p(tmp_path, 'c.mp3'), None, {'title': 'V'})])
+    assert os.path.getsize(journal_path) > size
+    reread = UndoJournal(journal_path)
+    assert [reread.load(operation)[0][0] for operation in reread.operations()] == [p(tmp_path, 'a.mp3'), p(tmp_path, 'c.mp3')]
+
+def test_restore_rename_chain(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'b.mp3'), p(tmp_path, 'a.mp3'), {})])
+    journal.record([(p(tmp_path, 'c.mp3'), p(tmp_path, 'b.mp3'), {})])
+    assert journal.restores(journal.operations()) == [(p(tmp_path, 'c.mp3'), {}, p(tmp_path, 'a.mp3'))]
+
+def test_restore_rename_and_back_is_a_no_op_move(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'b.mp3'), p(tmp_path, 'a.mp3'), {})])
+    journal.record([(p(tmp_path, 'a.mp3'), p(tmp_path, 'b.mp3'), {'title': 'T'})])
+    assert journal.restores(journal.operations()) == [(p(tmp_path, 'a.mp3'), {'title': 'T'}, None)]
+
+def test_restore_swap(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'b.mp3'), p(tmp_path, 'a.mp3'), {}), (p(tmp_path, 'a.mp3'), p(tmp_path, 'b.mp3'), {})])
+    restores = sorted(journal.restores(journal.operations()))
+    assert restores == [(p(tmp_path, 'a.mp3'), {}, p(tmp_path, 'b.mp3')), (p(tmp_path, 'b.mp3'), {}, p(tmp_path, 'a.mp3'))]
+
+def test_restore_tags_and_rename_of_one_commit(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'new.mp3'), p(tmp_path, 'old.mp3'), {'artist': 'Before', 'genre': ''}),
+                    (p(tmp_path, 'other.mp3'), None, {'artist': 'Other'})])
+    assert sorted(journal.restores(journal.operations())) == [
+        (p(tmp_path, 'new.mp3'), {'artist': 'Before', 'genre': ''}, p(tmp_path, 'old.mp3')),
+        (p(tmp_path, 'other.mp3'), {'artist': 'Other'}, None)]
+
+def test_restore_keeps_the_oldest_value(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    journal.record([(p(tmp_path, 'a.mp3'), None, {'genre': 'First'})])
+    journal.record([(p(tmp_path, 'b.mp3'), p(tmp_path, 'a.mp3'), {'genre': 'Second'})])
+    assert journal.restores(journal.operations()) == [(p(tmp_path, 'b.mp3'), {'genre': 'First'}, p(tmp_path, 'a.mp3'))]
+
+def test_mark_undone_is_not_undone_twice(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    first = journal.record([(p(tmp_path, 'a.mp3'), None, {'genre': 'Rock'})])
+    second = journal.record([(p(tmp_path, 'a.mp3'), None, {'genre': 'Jazz'})])
+    journal.mark_undone([second])
+    assert [operation.id for operation in journal.operations()] == [first.id]
+    assert [operation.id for operation in UndoJournal(journal_path).operations()] == [first.id]
+    # The next undo picks up the older commit, with its own value
+    assert journal.restores(journal.operations()[-1:]) == [(p(tmp_path, 'a.mp3'), {'genre': 'Rock'}, None)]
+
+def test_nothing_to_journal(tmp_path, journal_path):
+    journal = UndoJournal(journal_path)
+    assert journal.record([(p(tmp_path, 'a.mp3'), None, {})]) is None
+    assert journal.operations() == []
+
+def test_compaction_keeps_the_newest_operations(tmp_path, journal_path, monkeypatch):
+    monkeypatch.setattr(undo_journal, 'MAX_OPERATIONS', 8)
+    journal = UndoJournal(journal_path)
+    for number in range(12):
+        journal.record([(p(tmp_path, f'{number}.mp3'), None, {'title': str(number)})])
+    operations = UndoJournal(journal_path).operations()
+    assert len(operations) < 12
+    assert operations[-1].id == 12
+    assert journal.load(operations[-1]) == [(p(tmp_path, '11.mp3'), None, {'title': '11'})]
@@ -0,0 +1,147 @@
+import threading
+from array import array
+from collections.abc import MutableMapping
+
+FIELDS = ('artist', 'album', 'year', 'genre', 'title', 'tracknumber')
+# Fields with few distinct values are stored as 4-byte ids into a shared string pool
+INTERNED_FIELDS = ('artist', 'album', 'year', 'genre', 'tracknumber')
+# Read from the MPEG headers rather than the tag; not editable, so not part of TrackMetadata
+AUDIO_FIELDS = ('duration', 'bitrate', 'vbr')
+
+class StringPool:
+    __slots__ = ('values', 'ids')
+
+    def __init__(self):
+        self.values = ['']
+        self.ids = {'': 0}
+
+    def intern(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.ids[value] = value_id
+        return value_id
+
+class TrackStore:
+    """Columnar storage for every loaded track.
+
+    Paths and titles (nearly always unique) are kept in plain lists; the other tag
+    fields are arrays of ids into per-field string pools, so each distinct artist,
+    album, genre, year or track number exists once however many tracks share it.
+    Duration (seconds), bitrate (kbps) and VBR are fixed-size numeric columns.
+    Rows are addressed by index and recycled through a free list once released.
+    Pools only grow; they hold the distinct values ever seen, not per-track data.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock() # Scan threads add rows while the UI reads them
+        self.paths = []
+        self.titles = []
+        self.active = bytearray()
+        self.errors = {} # row -> parse error, sparse
+        self.pools = {field: StringPool() for field in INTERNED_FIELDS}
+        self.columns = {field: array('I') for field in INTERNED_FIELDS}
+        self.durations = array('f')
+        self.bitrates = array('H')
+        self.vbr = bytearray()
+        self.free_rows = []
+
+    def __len__(self):
+        return len(self.paths) - len(self.free_rows)
+
+    def add(self, path, metadata, error=None):
+        with self.lock:
+            if self.free_rows:
+                row = self.free_rows.pop()
+                self.paths[row] = path
+                self.titles[row] = metadata.get('title', '')
+                self.active[row] = 1
+                for field in INTERNED_FIELDS:
+                    self.columns[field][row] = self.pools[field].intern(metadata.get(field, ''))
+                self.durations[row] = metadata.get('duration') or 0.0
+                self.bitrates[row] = metadata.get('bitrate') or 0
+                self.vbr[row] = bool(metadata.get('vbr'))
+            else:
+                row = len(self.paths)
+                self.paths.append(path)
+                self.titles.append(metadata.get('title', ''))
+                self.active.append(1)
+                for field in INTERNED_FIELDS:
+                    self.columns[field].append(self.pools[field].intern(metadata.get(field, '')))
+                self.durations.append(metadata.get('duration') or 0.0)
+                self.bitrates.append(metadata.get('bitrate') or 0)
+                self.vbr.append(bool(metadata.get('vbr')))
+            if error is not None:
+                self.errors[row] = error
+            return row
+
+    def release(self, row):
+        with self.lock:
+            self.paths[row] = None
+            self.titles[row] = None
+            self.errors.pop(row, None)
+            for field in INTERNED_FIELDS:
+                self.columns[field][row] = 0
+            self.durations[row] = 0.0
+            self.bitrates[row] = 0
+            self.vbr[row] = 0
+            self.free_rows.append(row)
+
+    def get(self, row, field):
+        if field == 'title':
+            return self.titles[row]
+        return self.pools[field].values[self.columns[field][row]]
+
+    def column(self, field):
+        """(keys, values) for reading one field of many rows: values[keys[row]], or keys[row] if values is None."""
+        if field == 'title':
+            return self.titles, None
+        return self.columns[field], self.pools[field].values
+
+    def audio(self, row):
+        return self.durations[row], self.bitrates[row], bool(self.vbr[row])
+
+    def set_audio(self, row, duration, bitrate, vbr):
+        self.durations[row] = duration
+        self.bitrates[row] = bitrate
+        self.vbr[row] = bool(vbr)
+
+    def set(self, row, field, value):
+        if field == 'title':
+            self.titles[row] = value
+        else:
+            with self.lock:
+                self.columns[field][row] = self.pools[field].intern(value)
+
+class TrackMetadata(MutableMapping):
+    """Dict-like view of one row's tag fields, so callers keep using metadata.get(...)."""
+    __slots__ = ('store', 'row')
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def __getitem__(self, field):
+        if field not in FIELDS:
+            raise KeyError(field)
+        return self.store.get(self.row, field)
+
+    def __setitem__(self, field, value):
+        if field not in FIELDS:
+            raise KeyError(field)
+        self.store.set(self.row, field, value)
+
+    def __delitem__(self, field):
+        raise TypeError("track metadata fields can't be removed")
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+default_store = TrackStore()
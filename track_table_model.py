@@ -0,0 +1,119 @@
+import os
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtWidgets import QStyledItemDelegate
+from mpeg_info import format_duration
+
+COLUMNS = (
+    ('File', None),
+    ('Artist', 'artist'),
+    ('Album', 'album'),
+    ('Title', 'title'),
+    ('Length', 'duration'),
+    ('Bitrate', 'bitrate'),
+    ('Mode', 'vbr'),
+)
+# Columns read from MPEG headers (MP3File.audio) rather than the tag
+AUDIO_COLUMNS = ('duration', 'bitrate', 'vbr')
+RIGHT_ALIGNED = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+
+def audio_text(mp3_file, field):
+    duration, bitrate, vbr = mp3_file.audio
+    if not bitrate:
+        return '' # Not an MPEG stream we could parse
+    if field == 'duration':
+        return format_duration(duration)
+    if field == 'bitrate':
+        return f"{bitrate} kbps"
+    return 'VBR' if vbr else 'CBR'
+
+class TrackTableModel(QAbstractTableModel):
+    """Table model over the loaded MP3File list; the check box of column 0 is MP3File.active.
+
+    The model owns the list: add and remove files through its methods so the view is
+    notified. Nothing is cached per row, the view only asks for the rows it paints.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.files = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.files)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section][0]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        mp3_file = self.files[index.row()]
+        field = COLUMNS[index.column()][1]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if field is None:
+                return os.path.basename(mp3_file.path)
+            if field in AUDIO_COLUMNS:
+                return audio_text(mp3_file, field)
+            return mp3_file.metadata[field]
+        if role == Qt.ItemDataRole.CheckStateRole and field is None:
+            return Qt.CheckState.Checked if mp3_file.active else Qt.CheckState.Unchecked
+        if role == Qt.ItemDataRole.TextAlignmentRole and field in ('duration', 'bitrate'):
+            return RIGHT_ALIGNED
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return mp3_file.error or mp3_file.path
+        return None
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if role != Qt.ItemDataRole.CheckStateRole or not index.isValid() or index.column() != 0:
+            return False
+        self.files[index.row()].active = Qt.CheckState(value) == Qt.CheckState.Checked
+        self.dataChanged.emit(index, index, [role])
+        return True
+
+    def flags(self, index):
+        flags = super().flags(index)
+        if index.isValid() and index.column() == 0:
+            flags |= Qt.ItemFlag.ItemIsUserCheckable
+        return flags
+
+    def set_files(self, files):
+        self.beginResetModel()
+        self.files = files
+        self.endResetModel()
+
+    def append_files(self, files):
+        if not files:
+            return
+        start = len(self.files)
+        self.beginInsertRows(QModelIndex(), start, start + len(files) - 1)
+        self.files.extend(files)
+        self.endInsertRows()
+
+    def remove_rows(self, rows):
+        # Remove contiguous runs from the bottom up so the remaining row numbers stay valid
+        rows = sorted(set(rows), reverse=True)
+        while rows:
+            last = first = rows.pop(0)
+            while rows and rows[0] == first - 1:
+                first = rows.pop(0)
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self.files[first:last + 1]
+            self.endRemoveRows()
+
+    def refresh_rows(self, rows):
+        for row in rows:
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(COLUMNS) - 1))
+
+    def active_files(self):
+        return [mp3_file for mp3_file in self.files if mp3_file.active]
+
+class TrackDelegate(QStyledItemDelegate):
+    """Plain painting with middle elision, so long file names keep their extension visible."""
+
+    def initStyleOption(self, option, index):
+        super().initStyleOption(option, index)
+        option.textElideMode = Qt.TextElideMode.ElideMiddle
@@ -0,0 +1,214 @@
+"""Append-only journal of committed tag edits and renames, for undo; nothing here imports PyQt6.
+
+Each commit is one operation holding, per file, only what the commit overwrote: the
+previous values of the fields it wrote and, for a rename, the path it had before.
+An operation is written with a single append once its files are saved: a small
+JSON header (listed without reading the rest) followed by the zlib-compressed
+file entries. Undoing appends a marker rather than editing the file; once the
+journal outgrows MAX_OPERATIONS or MAX_BYTES it is rewritten without undone and
+the oldest operations.
+
+File layout, repeated: struct '<II' (header length, body length), header, body.
+"""
+import os
+import json
+import time
+import zlib
+import struct
+from metadata_cache import default_cache_dir
+from profiling import profiler
+
+FRAME = struct.Struct('<II')
+MAX_OPERATIONS = 5000
+MAX_BYTES = 64 * 1024 * 1024
+# Compaction keeps this share of the limits so it doesn't run again on the next commit
+COMPACT_TO = 0.75
+
+def default_journal_path():
+    return os.path.join(default_cache_dir(), 'undo.journal')
+
+def _key(path):
+    return os.path.normcase(path)
+
+class Operation:
+    """Header of one journaled commit; the file entries stay on disk until load()."""
+    __slots__ = ('id', 'time', 'files', 'renames', 'fields', 'offset', 'size')
+
+    def __init__(self, header, offset, size):
+        self.id = header['id']
+        self.time = header['time']
+        self.files = header['files']
+        self.renames = header['renames']
+        self.fields = header['fields']
+        self.offset = offset # Of the body in the journal file
+        self.size = size
+
+    def describe(self):
+        parts = [f"{self.files} files"]
+        if self.fields:
+            parts.append(", ".join(self.fields))
+        if self.renames:
+            parts.append(f"{self.renames} renamed")
+        return time.strftime('%Y-%m-%d %H:%M', time.localtime(self.time)) + "  " + "; ".join(parts)
+
+class UndoJournal:
+    def __init__(self, path=None):
+        self.path = path or default_journal_path()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.operations_by_id = {} # id -> Operation still undoable, oldest first
+        self.frames = 0 # Records in the file, undone and markers included
+        self.scanned = 0 # Bytes of the file read so far
+        self.next_id = 1
+        self._scan()
+
+    def _scan(self):
+        """Read the headers appended since the last scan (another process may have written some)."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            size = 0
+        if size < self.scanned: # Compacted by someone else: start over
+            self.operations_by_id, self.frames, self.scanned = {}, 0, 0
+        if size == self.scanned:
+            return
+        with open(self.path, 'rb') as f:
+            f.seek(self.scanned)
+            while True:
+                frame = f.read(FRAME.size)
+                if len(frame) < FRAME.size:
+                    break
+                header_size, body_size = FRAME.unpack(frame)
+                header = f.read(header_size)
+                offset = f.tell()
+                if len(header) < header_size or offset + body_size > size:
+                    break # Torn last write; it is overwritten by the next append
+                header = json.loads(header)
+                if 'undone' in header:
+                    for operation_id in header['undone']:
+                        self.operations_by_id.pop(operation_id, None)
+                else:
+                    self.operations_by_id[header['id']] = Operation(header, offset, body_size)
+                    self.next_id = max(self.next_id, header['id'] + 1)
+                f.seek(body_size, os.SEEK_CUR)
+                self.frames += 1
+                self.scanned = f.tell()
+
+    def _append(self, header, body=b''):
+        self._scan()
+        header = json.dumps(header, separators=(',', ':')).encode()
+        with open(self.path, 'ab') as f:
+            f.truncate(self.scanned) # Drop a torn record left by a crash
+            f.write(FRAME.pack(len(header), len(body)) + header + body)
+            offset = self.scanned + FRAME.size + len(header)
+            self.scanned = f.tell()
+        self.frames += 1
+        profiler.count('journal bytes written', FRAME.size + len(header) + len(body))
+        return offset
+
+    def operations(self):
+        """Undoable operations, oldest first."""
+        self._scan()
+        return list(self.operations_by_id.values())
+
+    def record(self, entries):
+        """Journal one commit from (path now, path before or None, {field: previous value}) entries.
+
+        Returns the Operation, or None when there was nothing to journal.
+        """
+        entries = [entry for entry in entries if entry[1] or entry[2]]
+        if not entries:
+            return None
+        with profiler.span('journal write'):
+            self._scan() # Another process may have taken the next id
+            fields = sorted({field for _, _, previous in entries for field in previous})
+            # One row per file, previous values in header field order (null: not written)
+            rows = [[os.path.abspath(path), os.path.abspath(old_path) if old_path else 0]
+                    + [previous.get(field) for field in fields] for path, old_path, previous in entries]
+            body = zlib.compress(json.dumps(rows, separators=(',', ':')).encode())
+            header = {'id': self.next_id, 'time': int(time.time()), 'files': len(rows),
+                      'renames': sum(1 for _, old_path, _ in entries if old_path), 'fields': fields}
+            offset = self._append(header, body)
+            operation = self.operations_by_id[self.next_id] = Operation(header, offset, len(body))
+            self.next_id += 1
+            if (len(self.operations_by_id) > MAX_OPERATIONS or self.frames > 2 * MAX_OPERATIONS
+                    or self.scanned > MAX_BYTES):
+                self.compact()
+        return operation
+
+    def load(self, operation):
+        """The (path now, path before or None, {field: previous value}) entries of an operation."""
+        with open(self.path, 'rb') as f:
+            f.seek(operation.offset)
+            rows = json.loads(zlib.decompress(f.read(operation.size)))
+        fields = operation.fields
+        return [(path, old_path or None, {field: value for field, value in zip(fields, values) if value is not None})
+                for path, old_path, *values in rows]
+
+    def restores(self, operations):
+        """What undoing operations (as listed by operations()) comes down to, one job per file.
+
+        Returns [(path now, {field: value to write back}, path to move back to or None)].
+        Operations are unwound newest first, so a file edited twice gets its oldest
+        value and a file renamed a -> b -> c goes straight back to a.
+        """
+        files = {} # key of the path a file has now -> [path now, fields, original path]
+        at = {} # key of a file's path after the operation being unwound -> its key in files
+        for operation in sorted(operations, key=lambda operation: operation.id, reverse=True):
+            before = {} # ...and before it; kept apart since a swap reuses the same paths
+            for path, old_path, previous in self.load(operation):
+                key = at.pop(_key(path), None)
+                if key is None:
+                    key = _key(path)
+                    files[key] = [path, {}, None]
+                entry = files[key]
+                entry[1].update(previous)
+                if old_path:
+                    entry[2] = old_path
+                before[_key(old_path or path)] = key
+            at.update(before)
+        return [(path, fields, original if original and _key(original) != key else None)
+                for key, (path, fields, original) in files.items()]
+
+    def mark_undone(self, operations):
+        """Drop operations from the undo list; the file keeps them until the next compaction."""
+        ids = [operation.id for operation in operations]
+        for operation_id in ids:
+            self.operations_by_id.pop(operation_id, None)
+        self._append({'undone': ids})
+
+    def compact(self):
+        """Rewrite the journal with only the newest undoable operations, within COMPACT_TO of the limits."""
+        with profiler.span('journal compact'):
+            kept = []
+            total = 0
+            for operation in reversed(list(self.operations_by_id.values())):
+                total += operation.size + 256
+                if len(kept) >= MAX_OPERATIONS * COMPACT_TO or total > MAX_BYTES * COMPACT_TO:
+                    break
+                kept.append(operation)
+            kept.reverse()
+            temp = self.path + '.compact'
+            operations = {}
+            with open(self.path, 'rb') as source, open(temp, 'wb') as target:
+                for operation in kept:
+                    source.seek(operation.offset)
+                    body = source.read(operation.size)
+                    header = json.dumps({'id': operation.id, 'time': operation.time, 'files': operation.files,
+                                         'renames': operation.renames, 'fields': operation.fields},
+                                        separators=(',', ':')).encode()
+                    target.write(FRAME.pack(len(header), len(body)) + header)
+                    operation.offset = target.tell()
+                    target.write(body)
+                    operations[operation.id] = operation
+                size = target.tell()
+            os.replace(temp, self.path)
+            self.operations_by_id = operations
+            self.frames = len(operations)
+            self.scanned = size
+
+def open_journal(path=None):
+    """Open the undo journal, or return None when it can't be created (read-only home, etc.)."""
+    try:
+        return UndoJournal(path)
+    except (OSError, ValueError):
+        return None
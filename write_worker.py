@@ -0,0 +1,82 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from PyQt6.QtCore import QObject, pyqtSignal
+from tag_io import write_tags
+from profiling import profiler, profile_operation
+
+DEFAULT_CONCURRENCY = 4 # Few enough that a spinning disk isn't seeking between many files
+PROGRESS_INTERVAL = 0.05 # Seconds between progress signals
+
+class WriteWorker(QObject):
+    """Writes tags for a list of (path, fields) jobs on a bounded thread pool.
+
+    Meant to be moved to a QThread. Results are reported by job index so the caller
+    can map them back to its MP3File objects and update metadata without re-reading.
+    `prepare`, if given, runs on the worker thread before the first job; if it raises,
+    every job fails with its error.
+    """
+    progress = pyqtSignal(int, int) # done, total
+    finished = pyqtSignal(list, list, bool) # succeeded job indices, [(job index, error)], cancelled
+
+    def __init__(self, jobs, max_workers=DEFAULT_CONCURRENCY, write=write_tags, prepare=None, parent=None):
+        super().__init__(parent)
+        self.jobs = jobs
+        self.max_workers = max(1, max_workers)
+        self.write = write
+        self.prepare = prepare
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def run(self):
+        succeeded = []
+        failed = []
+        total = len(self.jobs)
+        last_progress = 0.0
+        if self.prepare is not None:
+            try:
+                self.prepare()
+            except Exception as e:
+                error = str(e) or type(e).__name__
+                profiler.count('write errors', total)
+                self.finished.emit([], [(job_index, error) for job_index in range(total)], False)
+                return
+        with profile_operation('write'), ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Only a small window of jobs is queued at a time so cancelling stops promptly
+            jobs = iter(enumerate(self.jobs))
+            pending = {}
+            while not self.is_cancelled():
+                for job_index, (path, fields) in jobs:
+                    pending[executor.submit(self.write, path, fields)] = job_index
+                    if len(pending) >= self.max_workers * 2:
+                        break
+                if not pending:
+                    break
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job_index = pending.pop(future)
+                    error = future.exception()
+                    if error is None:
+                        succeeded.append(job_index)
+                    else:
+                        failed.append((job_index, str(error) or type(error).__name__))
+                if time.monotonic() - last_progress > PROGRESS_INTERVAL:
+                    last_progress = time.monotonic()
+                    self.progress.emit(len(succeeded) + len(failed), total)
+            # Writes already running are allowed to finish so no file is left half-saved
+            for future, job_index in pending.items():
+                if future.cancel():
+                    continue # Never started
+                error = future.exception()
+                if error is None:
+                    succeeded.append(job_index)
+                else:
+                    failed.append((job_index, str(error) or type(error).__name__))
+        self.progress.emit(len(succeeded) + len(failed), total)
+        profiler.count('write errors', len(failed))
+        self.finished.emit(succeeded, failed, self.is_cancelled())